@@ -1,4 +1,6 @@
 #!/usr/bin/env bash
 pip install -r requirements.txt
+python build_images.py
 python manage.py collectstatic --noinput
 python manage.py migrate
+python manage.py recalcular_relacionados
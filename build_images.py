@@ -0,0 +1,238 @@
+"""
+Pipeline de imágenes responsivas (reemplaza a convert_to_webp.py)
+
+Por cada imagen de static/images genera varios anchos en WebP y AVIF dentro
+de static/images/build/ y escribe un manifest.json con dimensiones, variantes
+y tamaños que consume el tag {% webp_image %}. La carpeta build/ no se
+versiona: build.sh la genera en cada deploy a partir de las originales.
+
+  - Las imágenes se procesan en paralelo con un pool de procesos (un proceso
+    por núcleo).
+  - Es incremental: cada salida lleva en el nombre un hash del contenido de la
+    imagen original (y de la configuración), así que solo se reconstruye lo
+    que cambió y las salidas viejas se borran.
+
+Uso:
+    python build_images.py            # build incremental
+    python build_images.py --force    # reconstruir todo
+    python build_images.py --jobs 2   # limitar procesos
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+BASE_DIR = Path(__file__).resolve().parent
+STATIC_DIR = BASE_DIR / 'static'
+SOURCE_DIR = STATIC_DIR / 'images'
+OUTPUT_DIR = SOURCE_DIR / 'build'
+MANIFEST_PATH = OUTPUT_DIR / 'manifest.json'
+
+# Extensiones soportadas
+SUPPORTED_FORMATS = {'.jpg', '.jpeg', '.png', '.gif'}
+
+# Anchos a generar (nunca se amplía: se omiten los mayores que el original)
+WIDTHS = (480, 960, 1600)
+
+# Calidad por formato. method=4 en WebP comprime casi igual que method=6
+# en una fracción del tiempo.
+WEBP_QUALITY = 80
+WEBP_METHOD = 4
+AVIF_QUALITY = 55
+AVIF_SPEED = 8
+
+FORMATS = ('avif', 'webp') if features.check('avif') else ('webp',)
+
+# Cambiar cualquiera de estos valores invalida todas las salidas
+CONFIG = f'{WIDTHS}|{FORMATS}|webp{WEBP_QUALITY}/{WEBP_METHOD}|avif{AVIF_QUALITY}/{AVIF_SPEED}'
+
+
+def content_hash(path):
+    """Hash corto del contenido del archivo + configuración del pipeline."""
+    digest = hashlib.sha256(CONFIG.encode())
+    digest.update(path.read_bytes())
+    return digest.hexdigest()[:10]
+
+
+def _static_path(path):
+    return path.relative_to(STATIC_DIR).as_posix()
+
+
+def _anchos(original_width):
+    anchos = [w for w in WIDTHS if w < original_width]
+    tope = min(original_width, WIDTHS[-1])
+    if tope not in anchos:
+        anchos.append(tope)
+    return anchos
+
+
+def _preparar(img):
+    """Aplica la orientación EXIF y deja la imagen en RGB/RGBA."""
+    img = ImageOps.exif_transpose(img)
+    if img.mode == 'P':
+        img = img.convert('RGBA')
+    elif img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    return img
+
+
+def build_image(source, digest, prefix):
+    """
+    Genera todas las variantes de una imagen como `<prefix>.<ancho>.<hash>.<formato>`.
+    Corre en un proceso del pool. Retorna la entrada del manifest (con rutas
+    absolutas; build() las pasa a rutas de static).
+    """
+    with Image.open(source) as original:
+        img = _preparar(original)
+        img.load()
+
+    width, height = img.size
+    variants = {fmt: [] for fmt in FORMATS}
+
+    for w in _anchos(width):
+        h = round(height * w / width)
+        resized = img if w == width else img.resize((w, h), Image.LANCZOS)
+        for fmt in FORMATS:
+            out = Path(f'{prefix}.{w}.{digest}.{fmt}')
+            if fmt == 'webp':
+                resized.save(out, 'WEBP', quality=WEBP_QUALITY, method=WEBP_METHOD)
+            else:
+                resized.save(out, 'AVIF', quality=AVIF_QUALITY, speed=AVIF_SPEED)
+            variants[fmt].append({
+                'width': w,
+                'height': h,
+                'path': str(out),
+                'bytes': out.stat().st_size,
+            })
+
+    return {
+        'hash': digest,
+        'width': width,
+        'height': height,
+        'bytes': source.stat().st_size,
+        'variants': variants,
+    }
+
+
+def _salidas_completas(entry):
+    return all(
+        (STATIC_DIR / v['path']).exists()
+        for fmt_variants in entry['variants'].values()
+        for v in fmt_variants
+    )
+
+
+def load_manifest():
+    try:
+        return json.loads(MANIFEST_PATH.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_manifest(manifest):
+    tmp = MANIFEST_PATH.with_suffix('.tmp')
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def find_sources():
+    return sorted(
+        p for p in SOURCE_DIR.rglob('*')
+        if p.suffix.lower() in SUPPORTED_FORMATS and OUTPUT_DIR not in p.parents
+    )
+
+
+def _prefix(source):
+    stem = source.relative_to(SOURCE_DIR).with_suffix('').as_posix().replace('/', '__')
+    return OUTPUT_DIR / stem
+
+
+def build(jobs=None, force=False):
+    """
+    Construye las variantes que faltan o cambiaron y actualiza el manifest.
+    Retorna (construidas, sin_cambios, errores).
+    """
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    previous = {} if force else load_manifest()
+    manifest = {}
+    pending = {}
+
+    for source in find_sources():
+        key = _static_path(source)
+        digest = content_hash(source)
+        entry = previous.get(key)
+        if entry and entry['hash'] == digest and _salidas_completas(entry):
+            manifest[key] = entry
+        else:
+            pending[key] = (source, digest)
+
+    errores = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            futures = {
+                pool.submit(build_image, source, digest, _prefix(source)): key
+                for key, (source, digest) in pending.items()
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    errores += 1
+                    print(f"❌ Error procesando {key}: {e}")
+                    continue
+                for fmt_variants in entry['variants'].values():
+                    for v in fmt_variants:
+                        v['path'] = _static_path(Path(v['path']))
+                manifest[key] = entry
+
+                # La variante más liviana al ancho máximo
+                best = min((vs[-1] for vs in entry['variants'].values()), key=lambda v: v['bytes'])
+                print(f"✅ {key}: {entry['bytes'] / 1024:.0f} KB → {best['bytes'] / 1024:.0f} KB ({Path(best['path']).suffix[1:]})")
+
+    # Borrar salidas que ya no están en el manifest
+    vigentes = {
+        v['path'] for entry in manifest.values()
+        for fmt_variants in entry['variants'].values() for v in fmt_variants
+    }
+    for out in OUTPUT_DIR.iterdir():
+        if out != MANIFEST_PATH and _static_path(out) not in vigentes:
+            out.unlink()
+
+    write_manifest(manifest)
+    construidas = len(pending) - errores
+    return construidas, len(manifest) - construidas, errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera variantes WebP/AVIF responsivas de static/images')
+    parser.add_argument('--jobs', type=int, default=None, help='Procesos en paralelo (por defecto, uno por núcleo)')
+    parser.add_argument('--force', action='store_true', help='Reconstruir todas las imágenes')
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print("🎨 PIPELINE DE IMÁGENES RESPONSIVAS")
+    print("=" * 60)
+    print(f"Anchos: {', '.join(map(str, WIDTHS))} — Formatos: {', '.join(FORMATS)}")
+    print("=" * 60 + "\n")
+
+    inicio = time.monotonic()
+    construidas, sin_cambios, errores = build(jobs=args.jobs, force=args.force)
+
+    print(f"\n{'=' * 60}")
+    print(f"📊 {construidas} construida(s), {sin_cambios} sin cambios, {errores} con error")
+    print(f"   Tiempo: {time.monotonic() - inicio:.1f}s — Manifest: {MANIFEST_PATH.relative_to(BASE_DIR)}")
+    print(f"{'=' * 60}\n")
+
+    if errores:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
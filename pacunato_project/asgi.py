@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pacunato_project.settings')
 
 application = get_asgi_application()
+
+# Índice del autocompletado del blog: se construye al arrancar el worker, no en un request
+from website.autocompletar import iniciar  # noqa: E402
+
+iniciar()
@@ -27,6 +27,12 @@ ALLOWED_HOSTS = os.environ.get(
 ).split(',')
 
 
+# Identificador del despliegue (Render expone el commit desplegado).
+# Se usa para las ETags de las páginas; si está vacío se calcula un hash
+# de las plantillas al arrancar.
+DEPLOY_VERSION = os.environ.get('RENDER_GIT_COMMIT', '')[:12]
+
+
 # ============================================
 # APLICACIONES
 # ============================================
@@ -65,7 +71,11 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'website.context_processors.recaptcha',
+                'website.context_processors.fragmentos',
             ],
+            'libraries': {
+                'image_tags': 'templatetags.image_tags',
+            },
         },
     },
 ]
@@ -123,6 +133,9 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Manifest de variantes responsivas que genera build_images.py
+IMAGE_MANIFEST = os.path.join(BASE_DIR, 'static', 'images', 'build', 'manifest.json')
+
 # Archivos multimedia (uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -141,6 +154,11 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_PASSWORD', '')
 DEFAULT_FROM_EMAIL = '"Pacunato S.A." <info@pacunato.com>'
 SERVER_EMAIL = 'info@pacunato.com'
 CONTACT_EMAIL = 'info@pacunato.com'
+EMAIL_TIMEOUT = 20
+
+# Conexión SMTP persistente del worker (ver website/mail.py)
+EMAIL_POOL_HEALTHCHECK_AFTER = 30   # segundos sin uso antes de verificar con NOOP
+EMAIL_POOL_MAX_AGE = 600            # renovar la conexión cada 10 minutos
 
 
 # ============================================
@@ -149,6 +167,89 @@ CONTACT_EMAIL = 'info@pacunato.com'
 
 RECAPTCHA_SITE_KEY = os.environ.get('RECAPTCHA_SITE_KEY', '')
 RECAPTCHA_SECRET_KEY = os.environ.get('RECAPTCHA_SECRET_KEY', '')
+RECAPTCHA_TIMEOUT = 2.0              # segundos máximos esperando a Google
+RECAPTCHA_SLOW_THRESHOLD = 1.5       # una respuesta más lenta cuenta como fallo
+RECAPTCHA_BREAKER_THRESHOLD = 3      # fallos seguidos que abren el breaker
+RECAPTCHA_BREAKER_COOLDOWN = 60      # segundos con el breaker abierto (fail-open)
+
+
+# ============================================
+# CACHE
+# ============================================
+# Sin CACHE_URL cada worker usa su propia memoria (locmem). Con CACHE_URL
+# todos los workers comparten un backend:
+#   redis://host:6379/1         Redis o compatible (Valkey, KeyDB, Dragonfly…); requiere `pip install redis`
+#   file:///var/tmp/pacunato    carpeta en disco (varios workers en un mismo servidor)
+
+CACHE_URL = os.environ.get('CACHE_URL', '')
+
+if CACHE_URL.startswith(('redis://', 'rediss://', 'unix://')):
+    _CACHE_COMPARTIDO = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}
+elif CACHE_URL.startswith('file://'):
+    _CACHE_COMPARTIDO = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_URL[len('file://'):]}
+else:
+    _CACHE_COMPARTIDO = None
+
+
+def _cache(prefijo, max_entries):
+    if _CACHE_COMPARTIDO:
+        config = dict(_CACHE_COMPARTIDO, KEY_PREFIX=prefijo)
+        if config['BACKEND'].endswith('FileBasedCache'):
+            # Una carpeta por alias: clear() borra la carpeta completa
+            config['LOCATION'] = os.path.join(config['LOCATION'], prefijo)
+        return config
+    return {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': prefijo,
+        'OPTIONS': {'MAX_ENTRIES': max_entries},
+    }
+
+
+CACHES = {
+    # Versiones (website/caching.py), buffer de vistas, sidebar, sitemap…
+    'default': _cache('pacunato', 5000),
+    # Fragmentos {% cache %} de las plantillas; en DEBUG no se cachean
+    'fragmentos': (
+        {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'} if DEBUG
+        else _cache('fragmentos', 500)
+    ),
+}
+
+# Segundos que vive un fragmento. La clave incluye la huella del despliegue
+# (conditional.deploy_fingerprint), así que cada deploy empieza de cero.
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+# ============================================
+# BLOG
+# ============================================
+
+# Segundos que vive el sidebar cacheado (se invalida antes al guardar un post)
+BLOG_SIDEBAR_TIMEOUT = 60 * 60 * 24
+# Artículos por página en /blog/ y /blog/categoria/<categoria>/
+BLOG_POSTS_PER_PAGE = 12
+# URLs por sitemap; por encima de esto sitemap.xml pasa a ser un índice
+SITEMAP_MAX_URLS = 50000
+
+
+# ============================================
+# CONTADOR DE VISTAS DEL BLOG (write-behind)
+# ============================================
+
+# Alias de CACHES con las claves que filtran recargas (el buffer vive en la memoria de cada worker)
+VIEW_COUNTER_CACHE = 'default'
+# Segundos entre volcados automáticos y latidos en WorkerVistas; `manage.py flush_vistas` espera hasta dos vueltas
+# (0 = sin hilo: solo flush_vistas() dentro del proceso y al terminar)
+VIEW_COUNTER_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNTER_FLUSH_INTERVAL', '30'))
+# Vistas pendientes por worker; con el buffer lleno (BD caída) las nuevas se descartan y se avisa
+VIEW_COUNTER_MAX_PENDING = 10000
+# Vida de la clave de cache que filtra recargas (la clave ya incluye el día; la BD garantiza 1 vista por IP y día)
+VIEW_COUNTER_DEDUP_TTL = 60 * 60 * 24
+# Días que se conservan las vistas crudas (BlogPostView); los agregados diarios no se borran
+VIEW_COUNTER_RETENTION_DAYS = int(os.environ.get('VIEW_COUNTER_RETENTION_DAYS', '30'))
+# Firmas de User-Agent y rangos CIDR extra que no cuentan como vistas (se suman a website/bots.py)
+BOT_USER_AGENTS = []
+BOT_IP_RANGES = []
 
 
 # ============================================
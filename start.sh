@@ -1 +1 @@
-gunicorn pacunato_project.wsgi:application
+gunicorn pacunato_project.asgi:application -k uvicorn_worker.UvicornWorker
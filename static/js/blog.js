@@ -293,5 +293,77 @@ if (shareButtons.length > 0) {
         }
     });
     
+    // ===== CONTADOR DE VISTAS (beacon) =====
+    // El HTML del artículo no incluye contadores para poder cachearse completo;
+    // la vista se registra después de cargar y la respuesta trae los totales.
+    const viewCounter = document.getElementById('view-counter');
+    
+    if (viewCounter && viewCounter.dataset.url) {
+        const viewUrl = viewCounter.dataset.url;
+        const viewLabel = document.getElementById('view-counter-label');
+        
+        const renderViews = (data) => {
+            if (!data || typeof data.views !== 'number') return;
+            viewCounter.textContent = data.views;
+            if (viewLabel) {
+                viewLabel.textContent = data.views === 1 ? 'vista' : 'vistas';
+            }
+        };
+        
+        if (window.fetch) {
+            fetch(viewUrl, { method: 'POST', keepalive: true, credentials: 'omit' })
+                .then(response => response.ok ? response.json() : null)
+                .then(renderViews)
+                .catch(() => {});
+        } else if (navigator.sendBeacon) {
+            navigator.sendBeacon(viewUrl);
+        }
+    }
+    
+    // ===== AUTOCOMPLETADO DEL BUSCADOR =====
+    // Las sugerencias salen de un índice en memoria del servidor
+    document.querySelectorAll('.blog-search-form[data-suggest-url]').forEach(form => {
+        const input = form.querySelector('input[name="q"]');
+        const list = document.createElement('ul');
+        list.className = 'blog-search-suggestions';
+        list.hidden = true;
+        form.appendChild(list);
+
+        let timer;
+        let lastQuery = '';
+        input.setAttribute('autocomplete', 'off');
+        input.addEventListener('input', () => {
+            clearTimeout(timer);
+            const q = input.value.trim();
+            if (q.length < 2) {
+                list.hidden = true;
+                return;
+            }
+            timer = setTimeout(() => {
+                lastQuery = q;
+                fetch(form.dataset.suggestUrl + '?q=' + encodeURIComponent(q))
+                    .then(response => response.ok ? response.json() : { results: [] })
+                    .then(data => {
+                        if (q !== lastQuery) return;  // llegó tarde
+                        list.innerHTML = '';
+                        data.results.forEach(item => {
+                            const li = document.createElement('li');
+                            const link = document.createElement('a');
+                            link.href = item.url;
+                            link.textContent = item.text;
+                            if (item.type === 'tag') {
+                                link.insertAdjacentHTML('afterbegin', '<i class="fas fa-tag"></i> ');
+                            }
+                            li.appendChild(link);
+                            list.appendChild(li);
+                        });
+                        list.hidden = data.results.length === 0;
+                    })
+                    .catch(() => { list.hidden = true; });
+            }, 120);
+        });
+        input.addEventListener('blur', () => setTimeout(() => { list.hidden = true; }, 200));
+    });
+    
     console.log('✅ Blog JS inicializado completamente');
 });
\ No newline at end of file
@@ -1,32 +1,102 @@
+import json
+import os
+from functools import lru_cache
+
 from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
 from django.templatetags.static import static
-from pathlib import Path
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
 
 register = template.Library()
 
+# Formatos en orden de preferencia para los <source>
+FORMATS = (('avif', 'image/avif'), ('webp', 'image/webp'))
+
+_manifest_mtime = None
+
+
+def _recargar_si_cambio():
+    """Descarta el memo si el manifest cambió en disco (solo en DEBUG)."""
+    global _manifest_mtime
+    path = settings.IMAGE_MANIFEST
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    if mtime != _manifest_mtime:
+        _manifest_mtime = mtime
+        _manifest.cache_clear()
+        _picture.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def _manifest():
+    """Manifest de build_images.py; en producción se lee una vez por proceso."""
+    try:
+        with open(settings.IMAGE_MANIFEST, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+@lru_cache(maxsize=256)
+def _picture(image_path):
+    """
+    URLs, srcset y dimensiones de una imagen, calculados una vez por proceso.
+    Las variantes que no existen en disco se omiten; si no queda ninguna se
+    usa solo la imagen original.
+    """
+    entry = _manifest().get(image_path)
+    sources = []
+    width = height = None
+
+    if entry:
+        width, height = entry['width'], entry['height']
+        for fmt, mime in FORMATS:
+            candidates = [
+                v for v in entry['variants'].get(fmt, [])
+                if finders.find(v['path'])
+            ]
+            if candidates:
+                srcset = ', '.join(f"{static(v['path'])} {v['width']}w" for v in candidates)
+                sources.append((mime, srcset))
+
+    return static(image_path), sources, width, height
+
+
+def _picture_for(image_path):
+    if settings.DEBUG:
+        _recargar_si_cambio()
+    return _picture(image_path)
+
+
 @register.simple_tag
-def webp_image(image_path, css_class='', alt='', loading='lazy'):
+def webp_image(image_path, css_class='', alt='', loading='lazy', sizes='100vw', priority=False):
     """
-    Genera etiqueta <picture> con soporte WebP y fallback
-    
+    Genera etiqueta <picture> con variantes AVIF/WebP responsivas y fallback
+
     Uso: {% webp_image 'images/hero.jpg' 'hero-image' 'Descripción' %}
+         {% webp_image 'images/hero.jpg' 'hero-image' 'Descripción' sizes='(max-width: 768px) 100vw, 50vw' priority=True %}
+
+    Con priority=True la imagen se carga de inmediato y con fetchpriority="high"
+    (para imágenes visibles sin hacer scroll).
     """
-    # Obtener ruta base sin extensión
-    path_obj = Path(image_path)
-    base_path = str(path_obj.with_suffix(''))
-    extension = path_obj.suffix
-    
-    # Construir URLs
-    webp_url = static(f"{base_path}.webp")
-    fallback_url = static(image_path)
-    
-    html = f'''<picture>
-    <source srcset="{webp_url}" type="image/webp">
-    <img src="{fallback_url}" 
-         alt="{alt}" 
-         class="{css_class}"
-         loading="{loading}"
-         decoding="async">
-</picture>'''
-    
-    return html
\ No newline at end of file
+    fallback_url, sources, width, height = _picture_for(image_path)
+
+    source_tags = format_html_join(
+        '\n    ', '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime, srcset, sizes) for mime, srcset in sources),
+    )
+    dimensions = format_html(' width="{}" height="{}"', width, height) if width else ''
+    hints = (
+        mark_safe(' loading="eager" fetchpriority="high"') if priority
+        else format_html(' loading="{}"', loading)
+    )
+
+    return format_html(
+        '<picture>\n    {}\n    <img src="{}" alt="{}" class="{}"{}{} decoding="async">\n</picture>',
+        source_tags, fallback_url, alt, css_class, dimensions, hints,
+    )
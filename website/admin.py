@@ -1,9 +1,33 @@
 from django.contrib import admin
+from django.db.models import Count, F, Value
+from django.db.models.functions import Coalesce
 from .models import (
     BlogPost, BlogTag, BlogPostView,
     ConsultaAsesoria, SolicitudCotizacion,
-    NewsletterSubscriber, SolicitudGuia
+    NewsletterSubscriber, SolicitudGuia, TareaOutbox
 )
+from . import exportar
+
+
+# ============================================
+# ACCIONES DE EXPORTACIÓN
+# ============================================
+# Cada admin de leads declara `columnas_exportacion` ([(encabezado, campo)])
+# y `nombre_exportacion` (prefijo del archivo).
+
+def exportar_csv(modeladmin, request, queryset):
+    return exportar.respuesta(
+        request, queryset, modeladmin.columnas_exportacion, modeladmin.nombre_exportacion, 'csv'
+    )
+exportar_csv.short_description = "Exportar a CSV"
+
+
+def exportar_xlsx(modeladmin, request, queryset):
+    return exportar.respuesta(
+        request, queryset, modeladmin.columnas_exportacion, modeladmin.nombre_exportacion, 'xlsx'
+    )
+exportar_xlsx.short_description = "Exportar a Excel (XLSX)"
+
 
 # ============================================
 # ADMIN DE BLOG
@@ -26,7 +50,7 @@ class BlogPostAdmin(admin.ModelAdmin):
     list_editable = ['is_featured', 'is_published']
     date_hierarchy = 'created_at'
 
-    readonly_fields = ['views', 'created_at', 'updated_at', 'get_unique_views_detail']
+    readonly_fields = ['views', 'read_time', 'word_count', 'created_at', 'updated_at', 'get_unique_views_detail']
 
     fieldsets = (
         ('Información Básica', {
@@ -36,7 +60,7 @@ class BlogPostAdmin(admin.ModelAdmin):
             'fields': ('featured_image', 'featured_image_url')
         }),
         ('Categorización', {
-            'fields': ('category', 'tags', 'author', 'read_time')
+            'fields': ('category', 'tags', 'author', 'read_time', 'word_count')
         }),
         ('Estado', {
             'fields': ('is_featured', 'is_published')
@@ -47,18 +71,43 @@ class BlogPostAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Visitantes únicos del resumen HyperLogLog: un LEFT JOIN para toda la página
+        return super().get_queryset(request).annotate(
+            unique_views_count=Coalesce(F('resumen_vistas__visitantes'), Value(0))
+        )
+
     def get_unique_views(self, obj):
-        return f"{obj.unique_views.count()} únicas"
+        return f"{obj.unique_views_count} únicas"
     get_unique_views.short_description = 'Vistas Únicas'
+    get_unique_views.admin_order_field = 'unique_views_count'
 
     def get_unique_views_detail(self, obj):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .resumen_vistas import visitantes_periodo
+
         total_views = obj.views
-        unique_count = obj.unique_views.count()
+        unique_count = obj.unique_views_count
         if unique_count > 0:
-            return f"Total: {total_views} | Únicos: {unique_count} | Repetidas: {total_views - unique_count}"
-        return f"Total de vistas: {total_views}"
+            ultimos_30 = visitantes_periodo(obj.pk, timezone.localdate() - timedelta(days=29))
+            return (
+                f"Total (1 por IP y día): {total_views} | Únicos: {unique_count}"
+                f" | Regresos en otros días: {max(total_views - unique_count, 0)}"
+                f" | Únicos últimos 30 días: {ultimos_30}"
+            )
+        return f"Total de vistas (1 por IP y día): {total_views}"
     get_unique_views_detail.short_description = 'Detalle de Vistas'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Usa el índice de texto completo en lugar de icontains sobre content"""
+        from . import busqueda
+
+        if not busqueda.disponible() or not busqueda.terminos(search_term):
+            return super().get_search_results(request, queryset, search_term)
+        ids = busqueda.buscar(search_term, publicados=False, limite=None)
+        return queryset.filter(pk__in=ids), False
+
 
 @admin.register(BlogTag)
 class BlogTagAdmin(admin.ModelAdmin):
@@ -66,15 +115,26 @@ class BlogTagAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ['name']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(posts_count=Count('posts'))
+
     def get_posts_count(self, obj):
-        return f"{obj.posts.count()} post(s)"
+        return f"{obj.posts_count} post(s)"
     get_posts_count.short_description = 'Artículos'
+    get_posts_count.admin_order_field = 'posts_count'
+
+
+class ArticuloListFilter(admin.RelatedFieldListFilter):
+    """Filtro por artículo que solo carga id y título (no el contenido de cada post)"""
+
+    def field_choices(self, field, request, model_admin):
+        return list(BlogPost.objects.order_by('-created_at').values_list('pk', 'title'))
 
 
 @admin.register(BlogPostView)
 class BlogPostViewAdmin(admin.ModelAdmin):
-    list_display = ['post', 'ip_address', 'viewed_at', 'get_dispositivo']
-    list_filter = ['viewed_at', 'post']
+    list_display = ['get_post_title', 'ip_address', 'viewed_at', 'get_dispositivo']
+    list_filter = ['viewed_at', ('post', ArticuloListFilter)]
     search_fields = ['ip_address', 'user_agent', 'post__title']
     date_hierarchy = 'viewed_at'
     readonly_fields = ['post', 'ip_address', 'user_agent', 'viewed_at']
@@ -89,6 +149,17 @@ class BlogPostViewAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Del artículo solo se muestra el título: no traer content/content_html por fila
+        return super().get_queryset(request).select_related('post').only(
+            'ip_address', 'user_agent', 'viewed_at', 'post__title',
+        )
+
+    def get_post_title(self, obj):
+        return obj.post.title
+    get_post_title.short_description = 'Artículo'
+    get_post_title.admin_order_field = 'post__title'
+
     def get_dispositivo(self, obj):
         ua = obj.user_agent.lower()
         if 'mobile' in ua or 'android' in ua or 'iphone' in ua:
@@ -135,7 +206,19 @@ class ConsultaAsesoriaAdmin(admin.ModelAdmin):
         }),
     )
 
-    actions = ['marcar_como_procesado', 'marcar_como_no_procesado']
+    actions = ['marcar_como_procesado', 'marcar_como_no_procesado', exportar_csv, exportar_xlsx]
+
+    nombre_exportacion = 'consultas'
+    columnas_exportacion = [
+        ('Fecha', 'fecha_envio'),
+        ('Nombre', 'nombre'),
+        ('Email', 'email'),
+        ('Teléfono', 'telefono'),
+        ('Duda', 'duda'),
+        ('Procesado', 'procesado'),
+        ('Fecha Procesamiento', 'fecha_procesamiento'),
+        ('Notas', 'notas_admin'),
+    ]
 
     def marcar_como_procesado(self, request, queryset):
         updated = queryset.update(procesado=True)
@@ -222,7 +305,22 @@ class SolicitudCotizacionAdmin(admin.ModelAdmin):
         )
     get_fuente_badge.short_description = 'Fuente'
 
-    actions = ['marcar_como_procesado', 'marcar_como_no_procesado', 'exportar_a_csv']
+    actions = ['marcar_como_procesado', 'marcar_como_no_procesado', exportar_csv, exportar_xlsx]
+
+    nombre_exportacion = 'cotizaciones'
+    columnas_exportacion = [
+        ('Fecha', 'fecha_envio'),
+        ('Nombre', 'nombre'),
+        ('Empresa', 'empresa'),
+        ('Email', 'email'),
+        ('Teléfono', 'telefono'),
+        ('País Origen', 'pais_origen'),
+        ('País Destino', 'pais_destino'),
+        ('Tipo Servicio', 'tipo_servicio'),
+        ('Mensaje', 'mensaje'),
+        ('Fuente', 'source_page'),
+        ('Procesado', 'procesado'),
+    ]
 
     def get_ruta_display(self, obj):
         return f"{obj.pais_origen} → {obj.pais_destino}"
@@ -238,32 +336,6 @@ class SolicitudCotizacionAdmin(admin.ModelAdmin):
         self.message_user(request, f'{updated} solicitud(es) marcada(s) como no procesada(s).')
     marcar_como_no_procesado.short_description = "Marcar como NO procesado"
 
-    def exportar_a_csv(self, request, queryset):
-        import csv
-        from django.http import HttpResponse
-        from datetime import datetime
-
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="cotizaciones_{datetime.now().strftime("%Y%m%d")}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Fecha', 'Nombre', 'Empresa', 'Email', 'Teléfono',
-            'País Origen', 'País Destino', 'Tipo Servicio', 'Mensaje', 'Procesado'
-        ])
-
-        for s in queryset:
-            writer.writerow([
-                s.fecha_envio.strftime('%Y-%m-%d %H:%M'),
-                s.nombre, s.empresa, s.email, s.telefono,
-                s.pais_origen, s.pais_destino, s.tipo_servicio,
-                s.mensaje, 'Sí' if s.procesado else 'No'
-            ])
-
-        self.message_user(request, f'{queryset.count()} solicitud(es) exportada(s) a CSV.')
-        return response
-    exportar_a_csv.short_description = "Exportar a CSV"
-
 
 # ============================================
 # ADMIN DE NEWSLETTER
@@ -306,12 +378,19 @@ class NewsletterSubscriberAdmin(admin.ModelAdmin):
         }),
     )
 
-    actions = ['exportar_emails', 'reactivar_suscriptores']
-
-    def exportar_emails(self, request, queryset):
-        emails = list(queryset.filter(is_active=True).values_list('email', flat=True))
-        self.message_user(request, f'{len(emails)} emails activos: {", ".join(emails[:10])}{"..." if len(emails) > 10 else ""}')
-    exportar_emails.short_description = "Ver emails activos"
+    actions = [exportar_csv, exportar_xlsx, 'reactivar_suscriptores']
+
+    nombre_exportacion = 'suscriptores'
+    columnas_exportacion = [
+        ('Email', 'email'),
+        ('Nombre', 'name'),
+        ('Fecha Suscripción', 'subscribed_date'),
+        ('Activo', 'is_active'),
+        ('Fecha de Baja', 'unsubscribed_date'),
+        ('Página de Origen', 'source_page'),
+        ('Consentimiento', 'consent_given'),
+        ('Fecha Consentimiento', 'consent_date'),
+    ]
 
     def reactivar_suscriptores(self, request, queryset):
         count = queryset.update(is_active=True, unsubscribed_date=None)
@@ -343,8 +422,50 @@ class SolicitudGuiaAdmin(admin.ModelAdmin):
         }),
     )
 
+    actions = [exportar_csv, exportar_xlsx]
+
+    nombre_exportacion = 'solicitudes_guia'
+    columnas_exportacion = [
+        ('Email', 'email'),
+        ('Nombre', 'name'),
+        ('Fecha Solicitud', 'subscribed_date'),
+        ('Activo', 'is_active'),
+        ('Consentimiento', 'consent_given'),
+        ('Fecha Consentimiento', 'consent_date'),
+    ]
+
     def get_queryset(self, request):
         return super().get_queryset(request).filter(source_page='home-lead-magnet')
 
     def has_add_permission(self, request):
         return False
+
+
+# ============================================
+# ADMIN DEL OUTBOX
+# ============================================
+
+@admin.register(TareaOutbox)
+class TareaOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'estado', 'intentos', 'proximo_intento', 'origen_modelo', 'origen_id', 'fecha_creacion']
+    list_filter = ['estado', 'tipo', 'fecha_creacion']
+    search_fields = ['ultimo_error', 'origen_modelo']
+    readonly_fields = [
+        'tipo', 'payload', 'intentos', 'ultimo_error', 'origen_modelo', 'origen_id',
+        'fecha_creacion', 'fecha_envio',
+    ]
+
+    actions = ['reintentar']
+
+    def reintentar(self, request, queryset):
+        from django.utils import timezone
+        updated = queryset.exclude(estado=TareaOutbox.ESTADO_ENVIADO).update(
+            estado=TareaOutbox.ESTADO_PENDIENTE,
+            intentos=0,
+            proximo_intento=timezone.now(),
+        )
+        self.message_user(request, f'{updated} tarea(s) marcada(s) para reintento.')
+    reintentar.short_description = "Reintentar ahora"
+
+    def has_add_permission(self, request):
+        return False
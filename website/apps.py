@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class WebsiteConfig(AppConfig):
     name = 'website'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,197 @@
+"""
+Índice en memoria para el autocompletado del blog.
+
+Guarda, por proceso, una lista ordenada de claves normalizadas (minúsculas,
+sin acentos) que empiezan en cada palabra de los títulos de artículos
+publicados y de los nombres de etiquetas. Una búsqueda por prefijo es un
+bisect sobre esa lista: ningún keystroke consulta la base de datos.
+
+  - El índice se construye al arrancar el worker (pacunato_project/asgi.py
+    y wsgi.py llaman a `iniciar()`), en un hilo de fondo: ningún request
+    paga la lectura de la base de datos.
+  - Los signals de BlogPost/BlogTag lo actualizan en el proceso que guarda
+    y suben la versión 'autocompletar' del cache; en los demás procesos el
+    mismo hilo la revisa cada REVISAR_CADA segundos y reconstruye si cambió.
+  - Con un cache por proceso (locmem) la versión no se comparte, así que
+    además se reconstruye si el índice tiene más de MAX_EDAD segundos.
+"""
+import os
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+from django.db import close_old_connections
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from .caching import bump_version, get_version
+
+LIMITE = 8
+REVISAR_CADA = 30  # segundos entre chequeos de versión
+MAX_EDAD = 60 * 5  # reconstrucción completa aunque la versión no cambie
+MAX_PALABRAS = 12  # claves por título (una por palabra)
+
+TIPO_POST = 'post'
+TIPO_TAG = 'tag'
+
+_lock = threading.Lock()
+_claves = []       # [(clave, tipo, pk, es_inicio)] ordenada
+_items = {}        # (tipo, pk) → {'type', 'text', 'url'}
+_version = None
+_construido_en = 0.0
+_hilo_pid = None   # proceso en el que corre el hilo de fondo
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos ("Logística" → "logistica"); la ñ se conserva."""
+    texto = unicodedata.normalize('NFD', (texto or '').lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c) or c == '\u0303')
+    return ' '.join(unicodedata.normalize('NFC', texto).split())
+
+
+def _claves_de(tipo, pk, texto):
+    """Una clave por cada palabra: "despacho aduanero" → "despacho aduanero", "aduanero"."""
+    palabras = normalizar(texto).split(' ')
+    return [
+        (' '.join(palabras[i:]), tipo, pk, i == 0)
+        for i in range(min(len(palabras), MAX_PALABRAS)) if palabras[i]
+    ]
+
+
+def _item_post(pk, title, slug):
+    return {'type': TIPO_POST, 'text': title, 'url': reverse('website:blog_post', kwargs={'slug': slug})}
+
+
+def _item_tag(pk, name):
+    return {'type': TIPO_TAG, 'text': name, 'url': reverse('website:blog_buscar') + '?' + urlencode({'q': name})}
+
+
+# ============================================
+# CONSTRUCCIÓN Y ACTUALIZACIÓN
+# ============================================
+
+def construir():
+    """(Re)construye el índice completo: 2 consultas."""
+    global _claves, _items, _version, _construido_en
+    from .models import BlogPost, BlogTag
+
+    version = get_version('autocompletar')
+    items = {}
+    for pk, title, slug in BlogPost.objects.filter(is_published=True).values_list('pk', 'title', 'slug'):
+        items[(TIPO_POST, pk)] = _item_post(pk, title, slug)
+    for pk, name in BlogTag.objects.values_list('pk', 'name'):
+        items[(TIPO_TAG, pk)] = _item_tag(pk, name)
+
+    claves = sorted(
+        clave
+        for (tipo, pk), item in items.items()
+        for clave in _claves_de(tipo, pk, item['text'])
+    )
+    with _lock:
+        _claves, _items = claves, items
+        _version = version
+        _construido_en = time.monotonic()
+
+
+def revisar():
+    """Construye el índice si falta, si cambió la versión o si es viejo. Retorna True si lo reconstruyó."""
+    if _version is None or time.monotonic() - _construido_en > MAX_EDAD or get_version('autocompletar') != _version:
+        construir()
+        return True
+    return False
+
+
+def _loop():
+    while True:
+        try:
+            revisar()
+        except Exception as e:
+            print(f"⚠️ Error al construir el índice de autocompletado: {str(e)}")
+        finally:
+            close_old_connections()
+        time.sleep(REVISAR_CADA)
+
+
+def iniciar():
+    """Arranca (una vez por proceso) el hilo que construye y mantiene el índice."""
+    global _hilo_pid
+    with _lock:
+        if _hilo_pid == os.getpid():
+            return
+        _hilo_pid = os.getpid()
+    threading.Thread(target=_loop, name='autocompletar', daemon=True).start()
+
+
+def _actualizar(tipo, pk, item):
+    """
+    Reemplaza las claves de un artículo o etiqueta. Copia las estructuras en
+    lugar de mutarlas para que las consultas en curso no vean un estado a medias.
+    """
+    global _claves, _items, _version
+    with _lock:
+        version = bump_version('autocompletar')
+        if _version is None:
+            return  # Aún no construido en este proceso: nada que mantener
+        claves = [c for c in _claves if c[1] != tipo or c[2] != pk]
+        items = dict(_items)
+        items.pop((tipo, pk), None)
+        if item is not None:
+            items[(tipo, pk)] = item
+            claves = sorted(claves + _claves_de(tipo, pk, item['text']))
+        _claves, _items = claves, items
+        _version = version
+
+
+def actualizar_post(post):
+    item = _item_post(post.pk, post.title, post.slug) if post.is_published else None
+    _actualizar(TIPO_POST, post.pk, item)
+
+
+def quitar_post(pk):
+    _actualizar(TIPO_POST, pk, None)
+
+
+def actualizar_tag(tag):
+    _actualizar(TIPO_TAG, tag.pk, _item_tag(tag.pk, tag.name))
+
+
+def quitar_tag(pk):
+    _actualizar(TIPO_TAG, pk, None)
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def sugerir(q, limite=LIMITE):
+    """
+    Artículos y etiquetas cuyo texto tiene una palabra que empieza por `q`.
+    Primero las coincidencias desde el inicio del texto; sin duplicados.
+    Mientras el hilo de fondo no termina de construir el índice no hay sugerencias.
+    """
+    prefijo = normalizar(q)
+    if not prefijo:
+        return []
+
+    claves, items = _claves, _items
+    inicio_texto, resto, vistos = [], [], set()
+    i = bisect_left(claves, (prefijo,))
+    while i < len(claves) and claves[i][0].startswith(prefijo):
+        _, tipo, pk, es_inicio = claves[i]
+        i += 1
+        if (tipo, pk) in vistos or (tipo, pk) not in items:
+            continue
+        vistos.add((tipo, pk))
+        (inicio_texto if es_inicio else resto).append(items[(tipo, pk)])
+        if len(inicio_texto) >= limite:
+            break
+    return (inicio_texto + resto)[:limite]
+
+
+def reset():
+    """Descarta el índice del proceso (el hilo de fondo lo reconstruye en su próxima vuelta)."""
+    global _claves, _items, _version, _construido_en
+    with _lock:
+        _claves, _items, _version = [], {}, None
+        _construido_en = 0.0
@@ -0,0 +1,167 @@
+"""
+Búsqueda de texto completo en los artículos del blog.
+
+El índice vive en una tabla aparte, creada por la migración 0012 según la
+base de datos configurada:
+
+  - SQLite:     tabla virtual FTS5 `website_blogpost_fts` (rowid = id del
+                artículo), ordenada por bm25.
+  - PostgreSQL: tabla `website_blogpost_busqueda` con un tsvector e índice
+                GIN, ordenada por ts_rank_cd. La config 'spanish_unaccent'
+                (migración 0019) quita los acentos antes del stemming, en el
+                índice y en la consulta.
+
+En ambas "logistica" encuentra "logística" y viceversa.
+
+El título pesa más que el extracto y éste más que el cuerpo. El índice se
+actualiza en post_save/post_delete de BlogPost (signals.py). En otras bases
+de datos `disponible()` es False y se usa icontains.
+
+Lo usan la vista /blog/buscar/ y el buscador del admin.
+"""
+import re
+
+from django.db import connection
+from django.utils.html import strip_tags
+
+TABLA_SQLITE = 'website_blogpost_fts'
+TABLA_POSTGRES = 'website_blogpost_busqueda'
+CONFIG_POSTGRES = 'spanish_unaccent'
+
+# Pesos de (título, extracto, cuerpo)
+PESOS_SQLITE = (10.0, 4.0, 1.0)
+
+_TERMINO = re.compile(r'\w+')
+
+
+def disponible(conn=None):
+    return (conn or connection).vendor in ('sqlite', 'postgresql')
+
+
+def _cuerpo(html):
+    return ' '.join(strip_tags(html or '').split())
+
+
+# ============================================
+# ESQUEMA (lo ejecuta la migración)
+# ============================================
+
+def crear_indice(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_SQLITE} USING fts5("
+            "title, excerpt, body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {TABLA_POSTGRES} ("
+            "post_id integer PRIMARY KEY REFERENCES website_blogpost (id) ON DELETE CASCADE, "
+            "documento tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {TABLA_POSTGRES}_gin ON {TABLA_POSTGRES} USING GIN (documento)"
+        )
+
+
+def borrar_indice(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLA_SQLITE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLA_POSTGRES}")
+
+
+# ============================================
+# SINCRONIZACIÓN
+# ============================================
+
+def indexar(pk, title, excerpt, html, conn=None):
+    """Inserta o reemplaza la entrada de un artículo."""
+    conn = conn or connection
+    body = _cuerpo(html)
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {TABLA_SQLITE} WHERE rowid = %s", [pk])
+            cursor.execute(
+                f"INSERT INTO {TABLA_SQLITE} (rowid, title, excerpt, body) VALUES (%s, %s, %s, %s)",
+                [pk, title, excerpt, body],
+            )
+        elif conn.vendor == 'postgresql':
+            cursor.execute(
+                f"INSERT INTO {TABLA_POSTGRES} (post_id, documento) VALUES (%s, "
+                f"setweight(to_tsvector('{CONFIG_POSTGRES}', %s), 'A') || "
+                f"setweight(to_tsvector('{CONFIG_POSTGRES}', %s), 'B') || "
+                f"setweight(to_tsvector('{CONFIG_POSTGRES}', %s), 'C')) "
+                "ON CONFLICT (post_id) DO UPDATE SET documento = EXCLUDED.documento",
+                [pk, title, excerpt, body],
+            )
+
+
+def quitar(pk, conn=None):
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {TABLA_SQLITE} WHERE rowid = %s", [pk])
+        elif conn.vendor == 'postgresql':
+            # ON DELETE CASCADE ya lo borra; por si se llama antes del DELETE
+            cursor.execute(f"DELETE FROM {TABLA_POSTGRES} WHERE post_id = %s", [pk])
+
+
+def indexar_post(post):
+    if disponible():
+        indexar(post.pk, post.title, post.excerpt, post.content_html)
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def terminos(q):
+    """Palabras de la búsqueda (se ignoran operadores y signos)."""
+    return _TERMINO.findall(q or '')[:10]
+
+
+def buscar(q, publicados=True, limite=20):
+    """
+    IDs de artículos que coinciden con `q`, del más al menos relevante.
+    La última palabra se busca como prefijo ("logíst" encuentra "logística").
+    """
+    palabras = terminos(q)
+    if not palabras or not disponible():
+        return []
+
+    filtro = ' AND p.is_published' if publicados else ''
+    limit = ' LIMIT %s' if limite else ''
+    params_limit = [limite] if limite else []
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            match = ' '.join(f'"{p}"' for p in palabras) + '*'
+            cursor.execute(
+                f"SELECT f.rowid FROM {TABLA_SQLITE} f "
+                f"JOIN website_blogpost p ON p.id = f.rowid "
+                f"WHERE {TABLA_SQLITE} MATCH %s{filtro} "
+                f"ORDER BY bm25({TABLA_SQLITE}, %s, %s, %s){limit}",
+                [match, *PESOS_SQLITE, *params_limit],
+            )
+        else:
+            consulta = ' & '.join(palabras) + ':*'
+            cursor.execute(
+                f"SELECT b.post_id FROM {TABLA_POSTGRES} b "
+                f"JOIN website_blogpost p ON p.id = b.post_id, "
+                f"to_tsquery('{CONFIG_POSTGRES}', %s) q "
+                f"WHERE b.documento @@ q{filtro} "
+                f"ORDER BY ts_rank_cd(b.documento, q) DESC{limit}",
+                [consulta, *params_limit],
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def buscar_posts(q, limite=20):
+    """Artículos publicados que coinciden con `q`, ordenados por relevancia."""
+    from .models import BlogPost
+
+    ids = buscar(q, limite=limite)
+    posts = BlogPost.objects.filter(pk__in=ids).defer('content', 'content_html', 'toc').in_bulk()
+    return [posts[pk] for pk in ids if pk in posts]
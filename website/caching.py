@@ -0,0 +1,42 @@
+"""
+Helpers de cache versionado.
+
+Cada grupo de contenido ("blog", ...) tiene un número de versión en el cache.
+Las claves de los fragmentos incluyen esa versión, así que invalidar todo un
+grupo es un solo incr() — las entradas viejas simplemente expiran.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(nombre):
+    return f'version:{nombre}'
+
+
+def get_version(nombre):
+    """Versión actual del grupo `nombre`."""
+    key = _version_key(nombre)
+    version = cache.get(key)
+    if version is None:
+        # Partir de un valor basado en la hora para no reutilizar versiones
+        # anteriores si la clave fue expulsada del cache
+        cache.add(key, int(time.time()), timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+
+def bump_version(nombre):
+    """Invalida todos los fragmentos del grupo `nombre`."""
+    key = _version_key(nombre)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time()), timeout=None)
+        return cache.get(key)
+
+
+def versioned_key(nombre, *partes):
+    """Clave de cache para un fragmento del grupo `nombre`."""
+    sufijo = ':'.join(str(p) for p in partes)
+    return f'{nombre}:v{get_version(nombre)}:{sufijo}'
@@ -0,0 +1,117 @@
+"""
+Validadores HTTP (ETag) para las páginas del sitio.
+
+Las ETags se calculan sin renderizar nada, así que una revisita con
+If-None-Match recibe un 304 antes de tocar la plantilla:
+
+  - Páginas estáticas: huella del despliegue (DEPLOY_VERSION o, si no está,
+    hash de las plantillas) + plantilla + cookie CSRF si la página tiene
+    formularios.
+  - Artículos: updated_at del post + versión del blog (navegación
+    anterior/siguiente) + huella del despliegue.
+  - Listados del blog: versión del blog + query string + huella.
+"""
+import hashlib
+from functools import lru_cache, wraps
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+
+from .caching import get_version
+
+
+@lru_cache(maxsize=1)
+def deploy_fingerprint():
+    """
+    Identificador del despliegue actual. Usa DEPLOY_VERSION (commit de Render)
+    y, si no existe, un hash del contenido de las plantillas.
+    """
+    if settings.DEPLOY_VERSION:
+        return settings.DEPLOY_VERSION
+
+    digest = hashlib.md5()
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for path in sorted(Path(directory).rglob('*.html')):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def condicion(etag_func):
+    """
+    Como @condition(etag_func=...), pero en vistas async la ETag se calcula
+    con sync_to_async: las etag_func consultan la base de datos o la sesión
+    y no pueden correr dentro del event loop.
+    """
+    def decorator(func):
+        if not iscoroutinefunction(func):
+            return condition(etag_func=etag_func)(func)
+
+        @wraps(func)
+        async def inner(request, *args, **kwargs):
+            etag = await sync_to_async(etag_func)(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await func(request, *args, **kwargs)
+            if etag and request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+
+        return inner
+
+    return decorator
+
+
+def _etag(*partes):
+    raw = '|'.join(str(p) for p in (deploy_fingerprint(),) + partes)
+    return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def _tiene_mensajes(request):
+    """Los mensajes flash cambian el HTML y no deben quedar tras un 304."""
+    storage = getattr(request, '_messages', None)
+    return storage is not None and len(storage) > 0
+
+
+def pagina_estatica(template_name, csrf=False):
+    """
+    ETag para vistas que solo renderizan una plantilla fija.
+    Con csrf=True la ETag incluye la cookie CSRF, porque el HTML lleva
+    un token derivado de ella.
+    """
+    def etag_func(request, *args, **kwargs):
+        if _tiene_mensajes(request):
+            return None
+        cookie = ''
+        if csrf:
+            cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+            if not cookie:
+                return None  # Renderizar completo para que se emita la cookie
+        return _etag('pagina', template_name, cookie)
+
+    return condicion(etag_func)
+
+
+def _blog_post_etag(request, slug=None):
+    from .models import BlogPost
+
+    posts = BlogPost.objects.filter(is_published=True)
+    if slug:
+        posts = posts.filter(slug=slug)
+    updated_at = posts.values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None  # La vista responderá 404
+    return _etag('post', slug, updated_at.isoformat(), get_version('blog'))
+
+
+def _blog_listado_etag(request, *args, **kwargs):
+    return _etag('listado', request.path, request.GET.urlencode(), get_version('blog'))
+
+
+blog_post_condition = condicion(_blog_post_etag)
+blog_listado_condition = condicion(_blog_listado_etag)
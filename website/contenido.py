@@ -0,0 +1,160 @@
+"""
+Compilación del contenido de los artículos del blog.
+
+BlogPost.save() pasa `content` (HTML escrito en el admin) por `compilar()` y
+guarda el resultado, así que la vista del artículo no procesa nada:
+
+  - Cada <h2> recibe un id (slug del texto, sin repetir) si no lo trae, y
+    con ellos se arma la tabla de contenido que se renderiza en el servidor.
+  - Las <img> reciben loading="lazy" y decoding="async" si no los traen.
+  - Se cuentan las palabras del texto visible para el tiempo de lectura.
+
+Se usa html.parser de la librería estándar; el HTML que no se modifica se
+copia tal cual (el parser no "corrige" el marcado del autor).
+"""
+import math
+import re
+from html import escape, unescape
+from html.parser import HTMLParser
+
+from django.utils.text import slugify
+
+PALABRAS_POR_MINUTO = 200
+NIVELES_TOC = ('h2',)
+_PALABRA = re.compile(r'\w+')
+
+
+def _atributos(attrs):
+    return ''.join(
+        f' {nombre}' if valor is None else f' {nombre}="{escape(valor)}"'
+        for nombre, valor in attrs
+    )
+
+
+class _Compilador(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.salida = []
+        self.toc = []
+        self.palabras = 0
+        self._ids = set()
+        self._ignorar = 0          # dentro de <script>/<style>
+        self._encabezado = None    # (índice en salida, tag, attrs, textos)
+        self._inicio = 0           # posición del evento actual en self.rawdata
+
+    # ---- etiquetas ----
+
+    def handle_starttag(self, tag, attrs):
+        self._abrir(tag, attrs, self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        self._abrir(tag, attrs, self.get_starttag_text(), vacio=True)
+
+    def _abrir(self, tag, attrs, original, vacio=False):
+        nombres = {nombre for nombre, _ in attrs}
+        if tag in ('script', 'style') and not vacio:
+            self._ignorar += 1
+
+        if tag == 'img' and not {'loading', 'decoding'} <= nombres:
+            attrs = list(attrs)
+            if 'loading' not in nombres:
+                attrs.append(('loading', 'lazy'))
+            if 'decoding' not in nombres:
+                attrs.append(('decoding', 'async'))
+            original = f'<img{_atributos(attrs)}{" /" if vacio else ""}>'
+
+        if tag in NIVELES_TOC and self._encabezado is None and not vacio:
+            self._encabezado = (len(self.salida), tag, list(attrs), [])
+
+        self.salida.append(original)
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style') and self._ignorar:
+            self._ignorar -= 1
+        if self._encabezado and self._encabezado[1] == tag:
+            self._cerrar_encabezado()
+        self.salida.append(f'</{tag}>')
+
+    def _cerrar_encabezado(self):
+        indice, tag, attrs, textos = self._encabezado
+        self._encabezado = None
+        texto = ' '.join(''.join(textos).split())
+        actual = dict(attrs).get('id')
+
+        if actual:
+            anchor = actual
+        else:
+            base = slugify(texto) or f'seccion-{len(self.toc) + 1}'
+            anchor, n = base, 2
+            while anchor in self._ids:
+                anchor, n = f'{base}-{n}', n + 1
+            self.salida[indice] = f'<{tag}{_atributos(attrs + [("id", anchor)])}>'
+
+        self._ids.add(anchor)
+        if texto:
+            self.toc.append({'id': anchor, 'text': texto, 'level': int(tag[1])})
+
+    # ---- texto ----
+
+    def handle_data(self, data):
+        self.salida.append(data)
+        if self._ignorar:
+            return
+        self.palabras += len(_PALABRA.findall(data))
+        if self._encabezado:
+            self._encabezado[3].append(data)
+
+    def goahead(self, end):
+        self._inicio = 0
+        super().goahead(end)
+
+    def updatepos(self, i, j):
+        # El parser avanza siempre por aquí: j es donde empieza el próximo evento en rawdata
+        self._inicio = j
+        return super().updatepos(i, j)
+
+    def handle_entityref(self, name):
+        self._referencia('&', name)
+
+    def handle_charref(self, name):
+        self._referencia('&#', name)
+
+    def _referencia(self, prefijo, name):
+        """Copia la referencia como la escribió el autor: en "AT&T" o "&copy 2024" no hay ';'."""
+        original = prefijo + name
+        if self.rawdata.startswith(';', self._inicio + len(original)):
+            original += ';'
+        self.salida.append(original)
+        if self._encabezado:
+            self._encabezado[3].append(unescape(original))
+
+    def handle_comment(self, data):
+        self.salida.append(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        self.salida.append(f'<!{decl}>')
+
+    def handle_pi(self, data):
+        self.salida.append(f'<?{data}>')
+
+    def unknown_decl(self, data):
+        # <![CDATA[...]]> (en SVG/MathML) y secciones condicionales <![if ...]>
+        cierre = ']]>' if data.upper().startswith('CDATA[') else ']>'
+        self.salida.append(f'<![{data}{cierre}')
+
+
+def compilar(html):
+    """
+    Procesa el HTML de un artículo.
+    Retorna (html, toc, palabras); toc es una lista de
+    {'id', 'text', 'level'} en orden de aparición.
+    """
+    parser = _Compilador()
+    parser.feed(html or '')
+    parser.close()
+    return ''.join(parser.salida), parser.toc, parser.palabras
+
+
+def minutos_de_lectura(palabras):
+    return max(1, math.ceil(palabras / PALABRAS_POR_MINUTO))
@@ -1,5 +1,15 @@
 from django.conf import settings
 
+from .conditional import deploy_fingerprint
+
 
 def recaptcha(request):
     return {'RECAPTCHA_SITE_KEY': settings.RECAPTCHA_SITE_KEY}
+
+
+def fragmentos(request):
+    """Versión y duración de los fragmentos {% cache %} (se invalidan en cada deploy)."""
+    return {
+        'FRAGMENT_VERSION': deploy_fingerprint(),
+        'FRAGMENT_TIMEOUT': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,222 @@
+"""
+Exportación de leads desde el admin a CSV y XLSX.
+
+Las filas salen de `values_list(...).iterator(chunk_size=CHUNK)` y se
+escriben en bloques de CHUNK filas dentro de un StreamingHttpResponse, así
+que la memoria no depende del tamaño de la exportación.
+
+  - CSV:  UTF-8 con BOM (Excel respeta los acentos) y textos que empiezan
+          con =, @, etc. escapados para que no se evalúen como fórmulas.
+  - XLSX: libro de una hoja escrito con zipfile de la librería estándar
+          sobre un stream sin seek; las celdas de texto son inlineStr (sin
+          tabla de strings compartidos que obligue a tener todo en memoria).
+
+Bajo ASGI el generador se consume con sync_to_async bloque a bloque; si
+no, Django lo convertiría en una lista completa antes de enviarlo.
+"""
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+CHUNK = 2000
+
+TIPOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Fórmulas en CSV; "+51 999 888 777" es un teléfono, no una fórmula
+_FORMULA = re.compile(r'^[=@\t\r]|^[+-](?![\d\s()]*$)')
+# Caracteres de control que XML 1.0 no admite
+_CONTROL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return 'Sí' if valor else 'No'
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.strftime('%Y-%m-%d %H:%M')
+    if isinstance(valor, date):
+        return valor.strftime('%Y-%m-%d')
+    return str(valor)
+
+
+class _Salida:
+    """Archivo de solo escritura que acumula hasta que el generador lo vacía."""
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._partes.append(data)
+        self._posicion += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._posicion
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        data = b''.join(self._partes)
+        self._partes = []
+        return data
+
+
+# ============================================
+# CSV
+# ============================================
+
+def _celda_csv(valor):
+    texto = _texto(valor)
+    if isinstance(valor, str) and _FORMULA.match(texto):
+        return "'" + texto
+    return texto
+
+
+def filas_csv(encabezados, filas):
+    salida = _Salida()
+    writer = csv.writer(salida)
+    salida.write('\ufeff')  # BOM
+    writer.writerow(encabezados)
+    for i, fila in enumerate(filas, 1):
+        writer.writerow([_celda_csv(v) for v in fila])
+        if i % CHUNK == 0:
+            yield salida.vaciar()
+    yield salida.vaciar()
+
+
+# ============================================
+# XLSX
+# ============================================
+
+_XLSX_FIJOS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Datos" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+_HOJA_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+_HOJA_FIN = '</sheetData></worksheet>'
+
+
+def _columna(n):
+    """0 → A, 25 → Z, 26 → AA"""
+    letras = ''
+    n += 1
+    while n:
+        n, resto = divmod(n - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _fila_xlsx(numero, valores, columnas):
+    celdas = []
+    for columna, valor in zip(columnas, valores):
+        ref = f'{columna}{numero}'
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            celdas.append(f'<c r="{ref}"><v>{valor}</v></c>')
+        else:
+            texto = escape(_CONTROL_XML.sub('', _texto(valor)))
+            celdas.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>')
+    return f'<row r="{numero}">{"".join(celdas)}</row>'
+
+
+def filas_xlsx(encabezados, filas):
+    columnas = [_columna(i) for i in range(len(encabezados))]
+    salida = _Salida()
+    with zipfile.ZipFile(salida, 'w', zipfile.ZIP_DEFLATED) as libro:
+        for nombre, contenido in _XLSX_FIJOS.items():
+            libro.writestr(nombre, contenido)
+        with libro.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as hoja:
+            hoja.write(_HOJA_INICIO.encode())
+            hoja.write(_fila_xlsx(1, encabezados, columnas).encode('utf-8'))
+            for i, fila in enumerate(filas, 2):
+                hoja.write(_fila_xlsx(i, fila, columnas).encode('utf-8'))
+                if i % CHUNK == 0:
+                    yield salida.vaciar()
+            hoja.write(_HOJA_FIN.encode())
+    yield salida.vaciar()
+
+
+# ============================================
+# RESPUESTA
+# ============================================
+
+async def _asincrono(bloques):
+    """Consume el generador en el hilo de la vista (el cursor de la BD no cambia de hilo)."""
+    siguiente = sync_to_async(next)
+    try:
+        while (bloque := await siguiente(bloques, None)) is not None:
+            yield bloque
+    finally:
+        await sync_to_async(bloques.close)()
+
+
+def respuesta(request, queryset, columnas, nombre, formato='csv'):
+    """
+    StreamingHttpResponse con las filas de `queryset`.
+    columnas: [(encabezado, campo), ...]; los campos admiten lookups ('post__title').
+    """
+    encabezados = [encabezado for encabezado, _ in columnas]
+    campos = [campo for _, campo in columnas]
+    filas = queryset.values_list(*campos).iterator(chunk_size=CHUNK)
+    escribir = filas_xlsx if formato == 'xlsx' else filas_csv
+    bloques = escribir(encabezados, filas)
+    if isinstance(request, ASGIRequest):
+        bloques = _asincrono(bloques)
+
+    response = StreamingHttpResponse(bloques, content_type=TIPOS[formato])
+    fecha = timezone.localdate().strftime('%Y%m%d')
+    response['Content-Disposition'] = f'attachment; filename="{nombre}_{fecha}.{formato}"'
+    return response
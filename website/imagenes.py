@@ -0,0 +1,139 @@
+"""
+Derivados de la imagen destacada de los artículos del blog.
+
+Al guardar un BlogPost con una imagen nueva se generan, en un hilo aparte
+(el request del admin no espera), tres versiones WebP:
+
+  - thumb: sidebar de artículos recientes
+  - card:  tarjetas del listado y de categorías
+  - hero:  artículo destacado y cabecera del artículo
+
+Los nombres llevan un hash del contenido original
+(`blog/derivados/<nombre>.<tamaño>.<hash>.webp`), así que una URL nunca
+cambia de contenido y se puede cachear sin vencimiento. Mientras los
+derivados no existen los templates usan la imagen original.
+
+`python manage.py generar_derivados` genera los que falten (artículos
+anteriores o hilos interrumpidos por un deploy); con --force reescribe
+también los que ya existen (derivados corruptos o cambios de calidad).
+"""
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+
+# Ancho máximo de cada derivado (nunca se amplía el original)
+TAMANOS = {
+    'thumb': 160,
+    'card': 640,
+    'hero': 1280,
+}
+WEBP_QUALITY = 80
+WEBP_METHOD = 4
+CARPETA = 'blog/derivados'
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='derivados-blog')
+
+
+def vigentes(post):
+    """Derivados del post si corresponden a la imagen actual; si no, {}."""
+    variantes = post.featured_image_variants or {}
+    if not post.featured_image or variantes.get('source') != post.featured_image.name:
+        return {}
+    return variantes
+
+
+def _preparar(img):
+    img = ImageOps.exif_transpose(img)
+    if img.mode == 'P':
+        img = img.convert('RGBA')
+    elif img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    return img
+
+
+def _nombre(source_name, tamano, digest):
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    return f'{CARPETA}/{stem}.{tamano}.{digest}.webp'
+
+
+def generar(post, sobrescribir=False):
+    """
+    Genera los derivados de la imagen destacada y los guarda en
+    featured_image_variants. Un derivado que ya existe con el mismo nombre
+    se reusa, salvo con `sobrescribir`. Retorna el dict de variantes.
+    """
+    from .caching import bump_version
+    from .models import BlogPost
+
+    field = post.featured_image
+    storage = field.storage
+    anteriores = post.featured_image_variants or {}
+
+    if not field:
+        variantes = {}
+    else:
+        with field.open('rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:10]
+
+        with Image.open(io.BytesIO(data)) as original:
+            img = _preparar(original)
+            img.load()
+        width, height = img.size
+
+        variantes = {'source': field.name, 'hash': digest}
+        for tamano, ancho in TAMANOS.items():
+            w = min(ancho, width)
+            h = round(height * w / width)
+            name = _nombre(field.name, tamano, digest)
+            if sobrescribir and storage.exists(name):
+                storage.delete(name)  # mismo nombre: save() no pisa, le agregaría un sufijo
+            if not storage.exists(name):
+                resized = img if w == width else img.resize((w, h), Image.LANCZOS)
+                buffer = io.BytesIO()
+                resized.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=WEBP_METHOD)
+                name = storage.save(name, ContentFile(buffer.getvalue()))
+            variantes[tamano] = {'name': name, 'width': w, 'height': h}
+
+    # Solo si la imagen no cambió mientras se generaban (update() no dispara post_save)
+    actualizado = BlogPost.objects.filter(pk=post.pk, featured_image=field.name).update(
+        featured_image_variants=variantes
+    )
+    if not actualizado:
+        return variantes
+    post.featured_image_variants = variantes
+
+    # Borrar los derivados de la imagen anterior
+    nuevos = {v['name'] for k, v in variantes.items() if k in TAMANOS}
+    for tamano in TAMANOS:
+        name = (anteriores.get(tamano) or {}).get('name')
+        if name and name not in nuevos:
+            storage.delete(name)
+
+    bump_version('blog')
+    return variantes
+
+
+def _generar_en_hilo(pk):
+    from .models import BlogPost
+
+    close_old_connections()
+    try:
+        post = BlogPost.objects.filter(pk=pk).first()
+        if post is not None and not vigentes(post) and (post.featured_image or post.featured_image_variants):
+            generar(post)
+            print(f"✅ Derivados de imagen generados: {post.title}")
+    except Exception as e:
+        print(f"⚠️ Error generando derivados de imagen (post {pk}): {e}")
+    finally:
+        close_old_connections()
+
+
+def programar(post):
+    """Encola la generación de derivados del post en el hilo de fondo."""
+    return _executor.submit(_generar_en_hilo, post.pk)
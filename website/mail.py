@@ -0,0 +1,155 @@
+"""
+Spooler de emails con conexión SMTP persistente.
+
+Abrir una conexión TLS con smtp.hostinger.com cuesta más que enviar el
+mensaje, así que cada proceso mantiene una sola conexión abierta y la reusa
+para todos los lotes:
+
+  - Antes de un lote, si la conexión lleva más de EMAIL_POOL_HEALTHCHECK_AFTER
+    segundos sin usarse se verifica con NOOP; si pasó EMAIL_POOL_MAX_AGE desde
+    que se abrió se renueva (el servidor las corta tarde o temprano).
+  - Si la conexión se cae a mitad de lote se reconecta y se reintenta ese
+    mensaje una vez. Los rechazos del servidor (destinatario inválido, etc.)
+    no tumban el resto del lote.
+  - `estadisticas()` expone contadores de mensajes, conexiones y latencia.
+"""
+import smtplib
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+_lock = threading.Lock()
+_conexion = None
+_abierta_en = 0.0
+_usada_en = 0.0
+
+_stats = {
+    'mensajes': 0,
+    'errores': 0,
+    'lotes': 0,
+    'conexiones': 0,
+    'reconexiones': 0,
+    'segundos': 0.0,
+    'ultimo_lote_ms': 0.0,
+}
+
+# Errores que indican que la conexión ya no sirve (reconectar y reintentar).
+# No basta con OSError: SMTPException hereda de él, y un rechazo del servidor
+# (SMTPRecipientsRefused, SMTPDataError...) reenviado podría llegar duplicado.
+ERRORES_DE_CONEXION = (
+    smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+    ConnectionError, TimeoutError, socket.gaierror,
+)
+
+
+def _cerrar():
+    global _conexion
+    if _conexion is not None:
+        try:
+            _conexion.close()
+        except Exception:
+            pass
+    _conexion = None
+
+
+def _abrir():
+    global _conexion, _abierta_en, _usada_en
+    _cerrar()
+    _conexion = get_connection(fail_silently=False)
+    _conexion.open()
+    _abierta_en = _usada_en = time.monotonic()
+    _stats['conexiones'] += 1
+
+
+def _sana():
+    """True si la conexión actual sigue respondiendo."""
+    smtp = getattr(_conexion, 'connection', None)
+    if smtp is None:
+        return True  # Backends sin socket (locmem, consola)
+    try:
+        return smtp.noop()[0] == 250
+    except ERRORES_DE_CONEXION + (smtplib.SMTPException,):
+        return False
+
+
+def _conexion_lista():
+    """Retorna la conexión del proceso, abriéndola o renovándola si hace falta."""
+    ahora = time.monotonic()
+    if _conexion is None:
+        _abrir()
+    elif ahora - _abierta_en > getattr(settings, 'EMAIL_POOL_MAX_AGE', 600):
+        _abrir()
+    elif ahora - _usada_en > getattr(settings, 'EMAIL_POOL_HEALTHCHECK_AFTER', 30) and not _sana():
+        _stats['reconexiones'] += 1
+        _abrir()
+    return _conexion
+
+
+def _enviar_uno(mensaje):
+    global _usada_en
+    try:
+        _conexion_lista().send_messages([mensaje])
+    except ERRORES_DE_CONEXION:
+        # El servidor cerró la conexión: una reconexión y un reintento
+        _stats['reconexiones'] += 1
+        _abrir()
+        _conexion.send_messages([mensaje])
+    _usada_en = time.monotonic()
+
+
+def enviar_lote(mensajes):
+    """
+    Envía una lista de EmailMessage por la conexión persistente.
+    Retorna una lista alineada con `mensajes`: None si se envió o la
+    excepción si falló.
+    """
+    resultados = []
+    with _lock:
+        inicio = time.monotonic()
+        for mensaje in mensajes:
+            try:
+                _enviar_uno(mensaje)
+            except Exception as e:
+                _stats['errores'] += 1
+                resultados.append(e)
+            else:
+                _stats['mensajes'] += 1
+                resultados.append(None)
+        duracion = time.monotonic() - inicio
+        _stats['lotes'] += 1
+        _stats['segundos'] += duracion
+        _stats['ultimo_lote_ms'] = round(duracion * 1000, 1)
+    return resultados
+
+
+def enviar(mensaje):
+    """Envía un solo EmailMessage por la conexión persistente. Lanza si falla."""
+    error = enviar_lote([mensaje])[0]
+    if error is not None:
+        raise error
+
+
+def cerrar():
+    """Cierra la conexión del proceso (al apagar el worker)."""
+    with _lock:
+        _cerrar()
+
+
+def estadisticas():
+    """Contadores del spooler en este proceso."""
+    with _lock:
+        stats = dict(_stats)
+    enviados = stats['mensajes']
+    stats['ms_por_mensaje'] = round(stats['segundos'] * 1000 / enviados, 1) if enviados else 0.0
+    stats['mensajes_por_segundo'] = round(enviados / stats['segundos'], 1) if stats['segundos'] else 0.0
+    stats['mensajes_por_conexion'] = round(enviados / stats['conexiones'], 1) if stats['conexiones'] else 0.0
+    return stats
+
+
+def reset_estadisticas():
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0.0 if isinstance(_stats[key], float) else 0
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from website import view_counter
+
+
+class Command(BaseCommand):
+    help = 'Pide a los workers que vuelquen ya su buffer de vistas del blog y espera a que confirmen'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout', type=float, default=None,
+            help='Segundos máximos de espera (por defecto, dos vueltas del hilo del contador)',
+        )
+
+    def handle(self, *args, **options):
+        timeout = options['timeout']
+        if timeout is None:
+            timeout = 2 * max(getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 30), 1) + 5
+
+        solicitudes = view_counter.solicitar_volcado()
+        if not solicitudes:
+            self.stdout.write(self.style.SUCCESS('Ningún worker con vistas en buffer'))
+            return
+        self.stdout.write(f'Volcado pedido a {len(solicitudes)} worker(s), esperando confirmación...')
+
+        limite = time.monotonic() + timeout
+        faltan = view_counter.sin_confirmar(solicitudes)
+        while faltan and time.monotonic() < limite:
+            time.sleep(1)
+            faltan = view_counter.sin_confirmar(solicitudes)
+
+        if faltan:
+            detalle = ', '.join(f'{nombre} ({n} pendiente(s))' for nombre, n in faltan.items())
+            raise CommandError(f'Sin confirmar tras {timeout:g}s: {detalle}')
+        self.stdout.write(self.style.SUCCESS(f'{len(solicitudes)} worker(s) volcaron su buffer'))
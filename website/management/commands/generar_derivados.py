@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from website import imagenes
+from website.models import BlogPost
+
+
+class Command(BaseCommand):
+    help = 'Genera las versiones WebP (thumb/card/hero) de las imágenes destacadas del blog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Reescribir los derivados aunque ya existan')
+
+    def handle(self, *args, **options):
+        generados = errores = 0
+        for post in BlogPost.objects.exclude(featured_image='').iterator():
+            if imagenes.vigentes(post) and not options['force']:
+                continue
+            try:
+                imagenes.generar(post, sobrescribir=options['force'])
+            except Exception as e:
+                errores += 1
+                self.stderr.write(f'{post.title}: {e}')
+                continue
+            generados += 1
+        self.stdout.write(self.style.SUCCESS(f'{generados} artículo(s) procesado(s), {errores} con error'))
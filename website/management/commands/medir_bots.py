@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from website import bots
+
+MUESTRA = [
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/124.0.0.0 Safari/537.36', '190.113.4.20'),
+    ('Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+     'Version/17.4 Mobile/15E148 Safari/604.1', '2800:200:e840::1'),
+    ('Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/124.0.0.0 Mobile Safari/537.36', '181.65.12.7'),
+    ('Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)', '66.249.66.1'),
+    ('Mozilla/5.0 (compatible; UptimeRobot/2.0; http://www.uptimerobot.com/)', '216.144.250.150'),
+    ('Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; bingbot/2.0) Chrome/116.0 Safari/537.36',
+     '40.77.167.12'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Mide el costo por request del filtro de bots del contador de vistas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        n = options['repeticiones']
+        bots.es_bot(*MUESTRA[0])  # compilar fuera de la medición
+
+        for user_agent, ip in MUESTRA:
+            inicio = time.perf_counter()
+            for _ in range(n):
+                bots.es_bot(user_agent, ip)
+            microsegundos = (time.perf_counter() - inicio) / n * 1e6
+            tipo = 'bot' if bots.es_bot(user_agent, ip) else 'navegador'
+            self.stdout.write(f'{microsegundos:6.2f} µs  {tipo:<9}  {user_agent[:70]}')
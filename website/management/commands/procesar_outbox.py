@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from website import mail, sheets_sync
+from website.outbox import procesar
+
+
+class Command(BaseCommand):
+    help = 'Entrega los emails pendientes del outbox y sincroniza Google Sheets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Procesar un solo lote y salir')
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos de espera cuando no hay tareas')
+        parser.add_argument('--limite', type=int, default=50, help='Tareas por lote')
+        parser.add_argument('--sheets-cada', type=float, default=60.0, help='Segundos entre sincronizaciones con Google Sheets (0 = nunca)')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            entregadas, fallidas = procesar(options['limite'])
+            mail.cerrar()
+            self.stdout.write(self.style.SUCCESS(f'{entregadas} entregada(s), {fallidas} con error'))
+            self._estadisticas_smtp()
+            return
+
+        self.stdout.write('Worker de outbox iniciado')
+        proxima_sync = 0
+        while True:
+            close_old_connections()
+            if options['sheets_cada'] > 0 and time.monotonic() >= proxima_sync:
+                proxima_sync = time.monotonic() + options['sheets_cada']
+                self._sincronizar_sheets()
+            try:
+                entregadas, fallidas = procesar(options['limite'])
+            except Exception as e:
+                self.stderr.write(f'Error procesando outbox: {e}')
+                entregadas = fallidas = 0
+            if entregadas or fallidas:
+                self.stdout.write(f'Outbox: {entregadas} entregada(s), {fallidas} con error')
+                self._estadisticas_smtp()
+            else:
+                time.sleep(options['intervalo'])
+
+    def _estadisticas_smtp(self):
+        stats = mail.estadisticas()
+        if stats['lotes']:
+            self.stdout.write(
+                f"SMTP: {stats['mensajes']} enviado(s), {stats['errores']} error(es), "
+                f"{stats['conexiones']} conexión(es), {stats['ms_por_mensaje']} ms/mensaje, "
+                f"último lote {stats['ultimo_lote_ms']} ms"
+            )
+
+    def _sincronizar_sheets(self):
+        try:
+            escritas = sheets_sync.sincronizar()
+        except Exception as e:
+            self.stderr.write(f'Error sincronizando Google Sheets: {e}')
+            return
+        for tab, n in escritas.items():
+            self.stdout.write(f'Google Sheets: {n} fila(s) en {tab}')
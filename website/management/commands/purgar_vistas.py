@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from website import resumen_vistas
+
+
+class Command(BaseCommand):
+    help = 'Borra las vistas crudas del blog fuera de la ventana de retención (los agregados se conservan)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=getattr(settings, 'VIEW_COUNTER_RETENTION_DAYS', 30),
+            help='Días de vistas crudas que se conservan',
+        )
+
+    def handle(self, *args, **options):
+        borradas = resumen_vistas.purgar(options['dias'])
+        self.stdout.write(self.style.SUCCESS(f'{borradas} vista(s) purgada(s)'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from website import relacionados
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los artículos relacionados de todo el blog (etiquetas + TF-IDF)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=relacionados.TOP, help='Relacionados por artículo')
+
+    def handle(self, *args, **options):
+        filas = relacionados.recalcular(options['top'])
+        self.stdout.write(self.style.SUCCESS(f'{filas} relación(es) guardada(s)'))
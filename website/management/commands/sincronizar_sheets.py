@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from website import sheets_sync
+
+
+class Command(BaseCommand):
+    help = 'Sube a Google Sheets los leads y suscriptores que aún no están sincronizados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=sheets_sync.LOTE, help='Filas por llamada a append_rows')
+
+    def handle(self, *args, **options):
+        escritas = sheets_sync.sincronizar(options['lote'])
+        if not escritas:
+            self.stdout.write(f'Nada que sincronizar ({sheets_sync.pendientes()} pendiente(s))')
+            return
+        for tab, n in escritas.items():
+            self.stdout.write(self.style.SUCCESS(f'{tab}: {n} fila(s)'))
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0006_add_source_page_to_solicitudcotizacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['is_published', 'category', '-created_at', '-id'], name='blogpost_pub_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['is_published', '-created_at', '-id'], name='blogpost_pub_created_idx'),
+        ),
+    ]
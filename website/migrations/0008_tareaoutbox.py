@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0007_blogpost_listado_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('email', 'Email'), ('sheets', 'Google Sheets')], max_length=20, verbose_name='Tipo')),
+                ('payload', models.JSONField(verbose_name='Datos')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('intentos', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo intento')),
+                ('ultimo_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('origen_modelo', models.CharField(blank=True, max_length=100, verbose_name='Modelo de origen')),
+                ('origen_id', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='ID de origen')),
+                ('fecha_creacion', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de creación')),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de envío')),
+            ],
+            options={
+                'verbose_name': 'Tarea en Cola',
+                'verbose_name_plural': 'Cola de Tareas (Outbox)',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='outbox_estado_proximo_idx'), models.Index(fields=['origen_modelo', 'origen_id'], name='outbox_origen_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+def marcar_existentes(apps, schema_editor):
+    # Los registros previos ya se enviaron fila a fila (o tienen su tarea en
+    # el outbox): el reconciliador solo debe subir los nuevos.
+    apps.get_model('website', 'ConsultaAsesoria').objects.update(sincronizado_sheets=True)
+    apps.get_model('website', 'SolicitudCotizacion').objects.update(sincronizado_sheets=True)
+    apps.get_model('website', 'NewsletterSubscriber').objects.update(synced_to_sheets=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0008_tareaoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultaasesoria',
+            name='sincronizado_sheets',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Sincronizado con Sheets'),
+        ),
+        migrations.AddField(
+            model_name='newslettersubscriber',
+            name='synced_to_sheets',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Sincronizado con Sheets'),
+        ),
+        migrations.AddField(
+            model_name='solicitudcotizacion',
+            name='sincronizado_sheets',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Sincronizado con Sheets'),
+        ),
+        migrations.RunPython(marcar_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,192 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:05
+
+import math
+import re
+from html import escape, unescape
+from html.parser import HTMLParser
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# Copia congelada de website/contenido.py: la migración no debe cambiar
+# cuando cambie el compilador.
+PALABRAS_POR_MINUTO = 200
+NIVELES_TOC = ('h2',)
+_PALABRA = re.compile(r'\w+')
+
+
+def _atributos(attrs):
+    return ''.join(
+        f' {nombre}' if valor is None else f' {nombre}="{escape(valor)}"'
+        for nombre, valor in attrs
+    )
+
+
+class _Compilador(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.salida = []
+        self.toc = []
+        self.palabras = 0
+        self._ids = set()
+        self._ignorar = 0          # dentro de <script>/<style>
+        self._encabezado = None    # (índice en salida, tag, attrs, textos)
+        self._inicio = 0           # posición del evento actual en self.rawdata
+
+    # ---- etiquetas ----
+
+    def handle_starttag(self, tag, attrs):
+        self._abrir(tag, attrs, self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        self._abrir(tag, attrs, self.get_starttag_text(), vacio=True)
+
+    def _abrir(self, tag, attrs, original, vacio=False):
+        nombres = {nombre for nombre, _ in attrs}
+        if tag in ('script', 'style') and not vacio:
+            self._ignorar += 1
+
+        if tag == 'img' and not {'loading', 'decoding'} <= nombres:
+            attrs = list(attrs)
+            if 'loading' not in nombres:
+                attrs.append(('loading', 'lazy'))
+            if 'decoding' not in nombres:
+                attrs.append(('decoding', 'async'))
+            original = f'<img{_atributos(attrs)}{" /" if vacio else ""}>'
+
+        if tag in NIVELES_TOC and self._encabezado is None and not vacio:
+            self._encabezado = (len(self.salida), tag, list(attrs), [])
+
+        self.salida.append(original)
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style') and self._ignorar:
+            self._ignorar -= 1
+        if self._encabezado and self._encabezado[1] == tag:
+            self._cerrar_encabezado()
+        self.salida.append(f'</{tag}>')
+
+    def _cerrar_encabezado(self):
+        indice, tag, attrs, textos = self._encabezado
+        self._encabezado = None
+        texto = ' '.join(''.join(textos).split())
+        actual = dict(attrs).get('id')
+
+        if actual:
+            anchor = actual
+        else:
+            base = slugify(texto) or f'seccion-{len(self.toc) + 1}'
+            anchor, n = base, 2
+            while anchor in self._ids:
+                anchor, n = f'{base}-{n}', n + 1
+            self.salida[indice] = f'<{tag}{_atributos(attrs + [("id", anchor)])}>'
+
+        self._ids.add(anchor)
+        if texto:
+            self.toc.append({'id': anchor, 'text': texto, 'level': int(tag[1])})
+
+    # ---- texto ----
+
+    def handle_data(self, data):
+        self.salida.append(data)
+        if self._ignorar:
+            return
+        self.palabras += len(_PALABRA.findall(data))
+        if self._encabezado:
+            self._encabezado[3].append(data)
+
+    def goahead(self, end):
+        self._inicio = 0
+        super().goahead(end)
+
+    def updatepos(self, i, j):
+        # El parser avanza siempre por aquí: j es donde empieza el próximo evento en rawdata
+        self._inicio = j
+        return super().updatepos(i, j)
+
+    def handle_entityref(self, name):
+        self._referencia('&', name)
+
+    def handle_charref(self, name):
+        self._referencia('&#', name)
+
+    def _referencia(self, prefijo, name):
+        """Copia la referencia como la escribió el autor: en "AT&T" o "&copy 2024" no hay ';'."""
+        original = prefijo + name
+        if self.rawdata.startswith(';', self._inicio + len(original)):
+            original += ';'
+        self.salida.append(original)
+        if self._encabezado:
+            self._encabezado[3].append(unescape(original))
+
+    def handle_comment(self, data):
+        self.salida.append(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        self.salida.append(f'<!{decl}>')
+
+    def handle_pi(self, data):
+        self.salida.append(f'<?{data}>')
+
+    def unknown_decl(self, data):
+        # <![CDATA[...]]> (en SVG/MathML) y secciones condicionales <![if ...]>
+        cierre = ']]>' if data.upper().startswith('CDATA[') else ']>'
+        self.salida.append(f'<![{data}{cierre}')
+
+
+def compilar(html):
+    """
+    Procesa el HTML de un artículo.
+    Retorna (html, toc, palabras); toc es una lista de
+    {'id', 'text', 'level'} en orden de aparición.
+    """
+    parser = _Compilador()
+    parser.feed(html or '')
+    parser.close()
+    return ''.join(parser.salida), parser.toc, parser.palabras
+
+
+def minutos_de_lectura(palabras):
+    return max(1, math.ceil(palabras / PALABRAS_POR_MINUTO))
+
+
+def compilar_existentes(apps, schema_editor):
+    BlogPost = apps.get_model('website', 'BlogPost')
+    for post in BlogPost.objects.only('id', 'content').iterator():
+        html, toc, palabras = compilar(post.content)
+        BlogPost.objects.filter(pk=post.pk).update(
+            content_html=html, toc=toc, word_count=palabras,
+            read_time=minutos_de_lectura(palabras),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0010_blogpost_featured_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Palabras'),
+        ),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='read_time',
+            field=models.IntegerField(default=3, help_text='Se calcula al guardar según el número de palabras', verbose_name='Tiempo de Lectura (min)'),
+        ),
+        migrations.RunPython(compilar_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:10
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+# Copia congelada del esquema y de la indexación de website/busqueda.py:
+# la migración no debe cambiar cuando cambie el módulo.
+TABLA_SQLITE = 'website_blogpost_fts'
+TABLA_POSTGRES = 'website_blogpost_busqueda'
+
+
+def _indexar(cursor, vendor, pk, title, excerpt, html):
+    body = ' '.join(strip_tags(html or '').split())
+    if vendor == 'sqlite':
+        cursor.execute(
+            f"INSERT INTO {TABLA_SQLITE} (rowid, title, excerpt, body) VALUES (%s, %s, %s, %s)",
+            [pk, title, excerpt, body],
+        )
+    else:
+        cursor.execute(
+            f"INSERT INTO {TABLA_POSTGRES} (post_id, documento) VALUES (%s, "
+            "setweight(to_tsvector('spanish', %s), 'A') || "
+            "setweight(to_tsvector('spanish', %s), 'B') || "
+            "setweight(to_tsvector('spanish', %s), 'C')) "
+            "ON CONFLICT (post_id) DO UPDATE SET documento = EXCLUDED.documento",
+            [pk, title, excerpt, body],
+        )
+
+
+def crear(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_SQLITE} USING fts5("
+            "title, excerpt, body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {TABLA_POSTGRES} ("
+            "post_id integer PRIMARY KEY REFERENCES website_blogpost (id) ON DELETE CASCADE, "
+            "documento tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {TABLA_POSTGRES}_gin ON {TABLA_POSTGRES} USING GIN (documento)"
+        )
+    else:
+        return
+
+    BlogPost = apps.get_model('website', 'BlogPost')
+    with schema_editor.connection.cursor() as cursor:
+        for post in BlogPost.objects.only('id', 'title', 'excerpt', 'content_html').iterator():
+            _indexar(cursor, vendor, post.pk, post.title, post.excerpt, post.content_html)
+
+
+def borrar(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLA_SQLITE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLA_POSTGRES}")
+
+
+class Migration(migrations.Migration):
+    """Índice de texto completo del blog (FTS5 en SQLite, tsvector + GIN en PostgreSQL)"""
+
+    dependencies = [
+        ('website', '0011_blogpost_contenido_compilado'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear, borrar),
+    ]
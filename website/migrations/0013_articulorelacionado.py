@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0012_blogpost_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticuloRelacionado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionados', to='website.blogpost')),
+                ('relacionado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='website.blogpost')),
+            ],
+            options={
+                'verbose_name': 'Artículo Relacionado',
+                'verbose_name_plural': 'Artículos Relacionados',
+                'ordering': ['post', 'posicion'],
+                'constraints': [models.UniqueConstraint(fields=('post', 'posicion'), name='relacionado_post_posicion_uniq')],
+            },
+        ),
+    ]
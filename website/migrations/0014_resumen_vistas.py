@@ -0,0 +1,144 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:10
+
+import hashlib
+import math
+import zlib
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+# Copia congelada de website/hll.py y de resumen_vistas.desde_vistas():
+# la migración no debe cambiar cuando cambien esos módulos.
+P = 12
+M = 1 << P
+_BITS_RESTO = 64 - P
+_ALFA = 0.7213 / (1 + 1.079 / M)
+CHUNK = 5000
+
+
+def _nuevo_sketch():
+    return bytearray(M)
+
+
+def _agregar(registros, valor):
+    h = int.from_bytes(hashlib.blake2b(str(valor).encode(), digest_size=8).digest(), 'big')
+    indice = h >> _BITS_RESTO
+    rango = _BITS_RESTO - (h & ((1 << _BITS_RESTO) - 1)).bit_length() + 1
+    if rango > registros[indice]:
+        registros[indice] = rango
+
+
+def _estimar(registros):
+    estimado = _ALFA * M * M / sum(2.0 ** -r for r in registros)
+    ceros = registros.count(0)
+    if estimado <= 2.5 * M and ceros:
+        return round(M * math.log(M / ceros))
+    return round(estimado)
+
+
+def resumir_existentes(apps, schema_editor):
+    """
+    Suma todas las filas de BlogPostView a VistaDiaria y ResumenVistas (carga
+    inicial). Recorre las vistas ordenadas por artículo y fecha: en memoria
+    solo están el sketch del día y el del artículo en curso, y las filas
+    terminadas se escriben de a CHUNK.
+    """
+    BlogPostView = apps.get_model('website', 'BlogPostView')
+    VistaDiaria = apps.get_model('website', 'VistaDiaria')
+    ResumenVistas = apps.get_model('website', 'ResumenVistas')
+
+    diarias, resumenes = [], []
+    post_actual = dia_actual = None
+    sketch_dia = sketch_post = None
+    vistas_dia = 0
+
+    def cerrar_dia():
+        diarias.append(VistaDiaria(
+            post_id=post_actual, fecha=dia_actual, vistas=vistas_dia,
+            visitantes=_estimar(sketch_dia), sketch=zlib.compress(bytes(sketch_dia)),
+        ))
+        if len(diarias) >= CHUNK:
+            VistaDiaria.objects.bulk_create(diarias)
+            diarias.clear()
+
+    def cerrar_post():
+        resumenes.append(ResumenVistas(
+            post_id=post_actual, visitantes=_estimar(sketch_post), sketch=zlib.compress(bytes(sketch_post)),
+        ))
+        if len(resumenes) >= CHUNK:
+            ResumenVistas.objects.bulk_create(resumenes)
+            resumenes.clear()
+
+    filas = BlogPostView.objects.order_by('post_id', 'viewed_at').values_list('post_id', 'ip_address', 'viewed_at')
+    for post_id, ip, fecha in filas.iterator(chunk_size=CHUNK):
+        dia = timezone.localdate(fecha)
+        if post_id != post_actual:
+            if post_actual is not None:
+                cerrar_dia()
+                cerrar_post()
+            post_actual, dia_actual = post_id, dia
+            sketch_post, sketch_dia, vistas_dia = _nuevo_sketch(), _nuevo_sketch(), 0
+        elif dia != dia_actual:
+            cerrar_dia()
+            dia_actual, sketch_dia, vistas_dia = dia, _nuevo_sketch(), 0
+        vistas_dia += 1
+        _agregar(sketch_dia, ip)
+        _agregar(sketch_post, ip)
+
+    if post_actual is not None:
+        cerrar_dia()
+        cerrar_post()
+    VistaDiaria.objects.bulk_create(diarias)
+    ResumenVistas.objects.bulk_create(resumenes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0013_articulorelacionado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenVistas',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen_vistas', serialize=False, to='website.blogpost')),
+                ('visitantes', models.PositiveIntegerField(default=0, verbose_name='Visitantes únicos')),
+                ('sketch', models.BinaryField(default=bytes)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Vistas',
+                'verbose_name_plural': 'Resúmenes de Vistas',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='blogpostview',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='blogpostview',
+            name='viewed_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha de Vista'),
+        ),
+        migrations.CreateModel(
+            name='VistaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('vistas', models.PositiveIntegerField(default=0, verbose_name='Vistas')),
+                ('visitantes', models.PositiveIntegerField(default=0, verbose_name='Visitantes únicos')),
+                ('sketch', models.BinaryField(default=bytes)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vistas_diarias', to='website.blogpost')),
+            ],
+            options={
+                'verbose_name': 'Vistas Diarias',
+                'verbose_name_plural': 'Vistas Diarias',
+                'ordering': ['-fecha'],
+                'constraints': [models.UniqueConstraint(fields=('post', 'fecha'), name='vista_diaria_post_fecha_uniq')],
+            },
+        ),
+        migrations.RunPython(resumir_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0014_resumen_vistas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultaasesoria',
+            name='reservado_sheets',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Reservado para Sheets'),
+        ),
+        migrations.AddField(
+            model_name='newslettersubscriber',
+            name='sheets_claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Reservado para Sheets'),
+        ),
+        migrations.AddField(
+            model_name='solicitudcotizacion',
+            name='reservado_sheets',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Reservado para Sheets'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0015_leads_reserva_sheets'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tareaoutbox',
+            name='tipo',
+            field=models.CharField(choices=[('email', 'Email'), ('sheets', 'Google Sheets'), ('relacionados', 'Artículos relacionados')], max_length=20, verbose_name='Tipo'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:55
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+CHUNK = 5000
+
+
+def completar_dia(apps, schema_editor):
+    """Calcula `dia` de las vistas existentes y deja una sola por artículo, IP y día."""
+    BlogPostView = apps.get_model('website', 'BlogPostView')
+
+    vistos = set()
+    duplicadas = []
+    lote = []
+    filas = BlogPostView.objects.order_by('viewed_at', 'pk').only('pk', 'post_id', 'ip_address', 'viewed_at')
+    for vista in filas.iterator(chunk_size=CHUNK):
+        vista.dia = timezone.localdate(vista.viewed_at)
+        clave = (vista.post_id, vista.ip_address, vista.dia)
+        if clave in vistos:
+            duplicadas.append(vista.pk)
+            continue
+        vistos.add(clave)
+        lote.append(vista)
+        if len(lote) >= CHUNK:
+            BlogPostView.objects.bulk_update(lote, ['dia'])
+            lote = []
+    BlogPostView.objects.bulk_update(lote, ['dia'])
+
+    # Las repetidas del mismo día solo podían venir de dos workers volcando a la vez
+    for i in range(0, len(duplicadas), CHUNK):
+        BlogPostView.objects.filter(pk__in=duplicadas[i:i + CHUNK]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0016_tareaoutbox_relacionados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpostview',
+            name='dia',
+            field=models.DateField(editable=False, null=True, verbose_name='Día'),
+        ),
+        migrations.RunPython(completar_dia, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='blogpostview',
+            name='dia',
+            field=models.DateField(default=django.utils.timezone.localdate, editable=False, verbose_name='Día'),
+        ),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='views',
+            field=models.IntegerField(default=0, verbose_name='Vistas (1 por IP y día)'),
+        ),
+        migrations.AddConstraint(
+            model_name='blogpostview',
+            constraint=models.UniqueConstraint(fields=('post', 'ip_address', 'dia'), name='vista_post_ip_dia_uniq'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0017_blogpostview_dia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerVistas',
+            fields=[
+                ('nombre', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('latido', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('pendientes', models.PositiveIntegerField(default=0)),
+                ('solicitado', models.PositiveIntegerField(default=0)),
+                ('atendido', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Worker del Contador de Vistas',
+                'verbose_name_plural': 'Workers del Contador de Vistas',
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:10
+
+import website.models
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+# Copia congelada de website/busqueda.py (ver 0012)
+TABLA_POSTGRES = 'website_blogpost_busqueda'
+CONFIG = 'spanish_unaccent'
+
+
+def _reindexar(apps, schema_editor, config):
+    BlogPost = apps.get_model('website', 'BlogPost')
+    with schema_editor.connection.cursor() as cursor:
+        for post in BlogPost.objects.only('id', 'title', 'excerpt', 'content_html').iterator():
+            body = ' '.join(strip_tags(post.content_html or '').split())
+            cursor.execute(
+                f"INSERT INTO {TABLA_POSTGRES} (post_id, documento) VALUES (%s, "
+                f"setweight(to_tsvector('{config}', %s), 'A') || "
+                f"setweight(to_tsvector('{config}', %s), 'B') || "
+                f"setweight(to_tsvector('{config}', %s), 'C')) "
+                "ON CONFLICT (post_id) DO UPDATE SET documento = EXCLUDED.documento",
+                [post.pk, post.title, post.excerpt, body],
+            )
+
+
+def crear(apps, schema_editor):
+    """Configuración 'spanish' que además quita los acentos, en el índice y en la consulta."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return  # FTS5 ya usa remove_diacritics
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    schema_editor.execute(f"CREATE TEXT SEARCH CONFIGURATION {CONFIG} (COPY = spanish)")
+    schema_editor.execute(
+        f"ALTER TEXT SEARCH CONFIGURATION {CONFIG} "
+        "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem"
+    )
+    _reindexar(apps, schema_editor, CONFIG)
+
+
+def borrar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    _reindexar(apps, schema_editor, 'spanish')
+    schema_editor.execute(f"DROP TEXT SEARCH CONFIGURATION IF EXISTS {CONFIG}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0018_workervistas'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear, borrar),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=200, unique=True, validators=[website.models.validar_slug_blog]),
+        ),
+    ]
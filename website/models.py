@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.text import slugify
 from django.utils import timezone
@@ -24,6 +25,15 @@ class BlogTag(models.Model):
         verbose_name_plural = "Etiquetas"
 
 
+# Slugs que chocan con rutas fijas de blog/ (urls.py): el artículo quedaría inaccesible
+SLUGS_RESERVADOS = frozenset({'buscar'})
+
+
+def validar_slug_blog(value):
+    if value in SLUGS_RESERVADOS:
+        raise ValidationError(f'"{value}" es una ruta del blog (/blog/{value}/); elige otro slug.')
+
+
 class BlogPost(models.Model):
     """Modelo para los artículos del blog"""
     
@@ -35,17 +45,23 @@ class BlogPost(models.Model):
     ]
     
     title = models.CharField(max_length=200, verbose_name='Título')
-    slug = models.SlugField(max_length=200, unique=True, blank=True)
+    slug = models.SlugField(max_length=200, unique=True, blank=True, validators=[validar_slug_blog])
     excerpt = models.TextField(max_length=300, verbose_name='Extracto')
     content = models.TextField(verbose_name='Contenido')
+    # Generados desde `content` al guardar (website/contenido.py)
+    content_html = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Palabras')
     featured_image = models.ImageField(upload_to='blog/', verbose_name='Imagen Destacada', blank=True)
     featured_image_url = models.URLField(max_length=500, verbose_name='URL de Imagen (Cloudinary)', blank=True, help_text='Pega aquí la URL de la imagen subida a Cloudinary')
+    # Versiones WebP de featured_image (thumb/card/hero), generadas por website/imagenes.py
+    featured_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='eventos')
     author = models.CharField(max_length=100, default='Equipo Pacunato')
-    read_time = models.IntegerField(default=3, verbose_name='Tiempo de Lectura (min)')
+    read_time = models.IntegerField(default=3, verbose_name='Tiempo de Lectura (min)', help_text='Se calcula al guardar según el número de palabras')
     
-    # ⭐ CAMPO EXISTENTE - Se mantiene y se usa para el contador
-    views = models.IntegerField(default=0, verbose_name='Vistas')
+    # ⭐ CAMPO EXISTENTE - Se mantiene y se usa para el contador (1 por IP y día, ver BlogPostView)
+    views = models.IntegerField(default=0, verbose_name='Vistas (1 por IP y día)')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -59,30 +75,83 @@ class BlogPost(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Artículo'
         verbose_name_plural = 'Artículos'
+        indexes = [
+            # Listados paginados por cursor: /blog/ y /blog/categoria/<categoria>/
+            models.Index(fields=['is_published', 'category', '-created_at', '-id'], name='blogpost_pub_cat_created_idx'),
+            models.Index(fields=['is_published', '-created_at', '-id'], name='blogpost_pub_created_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        if self.slug in SLUGS_RESERVADOS:
+            # El admin ya lo rechaza (validar_slug_blog); aquí llega un título como "Buscar"
+            self.slug = f'{self.slug}-articulo'
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.compilar_contenido()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'content_html', 'toc', 'word_count', 'read_time'}
         super().save(*args, **kwargs)
+
+    def compilar_contenido(self):
+        """HTML con anchors, tabla de contenido, palabras y tiempo de lectura"""
+        from .contenido import compilar, minutos_de_lectura
+
+        self.content_html, self.toc, self.word_count = compilar(self.content)
+        self.read_time = minutos_de_lectura(self.word_count)
     
     def __str__(self):
         return self.title
 
+    # ============================================
+    # IMAGEN DESTACADA: DERIVADOS
+    # ============================================
+
+    def _imagen_url(self, tamano):
+        """URL del derivado; mientras no exista, la imagen original"""
+        from .imagenes import vigentes
+
+        variante = vigentes(self).get(tamano)
+        if variante:
+            return self.featured_image.storage.url(variante['name'])
+        if self.featured_image:
+            return self.featured_image.url
+        return self.featured_image_url
+
+    @property
+    def featured_thumb_url(self):
+        return self._imagen_url('thumb')
+
+    @property
+    def featured_card_url(self):
+        return self._imagen_url('card')
+
+    @property
+    def featured_hero_url(self):
+        return self._imagen_url('hero')
+
 
 class BlogPostView(models.Model):
     """
-    ⭐ NUEVO: Modelo para rastrear vistas únicas por IP
-    Evita que una misma IP cuente múltiples veces
+    Registro crudo de vistas: una fila por artículo, IP y día (la restricción
+    única la garantiza aunque varios workers vuelquen a la vez).
+    Solo se conservan VIEW_COUNTER_RETENTION_DAYS días; los visitantes
+    únicos se cuentan en VistaDiaria / ResumenVistas (website/resumen_vistas.py).
     """
     post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='unique_views')
     ip_address = models.GenericIPAddressField(verbose_name="Dirección IP")
     user_agent = models.CharField(max_length=500, blank=True, verbose_name="Navegador/Dispositivo")
-    viewed_at = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Vista")
+    viewed_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="Fecha de Vista")
+    # Fecha local de viewed_at
+    dia = models.DateField(default=timezone.localdate, editable=False, verbose_name="Día")
     
     class Meta:
-        # ⭐ CLAVE: Esta combinación evita duplicados
-        unique_together = ('post', 'ip_address')
         ordering = ['-viewed_at']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'ip_address', 'dia'], name='vista_post_ip_dia_uniq'),
+        ]
         verbose_name = "Vista de Artículo"
         verbose_name_plural = "Vistas de Artículos"
     
@@ -90,6 +159,86 @@ class BlogPostView(models.Model):
         return f"{self.ip_address} - {self.post.title} - {self.viewed_at.strftime('%d/%m/%Y %H:%M')}"
 
 
+class VistaDiaria(models.Model):
+    """
+    Vistas de un artículo en un día. `sketch` es un HyperLogLog (website/hll.py)
+    con las IPs del día; `visitantes` es su estimación.
+    """
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='vistas_diarias')
+    fecha = models.DateField(verbose_name="Fecha")
+    vistas = models.PositiveIntegerField(default=0, verbose_name="Vistas")
+    visitantes = models.PositiveIntegerField(default=0, verbose_name="Visitantes únicos")
+    sketch = models.BinaryField(default=bytes)
+
+    class Meta:
+        ordering = ['-fecha']
+        verbose_name = "Vistas Diarias"
+        verbose_name_plural = "Vistas Diarias"
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'fecha'], name='vista_diaria_post_fecha_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} - {self.fecha}: {self.vistas} vistas"
+
+
+class ResumenVistas(models.Model):
+    """Visitantes únicos de todo el historial de un artículo (unión de los sketches diarios)."""
+    post = models.OneToOneField(BlogPost, on_delete=models.CASCADE, primary_key=True, related_name='resumen_vistas')
+    visitantes = models.PositiveIntegerField(default=0, verbose_name="Visitantes únicos")
+    sketch = models.BinaryField(default=bytes)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen de Vistas"
+        verbose_name_plural = "Resúmenes de Vistas"
+
+    def __str__(self):
+        return f"{self.post_id}: {self.visitantes} visitantes"
+
+
+class WorkerVistas(models.Model):
+    """
+    Latido de cada proceso con buffer de vistas (website/view_counter.py).
+    `python manage.py flush_vistas` sube `solicitado` y espera a que cada
+    worker vivo vuelque su buffer y lo copie en `atendido`.
+    """
+    nombre = models.CharField(max_length=100, primary_key=True)  # host:pid
+    latido = models.DateTimeField(default=timezone.now, db_index=True)
+    pendientes = models.PositiveIntegerField(default=0)
+    solicitado = models.PositiveIntegerField(default=0)
+    atendido = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Worker del Contador de Vistas"
+        verbose_name_plural = "Workers del Contador de Vistas"
+
+    def __str__(self):
+        return f"{self.nombre}: {self.pendientes} pendiente(s)"
+
+
+class ArticuloRelacionado(models.Model):
+    """
+    Artículos relacionados precalculados (website/relacionados.py).
+    La página del artículo los lee con una sola consulta por (post, posicion).
+    """
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='relacionados')
+    relacionado = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='+')
+    posicion = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['post', 'posicion']
+        verbose_name = "Artículo Relacionado"
+        verbose_name_plural = "Artículos Relacionados"
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'posicion'], name='relacionado_post_posicion_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.post.title} → {self.relacionado.title}"
+
+
 # ============================================
 # MODELOS DE FORMULARIOS
 # ============================================
@@ -113,6 +262,8 @@ class ConsultaAsesoria(models.Model):
     # Estado de procesamiento
     procesado = models.BooleanField(default=False, verbose_name="Procesado")
     enviado_make = models.BooleanField(default=False, verbose_name="Enviado a Make")
+    sincronizado_sheets = models.BooleanField(default=False, db_index=True, verbose_name="Sincronizado con Sheets")
+    reservado_sheets = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Reservado para Sheets")
     fecha_procesamiento = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Procesamiento")
     
     # Notas internas
@@ -160,6 +311,8 @@ class SolicitudCotizacion(models.Model):
     # Estado de procesamiento
     procesado = models.BooleanField(default=False, verbose_name="Procesado")
     enviado_make = models.BooleanField(default=False, verbose_name="Enviado a Make")
+    sincronizado_sheets = models.BooleanField(default=False, db_index=True, verbose_name="Sincronizado con Sheets")
+    reservado_sheets = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Reservado para Sheets")
     fecha_procesamiento = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Procesamiento")
     
     # Fuente de la solicitud
@@ -208,6 +361,8 @@ class NewsletterSubscriber(models.Model):
     # Control
     unsubscribed_date = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de baja")
     sent_to_make = models.BooleanField(default=False, verbose_name="Enviado a Make")
+    synced_to_sheets = models.BooleanField(default=False, db_index=True, verbose_name="Sincronizado con Sheets")
+    sheets_claimed_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Reservado para Sheets")
     notes = models.TextField(blank=True, verbose_name="Notas")
     
     class Meta:
@@ -230,4 +385,60 @@ class SolicitudGuia(NewsletterSubscriber):
     def save(self, *args, **kwargs):
         if not self.source_page:
             self.source_page = 'home-lead-magnet'
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+# ============================================
+# OUTBOX: EFECTOS SECUNDARIOS DE LOS FORMULARIOS
+# ============================================
+
+class TareaOutbox(models.Model):
+    """
+    Efecto secundario pendiente de un formulario (email, fila en Google Sheets)
+    o del admin (recálculo de artículos relacionados). Se guarda en la misma
+    transacción que el registro que lo origina y lo entrega el comando
+    `procesar_outbox`, fuera del request, con reintentos.
+    """
+
+    TIPO_EMAIL = 'email'
+    TIPO_SHEETS = 'sheets'
+    TIPO_RELACIONADOS = 'relacionados'
+    TIPO_CHOICES = [
+        (TIPO_EMAIL, 'Email'),
+        (TIPO_SHEETS, 'Google Sheets'),
+        (TIPO_RELACIONADOS, 'Artículos relacionados'),
+    ]
+
+    ESTADO_PENDIENTE = 'pendiente'
+    ESTADO_ENVIADO = 'enviado'
+    ESTADO_FALLIDO = 'fallido'
+    ESTADO_CHOICES = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_ENVIADO, 'Enviado'),
+        (ESTADO_FALLIDO, 'Fallido'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo")
+    payload = models.JSONField(verbose_name="Datos")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=ESTADO_PENDIENTE, verbose_name="Estado")
+    intentos = models.PositiveIntegerField(default=0, verbose_name="Intentos")
+    proximo_intento = models.DateTimeField(default=timezone.now, verbose_name="Próximo intento")
+    ultimo_error = models.TextField(blank=True, verbose_name="Último error")
+
+    # Registro que originó la tarea (para actualizar enviado_make / sent_to_make)
+    origen_modelo = models.CharField(max_length=100, blank=True, verbose_name="Modelo de origen")
+    origen_id = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="ID de origen")
+
+    fecha_creacion = models.DateTimeField(default=timezone.now, verbose_name="Fecha de creación")
+    fecha_envio = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de envío")
+
+    class Meta:
+        verbose_name = "Tarea en Cola"
+        verbose_name_plural = "Cola de Tareas (Outbox)"
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='outbox_estado_proximo_idx'),
+            models.Index(fields=['origen_modelo', 'origen_id'], name='outbox_origen_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} - {self.get_estado_display()}"
@@ -0,0 +1,186 @@
+"""
+Outbox para los efectos secundarios de los formularios.
+
+Las vistas solo guardan el lead y sus emails en la misma transacción y
+responden de inmediato. El comando `python manage.py procesar_outbox`
+entrega las tareas pendientes con reintentos y backoff exponencial, y al
+terminar todas las de un registro marca su flag enviado_make / sent_to_make.
+Las filas de Google Sheets las sube aparte el reconciliador (sheets_sync.py).
+El mismo worker recalcula los artículos relacionados cuando el admin guarda
+un artículo (relacionados.programar).
+"""
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TareaOutbox
+
+MAX_INTENTOS = 8
+BACKOFF_BASE = 30           # segundos; se duplica en cada intento
+BACKOFF_MAX = 60 * 60 * 6   # tope de 6 horas entre intentos
+LEASE = 60 * 5              # una tarea reclamada no se vuelve a tomar en 5 min
+
+# Modelo de origen → campo booleano que indica "todo entregado"
+FLAGS = {
+    'website.consultaasesoria': 'enviado_make',
+    'website.solicitudcotizacion': 'enviado_make',
+    'website.newslettersubscriber': 'sent_to_make',
+}
+
+
+def _origen_kwargs(origen):
+    if origen is None:
+        return {}
+    return {'origen_modelo': origen._meta.label_lower, 'origen_id': origen.pk}
+
+
+def encolar_email(subject, body, to, reply_to=None, origen=None):
+    """Encola un email de texto plano."""
+    return TareaOutbox.objects.create(
+        tipo=TareaOutbox.TIPO_EMAIL,
+        payload={
+            'subject': subject,
+            'body': body,
+            'to': list(to),
+            'reply_to': list(reply_to or []),
+        },
+        **_origen_kwargs(origen),
+    )
+
+
+# ============================================
+# ENTREGA
+# ============================================
+
+def _mensaje(payload):
+    from django.core.mail import EmailMessage
+
+    return EmailMessage(
+        subject=payload['subject'],
+        body=payload['body'],
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=payload['to'],
+        reply_to=payload.get('reply_to') or None,
+    )
+
+
+def _enviar_email(payload):
+    from . import mail
+
+    mail.enviar(_mensaje(payload))
+
+
+def _enviar_sheets(payload):
+    # Solo para tareas encoladas antes del reconciliador (sheets_sync.py)
+    from . import sheets
+
+    if not sheets.is_configured():
+        print(f"Google Sheets no configurado — fila '{payload['tab']}' descartada")
+        return
+    sheets.append_row(payload['tab'], payload['row'])
+
+
+def _recalcular_relacionados(payload):
+    from . import relacionados
+
+    if 'posts' in payload:
+        relacionados.actualizar(payload['posts'])
+    else:
+        relacionados.recalcular()
+
+
+HANDLERS = {
+    TareaOutbox.TIPO_EMAIL: _enviar_email,
+    TareaOutbox.TIPO_SHEETS: _enviar_sheets,
+    TareaOutbox.TIPO_RELACIONADOS: _recalcular_relacionados,
+}
+
+
+def backoff(intentos):
+    """Segundos de espera antes del siguiente intento."""
+    return min(BACKOFF_BASE * (2 ** (intentos - 1)), BACKOFF_MAX)
+
+
+def _reclamar(limite):
+    """
+    Toma hasta `limite` tareas vencidas y las aparta LEASE segundos para que
+    otro worker no las procese a la vez.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            TareaOutbox.objects.select_for_update(skip_locked=True)
+            .filter(estado=TareaOutbox.ESTADO_PENDIENTE, proximo_intento__lte=ahora)
+            .order_by('proximo_intento')
+            .values_list('id', flat=True)[:limite]
+        )
+        if ids:
+            TareaOutbox.objects.filter(id__in=ids).update(
+                proximo_intento=ahora + timedelta(seconds=LEASE)
+            )
+    return list(TareaOutbox.objects.filter(id__in=ids).order_by('proximo_intento', 'id'))
+
+
+def _marcar_origen(tarea):
+    """Si ya no quedan tareas sin entregar del registro, activa su flag."""
+    campo = FLAGS.get(tarea.origen_modelo)
+    if not campo or tarea.origen_id is None:
+        return
+    pendientes = TareaOutbox.objects.filter(
+        origen_modelo=tarea.origen_modelo, origen_id=tarea.origen_id
+    ).exclude(estado=TareaOutbox.ESTADO_ENVIADO)
+    if not pendientes.exists():
+        model = apps.get_model(tarea.origen_modelo)
+        model.objects.filter(pk=tarea.origen_id).update(**{campo: True})
+
+
+def _registrar(tarea, error):
+    """Actualiza la tarea según el resultado. Retorna True si se entregó."""
+    tarea.intentos += 1
+    if error is not None:
+        tarea.ultimo_error = f"{type(error).__name__}: {error}"
+        if tarea.intentos >= MAX_INTENTOS:
+            tarea.estado = TareaOutbox.ESTADO_FALLIDO
+        else:
+            tarea.proximo_intento = timezone.now() + timedelta(seconds=backoff(tarea.intentos))
+        tarea.save(update_fields=['intentos', 'ultimo_error', 'estado', 'proximo_intento'])
+        print(f"⚠️ Outbox: {tarea} falló (intento {tarea.intentos}): {tarea.ultimo_error}")
+        return False
+
+    tarea.estado = TareaOutbox.ESTADO_ENVIADO
+    tarea.fecha_envio = timezone.now()
+    tarea.ultimo_error = ''
+    tarea.save(update_fields=['intentos', 'estado', 'fecha_envio', 'ultimo_error'])
+    _marcar_origen(tarea)
+    return True
+
+
+def entregar(tarea):
+    """Ejecuta una tarea y actualiza su estado. Retorna True si se entregó."""
+    try:
+        HANDLERS[tarea.tipo](tarea.payload)
+    except Exception as e:
+        return _registrar(tarea, e)
+    return _registrar(tarea, None)
+
+
+def _entregar_emails(tareas):
+    """Envía todos los emails del lote por la conexión SMTP del proceso."""
+    from . import mail
+
+    errores = mail.enviar_lote([_mensaje(tarea.payload) for tarea in tareas])
+    return [_registrar(tarea, error) for tarea, error in zip(tareas, errores)]
+
+
+def procesar(limite=50):
+    """Entrega un lote de tareas vencidas. Retorna (entregadas, fallidas)."""
+    tareas = _reclamar(limite)
+    emails = [t for t in tareas if t.tipo == TareaOutbox.TIPO_EMAIL]
+    resultados = _entregar_emails(emails) if emails else []
+    resultados += [entregar(t) for t in tareas if t.tipo != TareaOutbox.TIPO_EMAIL]
+
+    entregadas = sum(resultados)
+    return entregadas, len(resultados) - entregadas
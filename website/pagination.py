@@ -0,0 +1,79 @@
+"""
+Paginación por cursor (keyset) para los listados del blog.
+
+En lugar de OFFSET, cada página continúa desde el último (created_at, id)
+de la anterior, así que el costo de una página no depende de cuántos
+artículos haya antes. El cursor viaja en ?page=<microsegundos>-<id>,
+que sigue siendo un enlace normal y rastreable para los buscadores.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from django.http import Http404
+
+PAGE_PARAM = 'page'
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(post):
+    # Aritmética entera: un float perdería los microsegundos
+    ts = (post.created_at - EPOCH) // MICROSECOND
+    return f'{ts}-{post.pk}'
+
+
+def decode_cursor(value):
+    """Retorna (created_at, id). Lanza Http404 si el cursor no es válido."""
+    try:
+        ts, pk = value.split('-', 1)
+        created_at = EPOCH + int(ts) * MICROSECOND
+        return created_at, int(pk)
+    except (ValueError, OverflowError, OSError):
+        raise Http404('Página no válida')
+
+
+class KeysetPage:
+    """Una página de resultados y el cursor hacia la siguiente"""
+
+    def __init__(self, items, next_cursor, cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return self.cursor is None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def paginar(queryset, request, per_page):
+    """
+    Pagina `queryset` en orden (-created_at, -id) a partir del cursor
+    que venga en la query string. Una sola consulta por página.
+    """
+    cursor = request.GET.get(PAGE_PARAM) or None
+    queryset = queryset.order_by('-created_at', '-id')
+
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    # Se pide uno de más para saber si hay página siguiente
+    items = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = encode_cursor(items[-1])
+
+    return KeysetPage(items, next_cursor, cursor)
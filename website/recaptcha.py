@@ -0,0 +1,233 @@
+"""
+Verificación de reCAPTCHA v3.
+
+  - Conexión HTTPS persistente con Google por hilo (keep-alive), en lugar de
+    abrir una nueva con urllib en cada POST.
+  - Cache de tokens: un token ya verificado se rechaza sin consultar a Google
+    (los tokens son de un solo uso y expiran a los 2 minutos).
+  - Circuit breaker: tras RECAPTCHA_BREAKER_THRESHOLD respuestas lentas o
+    fallidas seguidas se deja de consultar a Google durante
+    RECAPTCHA_BREAKER_COOLDOWN segundos y se aplica el fail-open de siempre
+    (dejar pasar), para que los formularios no se queden esperando.
+  - `estadisticas()` expone llamadas, errores y latencia por proceso.
+"""
+import hashlib
+import http.client
+import json
+import threading
+import time
+import urllib.parse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+VERIFY_HOST = 'www.google.com'
+VERIFY_PATH = '/recaptcha/api/siteverify'
+TOKEN_TTL = 130  # los tokens expiran a los 120 s
+
+_local = threading.local()
+_lock = threading.Lock()
+
+# Estado del breaker (por proceso)
+_fallos_seguidos = 0
+_abierto_hasta = 0.0
+_probando = False
+
+_stats = {
+    'llamadas': 0,
+    'errores': 0,
+    'lentas': 0,
+    'replays': 0,
+    'fail_open': 0,
+    'aperturas': 0,
+    'segundos': 0.0,
+    'max_ms': 0.0,
+    'ultima_ms': 0.0,
+}
+
+
+def _config(nombre, default):
+    return getattr(settings, nombre, default)
+
+
+# ============================================
+# CONEXIÓN PERSISTENTE
+# ============================================
+
+def _conexion():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = http.client.HTTPSConnection(VERIFY_HOST, timeout=_config('RECAPTCHA_TIMEOUT', 2.0))
+        _local.conn = conn
+    return conn
+
+
+def _descartar_conexion():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+    _local.conn = None
+
+
+def _post(body):
+    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+    for intento in (1, 2):
+        conn = _conexion()
+        try:
+            conn.request('POST', VERIFY_PATH, body=body, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+            if resp.status != 200:
+                raise http.client.HTTPException(f'HTTP {resp.status}')
+            return json.loads(data)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # Google cerró la conexión keep-alive: reconectar una vez
+            _descartar_conexion()
+            if intento == 2:
+                raise
+        except Exception:
+            _descartar_conexion()
+            raise
+
+
+# ============================================
+# CIRCUIT BREAKER
+# ============================================
+
+def _permitir_llamada():
+    """False mientras el breaker está abierto. Deja pasar una sola llamada de prueba al expirar."""
+    global _probando
+    with _lock:
+        if _abierto_hasta == 0.0:
+            return True
+        if time.monotonic() < _abierto_hasta or _probando:
+            return False
+        _probando = True
+        return True
+
+
+def _registrar_resultado(duracion, ok):
+    global _fallos_seguidos, _abierto_hasta, _probando
+    lenta = duracion > _config('RECAPTCHA_SLOW_THRESHOLD', 1.5)
+    with _lock:
+        _stats['llamadas'] += 1
+        _stats['segundos'] += duracion
+        _stats['ultima_ms'] = round(duracion * 1000, 1)
+        _stats['max_ms'] = max(_stats['max_ms'], _stats['ultima_ms'])
+        if not ok:
+            _stats['errores'] += 1
+        if lenta:
+            _stats['lentas'] += 1
+
+        if ok and not lenta:
+            _fallos_seguidos = 0
+            _abierto_hasta = 0.0
+        else:
+            _fallos_seguidos += 1
+            if _probando or _fallos_seguidos >= _config('RECAPTCHA_BREAKER_THRESHOLD', 3):
+                _abierto_hasta = time.monotonic() + _config('RECAPTCHA_BREAKER_COOLDOWN', 60)
+                _stats['aperturas'] += 1
+                print(f"⚠️ reCAPTCHA: Google lento o caído — breaker abierto por {_config('RECAPTCHA_BREAKER_COOLDOWN', 60)}s")
+        _probando = False
+
+
+def _fail_open():
+    with _lock:
+        _stats['fail_open'] += 1
+    return True, 1.0
+
+
+# ============================================
+# VERIFICACIÓN
+# ============================================
+
+def _token_key(token):
+    return 'recaptcha:token:' + hashlib.sha256(token.encode()).hexdigest()
+
+
+def verificar_recaptcha(token):
+    """
+    Verifica un token de reCAPTCHA v3 con Google.
+    Retorna (valido: bool, score: float).
+    Si no hay secret key configurada (dev), siempre pasa.
+    Si Google falla o el breaker está abierto, deja pasar para no bloquear usuarios reales.
+    """
+    secret = settings.RECAPTCHA_SECRET_KEY
+    if not secret:
+        print("⚠️ reCAPTCHA: RECAPTCHA_SECRET_KEY no configurado — pasando sin verificar")
+        return True, 1.0
+    if not token:
+        # Token vacío = POST directo sin pasar por el browser (bot)
+        print("⚠️ reCAPTCHA: token vacío — bloqueado (bot directo)")
+        return False, 0.0
+
+    # Un token solo se puede usar una vez: si ya lo vimos es un replay
+    if not cache.add(_token_key(token), 1, timeout=TOKEN_TTL):
+        with _lock:
+            _stats['replays'] += 1
+        print("⚠️ reCAPTCHA: token reutilizado — bloqueado sin consultar a Google")
+        return False, 0.0
+
+    if not _permitir_llamada():
+        return _fail_open()
+
+    body = urllib.parse.urlencode({'secret': secret, 'response': token})
+    inicio = time.monotonic()
+    try:
+        result = _post(body)
+    except Exception as e:
+        _registrar_resultado(time.monotonic() - inicio, ok=False)
+        print(f"⚠️ reCAPTCHA verify error: {type(e).__name__}: {e}")
+        return _fail_open()  # Si Google falla, no penalizar al usuario
+    _registrar_resultado(time.monotonic() - inicio, ok=True)
+
+    success = result.get('success', False)
+    score = result.get('score', 0.0)
+    error_codes = result.get('error-codes', [])
+
+    # Log completo para diagnóstico
+    print(f"🔍 reCAPTCHA resultado: success={success} score={score} errors={error_codes}")
+
+    # Claves mal configuradas → dejar pasar
+    if 'invalid-input-secret' in error_codes:
+        print("⚠️ reCAPTCHA: RECAPTCHA_SECRET_KEY inválido en Render — verifica las env vars")
+        return True, 1.0
+
+    # browser-error = problema de red del usuario con Google (no es bot)
+    # El token llegó desde el browser, pero Google no pudo verificar la comunicación.
+    # Un bot con POST directo nunca genera este error (tiene token vacío).
+    if 'browser-error' in error_codes:
+        print("⚠️ reCAPTCHA: browser-error — problema de red del usuario, dejando pasar")
+        return True, 1.0
+
+    return success, score
+
+
+async def averificar_recaptcha(token):
+    """
+    Versión para vistas async: la consulta a Google corre en un hilo aparte
+    y el event loop sigue atendiendo otros requests mientras tanto.
+    """
+    return await sync_to_async(verificar_recaptcha, thread_sensitive=False)(token)
+
+
+def estadisticas():
+    """Contadores de verificación en este proceso."""
+    with _lock:
+        stats = dict(_stats)
+        stats['breaker_abierto'] = time.monotonic() < _abierto_hasta
+    stats['promedio_ms'] = round(stats['segundos'] * 1000 / stats['llamadas'], 1) if stats['llamadas'] else 0.0
+    return stats
+
+
+def reset():
+    """Cierra el breaker y reinicia los contadores."""
+    global _fallos_seguidos, _abierto_hasta, _probando
+    with _lock:
+        _fallos_seguidos = 0
+        _abierto_hasta = 0.0
+        _probando = False
+        for key in _stats:
+            _stats[key] = 0.0 if isinstance(_stats[key], float) else 0
+    _descartar_conexion()
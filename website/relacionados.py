@@ -0,0 +1,289 @@
+"""
+Motor de artículos relacionados.
+
+Para cada artículo publicado se guardan en ArticuloRelacionado los TOP más
+parecidos según:
+
+  - TF-IDF del título, extracto y cuerpo (el título cuenta triple y el
+    extracto doble), comparado por similitud coseno.
+  - Etiquetas en común (índice de Jaccard).
+
+score = PESO_TEXTO * coseno + PESO_TAGS * jaccard
+
+No se compara todos contra todos: los candidatos de un artículo son los
+que comparten con él una etiqueta o alguno de los TERMINOS_CLAVE términos de
+mayor peso de uno de los dos (índices invertidos término → artículos), y
+solo los CANDIDATOS mejores según esa suma parcial se puntúan exactos.
+
+Guardar, borrar o re-etiquetar un artículo encola una tarea en el outbox (en
+la misma transacción; los ids se suman a la tarea que aún no se haya tomado)
+y el worker `procesar_outbox` llama a `actualizar()`: recalcula ese artículo,
+los que lo tenían entre sus TOP y los candidatos cuyo TOP ahora alcanza. Los
+demás conservan los scores calculados con el IDF anterior hasta que
+`python manage.py recalcular_relacionados` (en cada deploy) rehace todo.
+
+Con 1000 artículos de ~800 palabras el recálculo completo tarda unos 5 s y
+una actualización 1-2 s (el worker guarda los términos de cada artículo
+hasta que cambia su updated_at).
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .autocompletar import normalizar
+
+TOP = 4
+PESO_TEXTO = 0.7
+PESO_TAGS = 0.3
+SCORE_MINIMO = 0.02
+TERMINOS_CLAVE = 25
+CANDIDATOS = 20
+
+_PALABRA = re.compile(r'[a-zñ]{3,}')
+
+STOPWORDS = frozenset(normalizar(w) for w in '''
+    para por con sin sobre entre desde hasta hacia como cuando donde que qué cual
+    cuales quien este esta estos estas ese esa esos esas aquel los las del una uno
+    unos unas sus mas más pero muy tambien también ser son fue han hay esta está
+    están estar puede pueden todo todos toda todas otro otra otros otras cada
+    nuestro nuestra nuestros nuestras usted ustedes le les lo se al ya si no
+'''.split())
+
+
+def _terminos(texto):
+    return [t for t in _PALABRA.findall(normalizar(texto)) if t not in STOPWORDS]
+
+
+def _frecuencias(post):
+    tf = Counter(_terminos(strip_tags(post.content_html or post.content)))
+    for termino in _terminos(post.excerpt):
+        tf[termino] += 2
+    for termino in _terminos(post.title):
+        tf[termino] += 3
+    return tf
+
+
+def _vectores(frecuencias):
+    """TF-IDF normalizado (norma L2) por artículo."""
+    n = len(frecuencias)
+    df = Counter(t for tf in frecuencias.values() for t in tf)
+    vectores = {}
+    for pk, tf in frecuencias.items():
+        v = {t: (1 + math.log(f)) * math.log((1 + n) / (1 + df[t])) for t, f in tf.items()}
+        norma = math.sqrt(sum(x * x for x in v.values())) or 1.0
+        vectores[pk] = {t: x / norma for t, x in v.items() if x}
+    return vectores
+
+
+def _coseno(a, b):
+    # La intersección de claves se hace en C: solo se multiplican los términos comunes
+    return sum(a[t] * b[t] for t in a.keys() & b.keys())
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _Indice:
+    """Índices invertidos para elegir candidatos sin comparar todos contra todos."""
+
+    def __init__(self, vectores, tags):
+        self.vectores = vectores
+        self.tags = tags
+        self.claves = {}
+        self.por_termino = defaultdict(list)
+        self.por_clave = defaultdict(list)
+        self.por_tag = defaultdict(list)
+        # Listas de (artículo, peso del término en ese artículo)
+        for pk, v in vectores.items():
+            for t, x in v.items():
+                self.por_termino[t].append((pk, x))
+            self.claves[pk] = set(heapq.nlargest(TERMINOS_CLAVE, v, key=v.get))
+            for t in self.claves[pk]:
+                self.por_clave[t].append((pk, v[t]))
+        for pk, ids in tags.items():
+            if pk not in vectores:
+                continue
+            for tag in ids:
+                self.por_tag[tag].append(pk)
+
+    def candidatos(self, pk):
+        """
+        {pk: score aproximado} de los artículos que comparten con `pk` una
+        etiqueta o un término clave de alguno de los dos.
+        """
+        v = self.vectores.get(pk, {})
+        claves = self.claves.get(pk, set())
+        parcial = defaultdict(float)
+        for t in claves:
+            x = v[t]
+            for q, y in self.por_termino[t]:
+                parcial[q] += x * y
+        for t, x in v.items():
+            if t not in claves:
+                for q, y in self.por_clave.get(t, ()):
+                    parcial[q] += x * y
+        aproximados = {q: PESO_TEXTO * texto for q, texto in parcial.items()}
+
+        propios = self.tags.get(pk, set())
+        comunes = Counter(q for tag in propios for q in self.por_tag[tag])
+        for q, n in comunes.items():
+            # Jaccard con el tamaño de la intersección ya contado
+            jaccard = n / (len(propios) + len(self.tags[q]) - n)
+            aproximados[q] = aproximados.get(q, 0.0) + PESO_TAGS * jaccard
+        aproximados.pop(pk, None)
+        return aproximados
+
+    def score(self, p, q):
+        return (
+            PESO_TEXTO * _coseno(self.vectores[p], self.vectores[q])
+            + PESO_TAGS * _jaccard(self.tags.get(p, set()), self.tags.get(q, set()))
+        )
+
+    def relacionados(self, pk, fechas, top):
+        """[(relacionado_id, score), ...] de `pk`, ordenado por score."""
+        aproximados = self.candidatos(pk)
+        puntuados = []
+        for q in heapq.nlargest(CANDIDATOS, aproximados, key=aproximados.get):
+            score = self.score(pk, q)
+            if score >= SCORE_MINIMO:
+                # Desempate: el más reciente primero
+                puntuados.append((round(score, 6), fechas[q], q))
+        puntuados.sort(reverse=True)
+        return [(q, score) for score, _, q in puntuados[:top]]
+
+
+def calcular(posts, tags, top=TOP, frecuencias=None):
+    """
+    posts: artículos publicados; tags: {post_id: set(tag_id)}.
+    Retorna {post_id: [(relacionado_id, score), ...]} ordenado por score.
+    """
+    if frecuencias is None:
+        frecuencias = {p.pk: _frecuencias(p) for p in posts}
+    indice = _Indice(_vectores(frecuencias), tags)
+    fechas = {p.pk: p.created_at for p in posts}
+    return {pk: indice.relacionados(pk, fechas, top) for pk in fechas}
+
+
+# {pk: (updated_at, frecuencias)}: el worker es un proceso largo y solo vuelve
+# a tokenizar los artículos que cambiaron
+_frecuencias_cache = {}
+
+
+def _cargar():
+    """(posts publicados, {post_id: set(tag_id)}, {post_id: frecuencias})"""
+    from .models import BlogPost
+
+    posts = list(BlogPost.objects.filter(is_published=True).only('id', 'created_at', 'updated_at'))
+    vigentes = {p.pk: p.updated_at for p in posts}
+    for pk in list(_frecuencias_cache):
+        if _frecuencias_cache[pk][0] != vigentes.get(pk):
+            del _frecuencias_cache[pk]
+    faltan = [pk for pk in vigentes if pk not in _frecuencias_cache]
+    for post in BlogPost.objects.filter(pk__in=faltan).only(
+        'id', 'title', 'excerpt', 'content', 'content_html', 'updated_at'
+    ).iterator():
+        _frecuencias_cache[post.pk] = (post.updated_at, _frecuencias(post))
+
+    tags = {}
+    for post_id, tag_id in BlogPost.tags.through.objects.filter(
+        blogpost__is_published=True
+    ).values_list('blogpost_id', 'blogtag_id'):
+        tags.setdefault(post_id, set()).add(tag_id)
+    frecuencias = {pk: _frecuencias_cache[pk][1] for pk in vigentes if pk in _frecuencias_cache}
+    return posts, tags, frecuencias
+
+
+def _guardar(resultado, borrar):
+    from .caching import bump_version
+    from .models import ArticuloRelacionado
+
+    filas = [
+        ArticuloRelacionado(post_id=pk, relacionado_id=rel, posicion=i, score=score)
+        for pk, relacionados in resultado.items()
+        for i, (rel, score) in enumerate(relacionados)
+    ]
+    with transaction.atomic():
+        borrar.delete()
+        ArticuloRelacionado.objects.bulk_create(filas)
+    bump_version('blog')
+    return len(filas)
+
+
+def recalcular(top=TOP):
+    """Recalcula y guarda los relacionados de todos los artículos. Retorna filas guardadas."""
+    from .models import ArticuloRelacionado
+
+    posts, tags, frecuencias = _cargar()
+    resultado = calcular(posts, tags, top, frecuencias)
+    return _guardar(resultado, ArticuloRelacionado.objects.all())
+
+
+def actualizar(post_ids, top=TOP):
+    """
+    Recalcula lo que puede cambiar al guardar o borrar `post_ids`: sus propias
+    filas, las de los artículos que los tenían entre sus TOP y las de los
+    candidatos cuyo TOP guardado ahora alcanzan. Retorna artículos recalculados.
+    """
+    from .models import ArticuloRelacionado
+
+    cambiados = set(post_ids)
+    posts, tags, frecuencias = _cargar()
+    indice = _Indice(_vectores(frecuencias), tags)
+    publicados = {p.pk for p in posts}
+
+    afectados = cambiados | set(
+        ArticuloRelacionado.objects.filter(relacionado_id__in=cambiados).values_list('post_id', flat=True)
+    )
+    candidatos = {pk: indice.candidatos(pk).keys() - afectados for pk in cambiados & publicados}
+    # Score que hay que alcanzar para entrar en los TOP que cada candidato tiene guardados
+    umbrales = {
+        fila['post_id']: fila['minimo'] if fila['n'] >= top else SCORE_MINIMO
+        for fila in ArticuloRelacionado.objects.filter(post_id__in=set().union(*candidatos.values()))
+        .values('post_id').annotate(n=Count('id'), minimo=Min('score'))
+    }
+    for pk, qs in candidatos.items():
+        afectados.update(q for q in qs if indice.score(q, pk) >= umbrales.get(q, SCORE_MINIMO))
+
+    fechas = {p.pk: p.created_at for p in posts}
+    resultado = {pk: indice.relacionados(pk, fechas, top) for pk in afectados & publicados}
+    _guardar(resultado, ArticuloRelacionado.objects.filter(post_id__in=afectados))
+    return len(resultado)
+
+
+def programar(post_ids=None):
+    """
+    Encola en el outbox la actualización de `post_ids` (None: todo el blog).
+    Guardar un artículo en el admin dispara post_save y varios m2m_changed:
+    mientras haya una tarea sin tomar, los ids se suman a ella. Si la
+    transacción se revierte, la tarea (o el cambio) desaparece con ella.
+    """
+    from .models import TareaOutbox
+
+    with transaction.atomic():
+        pendiente = (
+            TareaOutbox.objects.select_for_update()
+            .filter(
+                tipo=TareaOutbox.TIPO_RELACIONADOS,
+                estado=TareaOutbox.ESTADO_PENDIENTE,
+                proximo_intento__lte=timezone.now(),  # las tomadas por un worker tienen el lease por delante
+            )
+            .order_by('pk')
+            .first()
+        )
+        payload = {} if post_ids is None else {'posts': sorted(set(post_ids))}
+        if pendiente is None:
+            TareaOutbox.objects.create(tipo=TareaOutbox.TIPO_RELACIONADOS, payload=payload)
+        elif 'posts' in pendiente.payload:  # sin 'posts' la tarea ya recalcula todo
+            if payload:
+                payload['posts'] = sorted(set(payload['posts']) | set(pendiente.payload['posts']))
+            pendiente.payload = payload
+            pendiente.save(update_fields=['payload'])
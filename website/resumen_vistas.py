@@ -0,0 +1,118 @@
+"""
+Agregados de vistas del blog.
+
+El volcado del contador (view_counter.py) suma cada lote de eventos a:
+
+  - VistaDiaria:   vistas y sketch HyperLogLog de las IPs por artículo y día.
+  - ResumenVistas: sketch de todo el historial del artículo; `visitantes`
+                   es lo que muestran el beacon y el admin.
+
+Los únicos de cualquier período salen de unir los sketches diarios
+(`visitantes_periodo`). BlogPostView queda como registro crudo de los
+últimos VIEW_COUNTER_RETENTION_DAYS días: `purgar()` borra lo anterior
+(lo llama el hilo del contador una vez por hora y
+`python manage.py purgar_vistas`).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .hll import HyperLogLog
+
+CHUNK = 5000
+
+
+def registrar(eventos, VistaDiaria=None, ResumenVistas=None):
+    """
+    Suma eventos [(post_id, ip, fecha)] a los agregados.
+    Los modelos se pueden pasar (migraciones); retorna días-artículo actualizados.
+    """
+    if VistaDiaria is None:
+        from .models import ResumenVistas, VistaDiaria
+
+    por_dia = defaultdict(list)
+    for post_id, ip, fecha in eventos:
+        por_dia[(post_id, timezone.localdate(fecha))].append(ip)
+    if not por_dia:
+        return 0
+    post_ids = {post_id for post_id, _ in por_dia}
+    fechas = {fecha for _, fecha in por_dia}
+
+    with transaction.atomic():
+        # Crear las filas que falten y bloquearlas: otro proceso puede estar volcando a la vez
+        VistaDiaria.objects.bulk_create(
+            [VistaDiaria(post_id=post_id, fecha=fecha) for post_id, fecha in por_dia],
+            ignore_conflicts=True,
+        )
+        ResumenVistas.objects.bulk_create(
+            [ResumenVistas(post_id=post_id) for post_id in post_ids],
+            ignore_conflicts=True,
+        )
+        dias = [
+            dia for dia in VistaDiaria.objects.select_for_update().filter(post_id__in=post_ids, fecha__in=fechas)
+            if (dia.post_id, dia.fecha) in por_dia
+        ]
+        resumenes = list(ResumenVistas.objects.select_for_update().filter(post_id__in=post_ids))
+        totales = {r.post_id: HyperLogLog.desde_bytes(r.sketch) for r in resumenes}
+
+        for dia in dias:
+            ips = por_dia[(dia.post_id, dia.fecha)]
+            sketch = HyperLogLog.desde_bytes(dia.sketch)
+            total = totales[dia.post_id]
+            for ip in ips:
+                sketch.agregar(ip)
+                total.agregar(ip)
+            dia.vistas += len(ips)
+            dia.visitantes = sketch.estimar()
+            dia.sketch = sketch.a_bytes()
+
+        ahora = timezone.now()
+        for resumen in resumenes:
+            resumen.visitantes = totales[resumen.post_id].estimar()
+            resumen.sketch = totales[resumen.post_id].a_bytes()
+            resumen.actualizado = ahora
+
+        VistaDiaria.objects.bulk_update(dias, ['vistas', 'visitantes', 'sketch'])
+        ResumenVistas.objects.bulk_update(resumenes, ['visitantes', 'sketch', 'actualizado'])
+    return len(dias)
+
+
+def desde_vistas(BlogPostView=None, VistaDiaria=None, ResumenVistas=None):
+    """Suma a los agregados todas las filas de BlogPostView (carga inicial)."""
+    if BlogPostView is None:
+        from .models import BlogPostView
+
+    filas = BlogPostView.objects.order_by().values_list('post_id', 'ip_address', 'viewed_at')
+    lote = []
+    for fila in filas.iterator(chunk_size=CHUNK):
+        lote.append(fila)
+        if len(lote) >= CHUNK:
+            registrar(lote, VistaDiaria, ResumenVistas)
+            lote = []
+    registrar(lote, VistaDiaria, ResumenVistas)
+
+
+def visitantes_periodo(post_id, desde, hasta=None):
+    """Visitantes únicos estimados de un artículo entre dos fechas (inclusive)."""
+    from .models import VistaDiaria
+
+    dias = VistaDiaria.objects.filter(post_id=post_id, fecha__gte=desde)
+    if hasta is not None:
+        dias = dias.filter(fecha__lte=hasta)
+    union = HyperLogLog()
+    for sketch in dias.values_list('sketch', flat=True):
+        union.unir(HyperLogLog.desde_bytes(sketch))
+    return union.estimar()
+
+
+def purgar(dias=None):
+    """Borra las vistas crudas más antiguas que la ventana de retención. Retorna filas borradas."""
+    from .models import BlogPostView
+
+    if dias is None:
+        dias = getattr(settings, 'VIEW_COUNTER_RETENTION_DAYS', 30)
+    borradas, _ = BlogPostView.objects.filter(viewed_at__lt=timezone.now() - timedelta(days=dias)).delete()
+    return borradas
@@ -1,7 +1,9 @@
 import gspread
 import json
 import os
+import threading
 import traceback
+from google.auth.exceptions import RefreshError
 from google.oauth2.service_account import Credentials
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
@@ -47,19 +49,22 @@ def _extract_sheet_id(value):
     return value.strip()
 
 
-def get_sheet(tab_name):
-    creds_json = os.environ.get('GOOGLE_CREDENTIALS_JSON', '').strip()
-    sheet_id_raw = os.environ.get('GOOGLE_SHEETS_ID', '').strip()
-    sheet_id = _extract_sheet_id(sheet_id_raw)
+# ============================================
+# CLIENTE CACHEADO
+# ============================================
+# Credenciales, cliente autorizado, spreadsheet y worksheets se crean una sola
+# vez por proceso. google-auth renueva el token de acceso solo cuando expira;
+# si aun así la API responde 401 (o falla la renovación) se descarta el cache
+# y se reconecta una vez.
+
+_lock = threading.Lock()
+_client = None
+_spreadsheet = None
+_spreadsheet_id = None
+_worksheets = {}
 
-    if not creds_json:
-        print(f"Google Sheets: GOOGLE_CREDENTIALS_JSON no configurado (longitud raw: {len(os.environ.get('GOOGLE_CREDENTIALS_JSON', ''))})")
-        return None
-    if not sheet_id:
-        print(f"Google Sheets: GOOGLE_SHEETS_ID no configurado")
-        return None
-    print(f"Google Sheets: sheet_id={sheet_id}, tab={tab_name}")
 
+def _load_credentials(creds_json):
     try:
         creds_data = json.loads(creds_json)
         print(f"Google Sheets: JSON parseado OK, client_email={creds_data.get('client_email', 'N/A')}")
@@ -71,27 +76,135 @@ def get_sheet(tab_name):
         except json.JSONDecodeError as e:
             print(f"Google Sheets: GOOGLE_CREDENTIALS_JSON no es JSON valido: {e}")
             return None
+    return Credentials.from_service_account_info(creds_data, scopes=SCOPES)
 
-    try:
-        creds = Credentials.from_service_account_info(creds_data, scopes=SCOPES)
+
+def _open_spreadsheet(creds_json, sheet_id):
+    """Retorna el spreadsheet cacheado, autorizando solo la primera vez."""
+    global _client, _spreadsheet, _spreadsheet_id
+
+    if _spreadsheet is not None and _spreadsheet_id == sheet_id:
+        return _spreadsheet
+
+    if _client is None:
+        creds = _load_credentials(creds_json)
+        if creds is None:
+            return None
         print("Google Sheets: Credentials creadas OK")
-        client = gspread.authorize(creds)
+        _client = gspread.authorize(creds)
         print("Google Sheets: Client autorizado OK")
-        sheet = client.open_by_key(sheet_id).worksheet(tab_name)
-        print(f"Google Sheets: Worksheet '{tab_name}' abierta OK")
-        return sheet
-    except Exception as e:
-        print(f"Google Sheets: error en auth/open: {type(e).__name__}: {e}")
-        print(traceback.format_exc())
+
+    _spreadsheet = _client.open_by_key(sheet_id)
+    _spreadsheet_id = sheet_id
+    _worksheets.clear()
+    return _spreadsheet
+
+
+def get_sheet(tab_name):
+    creds_json = os.environ.get('GOOGLE_CREDENTIALS_JSON', '').strip()
+    sheet_id_raw = os.environ.get('GOOGLE_SHEETS_ID', '').strip()
+    sheet_id = _extract_sheet_id(sheet_id_raw)
+
+    if not creds_json:
+        print(f"Google Sheets: GOOGLE_CREDENTIALS_JSON no configurado (longitud raw: {len(os.environ.get('GOOGLE_CREDENTIALS_JSON', ''))})")
         return None
+    if not sheet_id:
+        print(f"Google Sheets: GOOGLE_SHEETS_ID no configurado")
+        return None
+
+    sheet = _worksheets.get(tab_name)
+    if sheet is not None and _spreadsheet_id == sheet_id:
+        return sheet
+
+    with _lock:
+        try:
+            spreadsheet = _open_spreadsheet(creds_json, sheet_id)
+            if spreadsheet is None:
+                return None
+            sheet = _worksheets.get(tab_name)
+            if sheet is None:
+                print(f"Google Sheets: sheet_id={sheet_id}, tab={tab_name}")
+                sheet = spreadsheet.worksheet(tab_name)
+                _worksheets[tab_name] = sheet
+                print(f"Google Sheets: Worksheet '{tab_name}' abierta OK")
+            return sheet
+        except Exception as e:
+            print(f"Google Sheets: error en auth/open: {type(e).__name__}: {e}")
+            print(traceback.format_exc())
+            return None
+
+
+def reset():
+    """Descarta el cliente y las worksheets cacheadas."""
+    global _client, _spreadsheet, _spreadsheet_id
+    with _lock:
+        _client = None
+        _spreadsheet = None
+        _spreadsheet_id = None
+        _worksheets.clear()
+
+
+def _sesion_invalida(error):
+    """True si el error se resuelve volviendo a autorizar."""
+    if isinstance(error, RefreshError):
+        return True
+    if isinstance(error, gspread.exceptions.APIError):
+        return getattr(error.response, 'status_code', None) == 401
+    return False
+
+
+def is_configured():
+    """True si hay credenciales e ID de hoja configurados."""
+    return bool(
+        os.environ.get('GOOGLE_CREDENTIALS_JSON', '').strip()
+        and os.environ.get('GOOGLE_SHEETS_ID', '').strip()
+    )
+
+
+def _con_reconexion(tab_name, escribir):
+    """Ejecuta escribir(sheet), reconectando una vez si la sesión expiró."""
+    for intento in (1, 2):
+        sheet = get_sheet(tab_name)
+        if sheet is None:
+            raise RuntimeError(f"No se pudo abrir la hoja '{tab_name}'")
+        try:
+            return escribir(sheet)
+        except Exception as e:
+            if intento == 2 or not _sesion_invalida(e):
+                raise
+            print(f"Google Sheets: sesión inválida ({type(e).__name__}), reconectando")
+            reset()
+
+
+def append_row(tab_name, row_data):
+    """
+    Agrega una fila al tab especificado. Lanza excepción si falla
+    (la usa el outbox para reintentar).
+    """
+    _con_reconexion(
+        tab_name,
+        lambda sheet: sheet.append_row(row_data, value_input_option='USER_ENTERED'),
+    )
+    print(f"Google Sheets OK: fila en '{tab_name}'")
+
+
+def append_rows(tab_name, rows):
+    """
+    Agrega varias filas al tab con una sola llamada a la API.
+    Lanza excepción si falla.
+    """
+    if not rows:
+        return
+    _con_reconexion(
+        tab_name,
+        lambda sheet: sheet.append_rows(rows, value_input_option='USER_ENTERED'),
+    )
+    print(f"Google Sheets OK: {len(rows)} fila(s) en '{tab_name}'")
 
 
 def log_to_sheets(tab_name, row_data):
     """Agrega una fila al tab especificado. Silencioso si falla."""
     try:
-        sheet = get_sheet(tab_name)
-        if sheet:
-            sheet.append_row(row_data, value_input_option='USER_ENTERED')
-            print(f"Google Sheets OK: fila en '{tab_name}'")
+        append_row(tab_name, row_data)
     except Exception as e:
         print(f"Google Sheets error ({tab_name}): {str(e)}")
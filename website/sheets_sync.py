@@ -0,0 +1,131 @@
+"""
+Reconciliador de leads → Google Sheets.
+
+Los formularios ya no escriben en Sheets: cada registro nace con su flag de
+sincronización en False y `sincronizar()` sube los pendientes agrupados por
+tab, con un solo `append_rows` por tab y lote. Cada lote se reserva en una
+transacción corta (marca de reserva con la hora), se sube a Sheets fuera de
+cualquier transacción y recién entonces se marca como sincronizado: ninguna
+transacción ni bloqueo queda abierto durante la llamada de red, y correrlo
+dos veces (o en dos procesos a la vez) no duplica filas. Una reserva de un
+proceso caído se libera sola pasados RESERVA minutos.
+
+Lo ejecutan `python manage.py sincronizar_sheets` y, periódicamente, el
+worker `procesar_outbox`.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import sheets
+
+LOTE = 500  # filas por llamada a append_rows
+RESERVA = timedelta(minutes=15)  # más que el timeout de una llamada a Sheets
+
+
+def _fecha(valor):
+    return valor.strftime('%Y-%m-%d %H:%M')
+
+
+def _fila_asesoria(c):
+    return 'Asesoria', [_fecha(c.fecha_envio), c.nombre, c.email, c.telefono, c.duda]
+
+
+def _fila_cotizacion(s):
+    fuente = 'Landing Importación' if s.source_page == 'landing-importacion' else (s.source_page or 'Home')
+    return 'Cotizacion', [
+        _fecha(s.fecha_envio), s.nombre, s.empresa, s.email, s.telefono,
+        s.pais_origen, s.pais_destino, s.tipo_servicio, s.mensaje, fuente,
+    ]
+
+
+def _fila_suscriptor(s):
+    # consent_date se renueva al reactivar, igual que la fila que se registra
+    nombre = s.name or 'Cliente'
+    if s.source_page == 'home-lead-magnet':
+        return 'Guia', [_fecha(s.consent_date), nombre, s.email]
+    return 'Newsletter', [_fecha(s.consent_date), nombre, s.email, s.source_page]
+
+
+def _fuentes():
+    from .models import ConsultaAsesoria, NewsletterSubscriber, SolicitudCotizacion
+
+    # (modelo, campo de sincronización, campo de reserva, orden, función que arma la fila)
+    return [
+        (ConsultaAsesoria, 'sincronizado_sheets', 'reservado_sheets', 'fecha_envio', _fila_asesoria),
+        (SolicitudCotizacion, 'sincronizado_sheets', 'reservado_sheets', 'fecha_envio', _fila_cotizacion),
+        (NewsletterSubscriber, 'synced_to_sheets', 'sheets_claimed_at', 'consent_date', _fila_suscriptor),
+    ]
+
+
+def _reservar(model, campo, reserva, orden, lote):
+    """Reserva un lote de pendientes en una transacción corta. Retorna (marca, registros)."""
+    marca = timezone.now()
+    libres = Q(**{f'{reserva}__isnull': True}) | Q(**{f'{reserva}__lt': marca - RESERVA})
+    with transaction.atomic():
+        registros = list(
+            model.objects.select_for_update(skip_locked=True)
+            .filter(libres, **{campo: False})
+            .order_by(orden, 'pk')[:lote]
+        )
+        model.objects.filter(pk__in=[obj.pk for obj in registros]).update(**{reserva: marca})
+    return marca, registros
+
+
+def _sincronizar_modelo(model, campo, reserva, orden, fila, lote):
+    """
+    Sube un lote de registros pendientes de un modelo.
+    Retorna {tab: filas escritas}. Si Sheets falla en un tab, los tabs ya
+    escritos quedan marcados, el resto se libera y la excepción se propaga.
+    """
+    marca, registros = _reservar(model, campo, reserva, orden, lote)
+
+    por_tab = defaultdict(list)
+    ids_por_tab = defaultdict(list)
+    for obj in registros:
+        tab, row = fila(obj)
+        por_tab[tab].append(row)
+        ids_por_tab[tab].append(obj.pk)
+
+    escritas = {}
+    for tab, rows in por_tab.items():
+        try:
+            sheets.append_rows(tab, rows)
+        except Exception:
+            sin_subir = [pk for t, ids in ids_por_tab.items() if t not in escritas for pk in ids]
+            model.objects.filter(pk__in=sin_subir, **{reserva: marca}).update(**{reserva: None})
+            raise
+        # Solo si la reserva sigue siendo nuestra (un re-registro la anula)
+        model.objects.filter(pk__in=ids_por_tab[tab], **{reserva: marca}).update(**{campo: True, reserva: None})
+        escritas[tab] = len(rows)
+    return escritas
+
+
+def pendientes():
+    """Número de registros que faltan por subir a Sheets."""
+    return sum(
+        model.objects.filter(**{campo: False}).count()
+        for model, campo, _, _, _ in _fuentes()
+    )
+
+
+def sincronizar(lote=LOTE):
+    """
+    Sube todos los registros pendientes. Retorna {tab: filas escritas}.
+    Si Sheets no está configurado no hace nada (los registros esperan).
+    """
+    if not sheets.is_configured():
+        return {}
+
+    total = defaultdict(int)
+    for model, campo, reserva, orden, fila in _fuentes():
+        while True:
+            escritas = _sincronizar_modelo(model, campo, reserva, orden, fila, lote)
+            if not escritas:
+                break
+            for tab, n in escritas.items():
+                total[tab] += n
+    return dict(total)
@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import autocompletar, busqueda, imagenes, relacionados
+from .caching import bump_version
+from .models import ArticuloRelacionado, BlogPost, BlogTag
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def invalidar_cache_blog(sender, instance, **kwargs):
+    """Cualquier cambio en un artículo invalida los fragmentos del blog"""
+    bump_version('blog')
+
+
+@receiver(post_save, sender=BlogPost)
+def programar_derivados_imagen(sender, instance, raw=False, **kwargs):
+    """Imagen destacada nueva o quitada → regenerar derivados fuera del request"""
+    if raw or imagenes.vigentes(instance):
+        return
+    if instance.featured_image or instance.featured_image_variants:
+        transaction.on_commit(lambda: imagenes.programar(instance))
+
+
+@receiver(post_save, sender=BlogPost)
+def indexar_busqueda(sender, instance, update_fields=None, **kwargs):
+    """Mantener el índice de texto completo al día"""
+    if update_fields is not None and not {'title', 'excerpt', 'content'} & set(update_fields):
+        return
+    busqueda.indexar_post(instance)
+
+
+@receiver(post_delete, sender=BlogPost)
+def quitar_de_busqueda(sender, instance, **kwargs):
+    if busqueda.disponible():
+        busqueda.quitar(instance.pk)
+
+
+@receiver(post_save, sender=BlogPost)
+def autocompletar_post(sender, instance, update_fields=None, **kwargs):
+    """Actualizar el índice de autocompletado del proceso"""
+    if update_fields is not None and not {'title', 'slug', 'is_published'} & set(update_fields):
+        return
+    autocompletar.actualizar_post(instance)
+
+
+@receiver(post_delete, sender=BlogPost)
+def autocompletar_quitar_post(sender, instance, **kwargs):
+    autocompletar.quitar_post(instance.pk)
+
+
+@receiver(post_save, sender=BlogTag)
+def autocompletar_tag(sender, instance, **kwargs):
+    autocompletar.actualizar_tag(instance)
+
+
+@receiver(post_delete, sender=BlogTag)
+def autocompletar_quitar_tag(sender, instance, **kwargs):
+    autocompletar.quitar_tag(instance.pk)
+
+
+@receiver(post_save, sender=BlogPost)
+def relacionados_post(sender, instance, update_fields=None, **kwargs):
+    """Recalcular artículos relacionados si cambió el texto o la publicación"""
+    if update_fields is not None and not {'title', 'excerpt', 'content', 'is_published'} & set(update_fields):
+        return
+    relacionados.programar([instance.pk])
+
+
+@receiver(pre_delete, sender=BlogPost)
+def relacionados_borrado(sender, instance, **kwargs):
+    # Antes del borrado: el CASCADE se lleva las filas que dicen quién lo tenía entre sus TOP
+    relacionados.programar([
+        instance.pk,
+        *ArticuloRelacionado.objects.filter(relacionado=instance).values_list('post_id', flat=True),
+    ])
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def relacionados_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        relacionados.programar([instance.pk])
+    elif pk_set is not None:
+        relacionados.programar(pk_set)
+    else:
+        relacionados.programar()  # tag.posts.clear() no dice qué artículos tenía
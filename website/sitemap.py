@@ -0,0 +1,165 @@
+"""
+Generación cacheada del sitemap.xml.
+
+El XML se construye una sola vez por versión del blog (cualquier cambio en
+BlogPost la incrementa, ver signals.py) y se sirve desde el cache con ETag y
+Last-Modified. Si el sitio supera SITEMAP_MAX_URLS direcciones, /sitemap.xml
+pasa a ser un índice que apunta a /sitemap-<n>.xml.
+"""
+import hashlib
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.urls import reverse
+from django.utils import timezone
+
+from .caching import versioned_key
+
+BASE_URL = 'https://www.pacunato.com'
+SITEMAP_TIMEOUT = 60 * 60 * 24
+
+# (nombre de la URL, kwargs, prioridad, changefreq)
+STATIC_PAGES = [
+    ('website:home', None, '1.0', 'daily'),
+    ('website:servicios', None, '0.9', 'weekly'),
+    ('website:landing_importacion', None, '0.9', 'monthly'),
+    ('website:landing_china', None, '0.9', 'monthly'),
+    ('website:nosotros', None, '0.8', 'monthly'),
+    ('website:blog', None, '0.8', 'daily'),
+    ('website:blog_categoria', {'categoria': 'logistica'}, '0.7', 'weekly'),
+    ('website:blog_categoria', {'categoria': 'comercio'}, '0.7', 'weekly'),
+    ('website:contacto', None, '0.7', 'monthly'),
+    ('website:asesoria', None, '0.7', 'monthly'),
+    ('website:cotizacion', None, '0.7', 'monthly'),
+    ('website:privacidad', None, '0.3', 'yearly'),
+    ('website:terminos', None, '0.3', 'yearly'),
+]
+
+
+@lru_cache(maxsize=1)
+def _static_urls():
+    """Las URLs estáticas se resuelven una sola vez por proceso."""
+    return [
+        (BASE_URL + reverse(name, kwargs=kwargs), priority, changefreq)
+        for name, kwargs, priority, changefreq in STATIC_PAGES
+    ]
+
+
+def _max_urls():
+    return getattr(settings, 'SITEMAP_MAX_URLS', 50000)
+
+
+def _published_posts():
+    from .models import BlogPost
+    return BlogPost.objects.filter(is_published=True)
+
+
+def _url_entry(loc, changefreq, priority, lastmod):
+    return (
+        '  <url>\n'
+        f'    <loc>{escape(loc)}</loc>\n'
+        f'    <changefreq>{changefreq}</changefreq>\n'
+        f'    <priority>{priority}</priority>\n'
+        f'    <lastmod>{lastmod}</lastmod>\n'
+        '  </url>'
+    )
+
+
+def _entry(xml, last_modified):
+    return {
+        'xml': xml,
+        'etag': '"%s"' % hashlib.md5(xml.encode()).hexdigest(),
+        'last_modified': last_modified,
+    }
+
+
+def _build_urlset(section, total_posts, last_modified):
+    """
+    Construye el <urlset> de la sección `section` (1..n). Conceptualmente
+    todas las URLs son [estáticas..., posts...] y cada sección toma un tramo
+    de SITEMAP_MAX_URLS de esa lista.
+    """
+    per_section = _max_urls()
+    start = (section - 1) * per_section
+    end = start + per_section
+    static_urls = _static_urls()
+
+    xml = ['<?xml version="1.0" encoding="UTF-8"?>']
+    xml.append('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+
+    today = timezone.localdate().strftime('%Y-%m-%d')
+    for loc, priority, changefreq in static_urls[start:end]:
+        xml.append(_url_entry(loc, changefreq, priority, today))
+
+    post_start = max(start - len(static_urls), 0)
+    post_end = max(end - len(static_urls), 0)
+    if post_end > post_start and post_start < total_posts:
+        posts = (
+            _published_posts()
+            .order_by('-created_at', '-id')
+            .values_list('slug', 'updated_at')[post_start:post_end]
+        )
+        for slug, updated_at in posts.iterator(chunk_size=2000):
+            loc = BASE_URL + reverse('website:blog_post', kwargs={'slug': slug})
+            xml.append(_url_entry(loc, 'weekly', '0.6', updated_at.strftime('%Y-%m-%d')))
+
+    xml.append('</urlset>')
+    return _entry('\n'.join(xml), last_modified)
+
+
+def _build_index(sections, last_modified):
+    lastmod = last_modified.strftime('%Y-%m-%d')
+    xml = ['<?xml version="1.0" encoding="UTF-8"?>']
+    xml.append('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+    for section in range(1, sections + 1):
+        loc = BASE_URL + reverse('website:sitemap_section', kwargs={'section': section})
+        xml.append('  <sitemap>')
+        xml.append(f'    <loc>{escape(loc)}</loc>')
+        xml.append(f'    <lastmod>{lastmod}</lastmod>')
+        xml.append('  </sitemap>')
+    xml.append('</sitemapindex>')
+    return _entry('\n'.join(xml), last_modified)
+
+
+def _stats():
+    """(total de posts publicados, fecha del último cambio), cacheado por versión."""
+    key = versioned_key('blog', 'sitemap', 'stats')
+    stats = cache.get(key)
+    if stats is None:
+        agg = _published_posts().aggregate(total=Count('id'), last=Max('updated_at'))
+        stats = (agg['total'], agg['last'] or timezone.now())
+        cache.set(key, stats, timeout=SITEMAP_TIMEOUT)
+    return stats
+
+
+def section_count():
+    total_posts, _ = _stats()
+    total_urls = len(_static_urls()) + total_posts
+    return max((total_urls + _max_urls() - 1) // _max_urls(), 1)
+
+
+def get_sitemap(section=None):
+    """
+    Retorna {'xml', 'etag', 'last_modified'} para /sitemap.xml (section=None)
+    o para /sitemap-<section>.xml. Retorna None si la sección no existe.
+    """
+    sections = section_count()
+    if section is not None and not 1 <= section <= sections:
+        return None
+
+    key = versioned_key('blog', 'sitemap', section or 'root')
+    entry = cache.get(key)
+    if entry is None:
+        total_posts, last_modified = _stats()
+        if section is None:
+            entry = (
+                _build_urlset(1, total_posts, last_modified) if sections == 1
+                else _build_index(sections, last_modified)
+            )
+        else:
+            entry = _build_urlset(section, total_posts, last_modified)
+        cache.set(key, entry, timeout=SITEMAP_TIMEOUT)
+    return entry
@@ -1,3 +1,2051 @@
-from django.test import TestCase
+import contextlib
+import http.client
+import io
+import json
+import os
+import smtplib
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    autocompletar, bots, busqueda, exportar, hll, imagenes, mail as smtp, outbox, recaptcha, relacionados,
+    resumen_vistas, sheets_sync, view_counter,
+)
+from .models import (
+    ArticuloRelacionado, BlogPost, BlogPostView, BlogTag, ConsultaAsesoria,
+    NewsletterSubscriber, SolicitudCotizacion, TareaOutbox, VistaDiaria,
+)
+
+NAVEGADOR = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/124.0.0.0 Safari/537.36'
+)
+
+
+# ============================================
+# BLOG: ÍNDICE
+# ============================================
+
+class BlogIndexTests(TestCase):
+    """El índice del blog debe costar un número fijo de consultas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i, (category_code, _) in enumerate(BlogPost.CATEGORY_CHOICES * 3):
+            BlogPost.objects.create(
+                title=f'Artículo {i}',
+                excerpt='Extracto',
+                content='<p>Contenido</p>',
+                category=category_code,
+                is_featured=(i == 0),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_consultas_sin_cache(self):
+        # destacado + sidebar (GROUP BY + recientes) + listado
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('website:blog'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_posts'], 3 * len(BlogPost.CATEGORY_CHOICES))
+
+    def test_consultas_con_sidebar_cacheado(self):
+        self.client.get(reverse('website:blog'))
+        # destacado + listado
+        with self.assertNumQueries(2):
+            self.client.get(reverse('website:blog'))
+
+    def test_consultas_no_crecen_con_las_categorias(self):
+        self.client.get(reverse('website:blog'))
+        cache.clear()
+        BlogPost.objects.bulk_create([
+            BlogPost(title=f'Extra {i}', slug=f'extra-{i}', excerpt='e', content='c', category=code)
+            for i, (code, _) in enumerate(BlogPost.CATEGORY_CHOICES * 10)
+        ])
+        with self.assertNumQueries(4):
+            self.client.get(reverse('website:blog'))
+
+    def test_sidebar_se_invalida_al_guardar(self):
+        self.client.get(reverse('website:blog'))
+        BlogPost.objects.create(title='Nuevo artículo', excerpt='e', content='c', category='eventos')
+        response = self.client.get(reverse('website:blog'))
+        self.assertContains(response, 'Nuevo artículo')
+        self.assertEqual(response.context['total_posts'], 3 * len(BlogPost.CATEGORY_CHOICES) + 1)
+
+    def test_sidebar_se_invalida_al_borrar(self):
+        self.client.get(reverse('website:blog'))
+        BlogPost.objects.filter(category='eventos').first().delete()
+        response = self.client.get(reverse('website:blog'))
+        self.assertEqual(response.context['total_posts'], 3 * len(BlogPost.CATEGORY_CHOICES) - 1)
+
+
+# ============================================
+# BLOG: PAGINACIÓN POR CURSOR
+# ============================================
+
+@override_settings(BLOG_POSTS_PER_PAGE=5)
+class BlogPaginacionTests(TestCase):
+    """Los listados se recorren por cursor sin saltos ni duplicados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Varios posts con el mismo created_at para probar el desempate por id
+        mismo_momento = timezone.now()
+        BlogPost.objects.bulk_create([
+            BlogPost(
+                title=f'Post {i}', slug=f'post-{i}', excerpt='e', content='c',
+                category='logistica' if i % 2 else 'comercio',
+                created_at=mismo_momento if i < 6 else mismo_momento - timedelta(days=i),
+            )
+            for i in range(23)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def _recorrer(self, url):
+        slugs, next_url = [], url
+        while next_url:
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page']
+            slugs += [post.slug for post in page.items]
+            next_url = f'{url}?page={page.next_cursor}' if page.has_next else None
+        return slugs
+
+    def test_blog_recorre_todos_los_posts(self):
+        slugs = self._recorrer(reverse('website:blog'))
+        self.assertEqual(len(slugs), 23)
+        self.assertEqual(len(set(slugs)), 23)
+
+    def test_categoria_recorre_todos_los_posts(self):
+        slugs = self._recorrer(reverse('website:blog_categoria', kwargs={'categoria': 'logistica'}))
+        self.assertEqual(sorted(slugs), sorted(f'post-{i}' for i in range(23) if i % 2))
+
+    def test_enlace_rel_next(self):
+        response = self.client.get(reverse('website:blog'))
+        page = response.context['page']
+        self.assertContains(response, f'<link rel="next" href="https://www.pacunato.com/blog/?page={page.next_cursor}">')
+        self.assertContains(response, f'href="/blog/?page={page.next_cursor}"')
+
+    def test_consultas_constantes_en_paginas_profundas(self):
+        self.client.get(reverse('website:blog'))
+        response = self.client.get(reverse('website:blog'))
+        cursor = response.context['page'].next_cursor
+        with self.assertNumQueries(2):
+            self.client.get(reverse('website:blog'), {'page': cursor})
+
+    def test_total_de_categoria_cacheado(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = reverse('website:blog_categoria', kwargs={'categoria': 'logistica'})
+        self.assertEqual(self.client.get(url).context['total'], 11)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([q for q in queries.captured_queries if 'COUNT(' in q['sql'].upper()])
+
+        # Guardar un post cambia la versión del blog
+        BlogPost.objects.create(title='Post nuevo', excerpt='e', content='c', category='logistica')
+        self.assertEqual(self.client.get(url).context['total'], 12)
+
+    def test_cursor_invalido_da_404(self):
+        response = self.client.get(reverse('website:blog'), {'page': 'basura'})
+        self.assertEqual(response.status_code, 404)
+
+
+# ============================================
+# SEO: SITEMAP
+# ============================================
+
+class SitemapTests(TestCase):
+    """El sitemap se sirve desde el cache y soporta GET condicional"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            BlogPost.objects.create(title=f'Sitemap {i}', excerpt='e', content='c')
+        BlogPost.objects.create(title='Borrador', excerpt='e', content='c', is_published=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_incluye_posts_publicados(self):
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<loc>https://www.pacunato.com/blog/sitemap-0/</loc>')
+        self.assertNotContains(response, 'borrador')
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_segunda_peticion_sin_consultas(self):
+        self.client.get('/sitemap.xml')
+        with self.assertNumQueries(0):
+            self.client.get('/sitemap.xml')
+
+    def test_304_con_etag(self):
+        etag = self.client.get('/sitemap.xml')['ETag']
+        response = self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_se_regenera_al_guardar_un_post(self):
+        etag = self.client.get('/sitemap.xml')['ETag']
+        BlogPost.objects.create(title='Nuevo en sitemap', excerpt='e', content='c')
+        response = self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'nuevo-en-sitemap')
+
+    @override_settings(SITEMAP_MAX_URLS=10)
+    def test_indice_cuando_supera_el_limite(self):
+        # 13 URLs estáticas + 5 posts = 18 URLs → 2 secciones
+        response = self.client.get('/sitemap.xml')
+        self.assertContains(response, '<sitemapindex')
+        self.assertContains(response, 'https://www.pacunato.com/sitemap-2.xml')
+
+        locs = []
+        for section in (1, 2):
+            xml = self.client.get(f'/sitemap-{section}.xml').content.decode()
+            locs += [line for line in xml.splitlines() if '<loc>' in line]
+        self.assertEqual(len(locs), 18)
+        self.assertEqual(len(set(locs)), 18)
+        self.assertEqual(self.client.get('/sitemap-3.xml').status_code, 404)
+
+
+# ============================================
+# GET CONDICIONAL (ETag)
+# ============================================
+
+class ConditionalGetTests(TestCase):
+    """Las revisitas con If-None-Match reciben 304 sin renderizar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = BlogPost.objects.create(title='Artículo con ETag', excerpt='e', content='c')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pagina_estatica(self):
+        etag = self.client.get(reverse('website:servicios'))['ETag']
+        response = self.client.get(reverse('website:servicios'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_pagina_con_formulario_depende_de_la_cookie_csrf(self):
+        # Sin cookie CSRF no hay ETag: hay que renderizar para emitirla
+        response = self.client.get(reverse('website:home'))
+        self.assertFalse(response.has_header('ETag'))
+
+        etag = self.client.get(reverse('website:home'))['ETag']
+        response = self.client.get(reverse('website:home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.cookies.clear()
+        response = self.client.get(reverse('website:home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_articulo_304_antes_de_renderizar(self):
+        url = reverse('website:blog_post', kwargs={'slug': self.post.slug})
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_articulo_cambia_al_editarlo(self):
+        url = reverse('website:blog_post', kwargs={'slug': self.post.slug})
+        etag = self.client.get(url)['ETag']
+        self.post.excerpt = 'Nuevo extracto'
+        self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_listado_del_blog(self):
+        etag = self.client.get(reverse('website:blog'))['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('website:blog'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+# ============================================
+# CONTADOR DE VISTAS: BUFFER WRITE-BEHIND
+# ============================================
+
+@override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
+class ViewCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = BlogPost.objects.create(title='Contador', excerpt='...', content='<p>Hola</p>')
+
+    def setUp(self):
+        cache.clear()
+        view_counter.reset()
+
+    def test_buffer_no_toca_la_bd(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(view_counter.registrar_vista(self.post.pk, '10.0.0.1', 'Mozilla'))
+            self.assertTrue(view_counter.registrar_vista(self.post.pk, '10.0.0.2', 'Mozilla'))
+            self.assertFalse(view_counter.registrar_vista(self.post.pk, '10.0.0.1', 'Mozilla'))
+        self.assertEqual(view_counter.pendientes(), 2)
+
+    def test_flush_en_bloque(self):
+        for i in range(3):
+            view_counter.registrar_vista(self.post.pk, f'10.0.0.{i}', 'Mozilla')
+        view_counter.registrar_vista(999999, '10.0.0.1', 'Mozilla')  # post borrado
+
+        self.assertEqual(view_counter.flush_vistas(), 3)
+        self.assertEqual(view_counter.pendientes(), 0)
+        self.assertEqual(BlogPostView.objects.filter(post=self.post).count(), 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 3)
+        self.assertEqual(view_counter.flush_vistas(), 0)
+
+    def test_el_cache_no_pierde_eventos(self):
+        # Con el culling de LocMemCache antes se perdían eventos intermedios sin aviso
+        view_counter.registrar_vista(self.post.pk, '10.0.0.1', 'Mozilla')
+        view_counter.registrar_vista(self.post.pk, '10.0.0.2', 'Mozilla')
+        cache.clear()
+        self.assertEqual(view_counter.flush_vistas(), 2)
+
+    def test_otro_worker_no_duplica(self):
+        # Cada worker tiene su buffer y su LocMemCache: la restricción (post, ip, día) deduplica
+        view_counter.registrar_vista(self.post.pk, '10.0.0.1', 'Mozilla')
+        self.assertEqual(view_counter.flush_vistas(), 1)
+
+        cache.clear()
+        view_counter.reset()
+        view_counter.registrar_vista(self.post.pk, '10.0.0.1', 'Mozilla')
+        view_counter.registrar_vista(self.post.pk, '10.0.0.2', 'Mozilla')
+        self.assertEqual(view_counter.flush_vistas(), 1)
+
+        self.assertEqual(BlogPostView.objects.filter(post=self.post).count(), 2)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+        self.assertEqual(VistaDiaria.objects.get(post=self.post).vistas, 2)
+
+    def test_la_bd_rechaza_la_misma_ip_el_mismo_dia(self):
+        from django.db import IntegrityError, transaction
+
+        BlogPostView.objects.create(post=self.post, ip_address='10.0.0.1')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            BlogPostView.objects.create(post=self.post, ip_address='10.0.0.1')
+        ayer = timezone.now() - timedelta(days=1)
+        BlogPostView.objects.create(post=self.post, ip_address='10.0.0.1', viewed_at=ayer, dia=timezone.localdate(ayer))
+
+    def test_error_de_bd_reencola_el_lote(self):
+        view_counter.registrar_vista(self.post.pk, '10.0.0.1', 'Mozilla')
+        with mock.patch.object(view_counter, '_guardar', side_effect=RuntimeError('BD caída')):
+            with self.assertRaises(RuntimeError):
+                view_counter.flush_vistas()
+        self.assertEqual(view_counter.pendientes(), 1)
+        self.assertEqual(view_counter.flush_vistas(), 1)
+
+    def test_flush_vistas_espera_a_los_workers(self):
+        from django.core.management import call_command
+        from .models import WorkerVistas
+
+        view_counter._ciclo()  # primera vuelta del hilo: deja el latido
+        view_counter.registrar_vista(self.post.pk, '10.0.0.1', 'Mozilla')
+
+        # El comando corre en otro proceso: el worker confirma en su próxima vuelta
+        salida = io.StringIO()
+        with mock.patch('website.management.commands.flush_vistas.time') as reloj:
+            reloj.monotonic.return_value = 0
+            reloj.sleep.side_effect = lambda _: view_counter._ciclo()
+            call_command('flush_vistas', timeout=5, stdout=salida)
+        self.assertIn('1 worker(s) volcaron su buffer', salida.getvalue())
+        self.assertEqual(BlogPostView.objects.filter(post=self.post).count(), 1)
+        fila = WorkerVistas.objects.get()
+        self.assertEqual((fila.solicitado, fila.atendido, fila.pendientes), (1, 1, 0))
+
+    def test_flush_vistas_sin_confirmar(self):
+        from django.core.management import CommandError, call_command
+
+        view_counter._ciclo()
+        view_counter.registrar_vista(self.post.pk, '10.0.0.1', 'Mozilla')
+        # La BD falla: el worker no confirma y el comando lo reporta
+        with mock.patch.object(view_counter, '_guardar', side_effect=RuntimeError('BD caída')), \
+                mock.patch('website.management.commands.flush_vistas.time') as reloj, \
+                contextlib.redirect_stdout(io.StringIO()):
+            reloj.monotonic.side_effect = [0, 0, 10]  # una vuelta del worker y se agota el tiempo
+            reloj.sleep.side_effect = lambda _: view_counter._ciclo()
+            with self.assertRaisesMessage(CommandError, '1 pendiente(s)'):
+                call_command('flush_vistas', timeout=5, stdout=io.StringIO())
+
+    @override_settings(VIEW_COUNTER_MAX_PENDING=2)
+    def test_buffer_lleno_descarta_y_avisa(self):
+        for i in range(3):
+            view_counter.registrar_vista(self.post.pk, f'10.0.0.{i}', 'Mozilla')
+        self.assertEqual(view_counter.pendientes(), 2)
+        self.assertEqual(view_counter.descartadas(), 1)
+
+        with contextlib.redirect_stdout(io.StringIO()) as salida:
+            view_counter._flush_seguro()
+        self.assertIn('1 vista(s) descartada(s)', salida.getvalue())
+
+
+# ============================================
+# BEACON DE VISTAS DEL BLOG
+# ============================================
+
+@override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
+class BeaconVistasTests(TestCase):
+    """POST /blog/<slug>/vista/ que llama static/js/blog.js al cargar el artículo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = BlogPost.objects.create(title='Beacon', excerpt='...', content='<p>Hola</p>')
+        cls.borrador = BlogPost.objects.create(title='Borrador', excerpt='...', content='<p>Hola</p>', is_published=False)
+
+    def setUp(self):
+        cache.clear()
+        view_counter.reset()
+        self.client.defaults['HTTP_USER_AGENT'] = NAVEGADOR
+
+    def _url(self, slug):
+        return reverse('website:blog_vista', kwargs={'slug': slug})
+
+    def test_registra_una_vez_por_ip(self):
+        self.assertTrue(self.client.post(self._url(self.post.slug)).json()['success'])
+        self.client.post(self._url(self.post.slug))
+        self.assertEqual(view_counter.pendientes(), 1)
+
+        self.assertEqual(view_counter.flush_vistas(), 1)
+        self.assertEqual(BlogPostView.objects.filter(post=self.post).count(), 1)
+        data = self.client.post(self._url(self.post.slug)).json()
+        self.assertEqual((data['views'], data['unique_visitors']), (1, 1))
+
+    def test_rechaza_get(self):
+        response = self.client.get(self._url(self.post.slug))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(view_counter.pendientes(), 0)
+
+    def test_slug_inexistente_o_borrador(self):
+        for slug in ('no-existe', self.borrador.slug):
+            with self.subTest(slug=slug):
+                self.assertEqual(self.client.post(self._url(slug)).status_code, 404)
+        self.assertEqual(view_counter.pendientes(), 0)
+
+    def test_sin_token_csrf(self):
+        from django.test import Client
+
+        client = Client(enforce_csrf_checks=True, HTTP_USER_AGENT=NAVEGADOR)
+        response = client.post(self._url(self.post.slug))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(view_counter.pendientes(), 1)
+
+
+# ============================================
+# VISTAS ASYNC
+# ============================================
+
+@override_settings(RECAPTCHA_SECRET_KEY='', VIEW_COUNTER_FLUSH_INTERVAL=0)
+class AsyncViewsTests(TestCase):
+    """Los formularios y el tracking corren como vistas async bajo ASGI"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = BlogPost.objects.create(title='Artículo async', excerpt='e', content='c')
+
+    def setUp(self):
+        cache.clear()
+        view_counter.reset()
+
+    async def test_articulo_con_etag(self):
+        url = reverse('website:blog_post', kwargs={'slug': self.post.slug})
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        response = await self.async_client.get(url, headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_beacon(self):
+        url = reverse('website:blog_vista', kwargs={'slug': self.post.slug})
+        data = (await self.async_client.post(url, headers={'user-agent': NAVEGADOR})).json()
+        self.assertEqual((data['views'], data['unique_visitors']), (1, 1))
+
+        # Misma IP: no se suma otra vez (el buffer aún no se volcó)
+        data = (await self.async_client.post(url, headers={'user-agent': NAVEGADOR})).json()
+        self.assertEqual(data['views'], 0)
+
+    async def test_asesoria(self):
+        response = await self.async_client.post(reverse('website:asesoria'), {
+            'nombre': 'Ana', 'email': 'ana@example.com',
+            'telefono': '6000-0000', 'duda': '¿Cómo importo?',
+        })
+        self.assertContains(response, 'Ana')
+        self.assertEqual(await ConsultaAsesoria.objects.acount(), 1)
+        self.assertEqual(await TareaOutbox.objects.filter(tipo=TareaOutbox.TIPO_EMAIL).acount(), 2)
+
+    async def test_plantillas_fuera_del_event_loop(self):
+        import asyncio
+        from . import views
+
+        en_el_loop = []
+
+        def render(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                en_el_loop.append(args[1])
+            except RuntimeError:
+                pass
+            return original(*args, **kwargs)
+
+        original = views.render
+        with mock.patch.object(views, 'render', render):
+            await self.async_client.get(reverse('website:asesoria'))
+            await self.async_client.post(reverse('website:asesoria'), {'nombre': 'Ana'})
+            await self.async_client.get(reverse('website:blog_post', kwargs={'slug': self.post.slug}))
+        self.assertEqual(en_el_loop, [])
+
+    async def test_newsletter_duplicado(self):
+        url = reverse('website:suscribir_newsletter')
+        body = json.dumps({'email': 'lector@example.com'})
+        response = await self.async_client.post(url, data=body, content_type='application/json')
+        self.assertTrue(response.json()['success'])
+
+        response = await self.async_client.post(url, data=body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(await TareaOutbox.objects.filter(tipo=TareaOutbox.TIPO_EMAIL).acount(), 2)
+
+# ============================================
+# FORMULARIOS: OUTBOX
+# ============================================
+
+@override_settings(
+    RECAPTCHA_SECRET_KEY='',
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class OutboxTests(TestCase):
+    """Los formularios encolan sus efectos y el worker los entrega"""
+
+    def setUp(self):
+        smtp.cerrar()
+        self.addCleanup(smtp.cerrar)
+
+    def _asesoria(self):
+        return self.client.post(reverse('website:asesoria'), {
+            'nombre': 'Ana', 'email': 'ana@example.com',
+            'telefono': '6000-0000', 'duda': '¿Cómo importo?',
+        })
+
+    def test_formulario_no_envia_nada_en_el_request(self):
+        response = self._asesoria()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(TareaOutbox.objects.filter(tipo=TareaOutbox.TIPO_EMAIL).count(), 2)
+        self.assertFalse(TareaOutbox.objects.filter(tipo=TareaOutbox.TIPO_SHEETS).exists())
+
+    def test_worker_entrega_y_marca_el_lead(self):
+        self._asesoria()
+        entregadas, fallidas = outbox.procesar()
+        self.assertEqual((entregadas, fallidas), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertTrue(ConsultaAsesoria.objects.get().enviado_make)
+
+    def test_reintento_con_backoff(self):
+        self._asesoria()
+        caido = lambda mensajes: [OSError('smtp caído')] * len(mensajes)
+        with mock.patch.object(smtp, 'enviar_lote', side_effect=caido):
+            self.assertEqual(outbox.procesar(), (0, 2))
+
+        fallida = TareaOutbox.objects.filter(tipo=TareaOutbox.TIPO_EMAIL).first()
+        self.assertEqual(fallida.intentos, 1)
+        self.assertGreater(fallida.proximo_intento, timezone.now())
+        self.assertFalse(ConsultaAsesoria.objects.get().enviado_make)
+
+        # Aún no vencen: el siguiente lote no las toma
+        self.assertEqual(outbox.procesar(), (0, 0))
+
+        TareaOutbox.objects.update(proximo_intento=timezone.now())
+        self.assertEqual(outbox.procesar(), (2, 0))
+        self.assertTrue(ConsultaAsesoria.objects.get().enviado_make)
+
+    def test_newsletter_encola_tareas(self):
+        response = self.client.post(
+            reverse('website:suscribir_newsletter'),
+            data=json.dumps({'email': 'lector@example.com', 'name': 'Luis'}),
+            content_type='application/json',
+        )
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(TareaOutbox.objects.count(), 2)
+        outbox.procesar()
+        self.assertTrue(NewsletterSubscriber.objects.get().sent_to_make)
+
+
+class BackendInestable(locmem.EmailBackend):
+    """Backend de pruebas que pierde la conexión (o rechaza) en los primeros envíos"""
+    caidas = 0
+    rechazos = 0
+    envios = 0
+
+    def send_messages(self, messages):
+        BackendInestable.envios += 1
+        if BackendInestable.caidas:
+            BackendInestable.caidas -= 1
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        if BackendInestable.rechazos:
+            BackendInestable.rechazos -= 1
+            raise smtplib.SMTPRecipientsRefused({'a@example.com': (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='website.tests.BackendInestable')
+class MailSpoolerTests(TestCase):
+    """Una conexión SMTP por proceso, reusada entre lotes"""
+
+    def setUp(self):
+        smtp.cerrar()
+        smtp.reset_estadisticas()
+        BackendInestable.caidas = BackendInestable.rechazos = BackendInestable.envios = 0
+        self.addCleanup(smtp.cerrar)
+
+    def _mensajes(self, n):
+        return [EmailMessage(f'Asunto {i}', 'Cuerpo', to=['a@example.com']) for i in range(n)]
+
+    def test_reusa_la_conexion(self):
+        for _ in range(3):
+            self.assertEqual(smtp.enviar_lote(self._mensajes(2)), [None, None])
+
+        stats = smtp.estadisticas()
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertEqual(stats['conexiones'], 1)
+        self.assertEqual(stats['lotes'], 3)
+        self.assertEqual(stats['mensajes_por_conexion'], 6)
+
+    def test_reconecta_si_se_cae(self):
+        BackendInestable.caidas = 1
+        self.assertEqual(smtp.enviar_lote(self._mensajes(2)), [None, None])
+
+        stats = smtp.estadisticas()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual((stats['conexiones'], stats['reconexiones']), (2, 1))
+
+    def test_un_fallo_no_tumba_el_lote(self):
+        BackendInestable.caidas = 2  # el primer mensaje falla también al reintentar
+        resultados = smtp.enviar_lote(self._mensajes(3))
+
+        self.assertIsInstance(resultados[0], smtplib.SMTPServerDisconnected)
+        self.assertEqual(resultados[1:], [None, None])
+        self.assertEqual(smtp.estadisticas()['errores'], 1)
+
+    def test_rechazo_no_reconecta_ni_reenvia(self):
+        BackendInestable.rechazos = 1
+        resultados = smtp.enviar_lote(self._mensajes(2))
+
+        self.assertIsInstance(resultados[0], smtplib.SMTPRecipientsRefused)
+        self.assertIsNone(resultados[1])
+        stats = smtp.estadisticas()
+        self.assertEqual((stats['conexiones'], stats['reconexiones']), (1, 0))
+        self.assertEqual(BackendInestable.envios, 2)  # el rechazado no se reenvió
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_renueva_conexiones_viejas(self):
+        smtp.enviar_lote(self._mensajes(1))
+        with override_settings(EMAIL_POOL_MAX_AGE=-1):
+            smtp.enviar_lote(self._mensajes(1))
+        self.assertEqual(smtp.estadisticas()['conexiones'], 2)
+
+
+# ============================================
+# RECAPTCHA
+# ============================================
+
+def _respuesta_google(status=200, body=b'{"success": true, "score": 0.9}'):
+    resp = mock.Mock(status=status)
+    resp.read.return_value = body
+    return resp
+
+
+@override_settings(RECAPTCHA_SECRET_KEY='secreto')
+class RecaptchaTests(TestCase):
+    """Conexión persistente, tokens de un solo uso y circuit breaker"""
+
+    def setUp(self):
+        cache.clear()
+        recaptcha.reset()
+        self.addCleanup(recaptcha.reset)
+
+        patcher = mock.patch('http.client.HTTPSConnection')
+        self.HTTPSConnection = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.conn = self.HTTPSConnection.return_value
+        self.conn.getresponse.return_value = _respuesta_google()
+
+    def test_reusa_la_conexion(self):
+        for i in range(3):
+            self.assertEqual(recaptcha.verificar_recaptcha(f'token-{i}'), (True, 0.9))
+        self.assertEqual(self.HTTPSConnection.call_count, 1)
+        self.assertEqual(self.conn.request.call_count, 3)
+
+    def test_reconecta_si_google_cierra_la_conexion(self):
+        self.conn.getresponse.side_effect = [http.client.RemoteDisconnected(), _respuesta_google()]
+        self.assertEqual(recaptcha.verificar_recaptcha('token'), (True, 0.9))
+        self.assertEqual(self.HTTPSConnection.call_count, 2)
+
+    def test_replay_rechazado_sin_consultar(self):
+        recaptcha.verificar_recaptcha('token')
+        self.assertEqual(recaptcha.verificar_recaptcha('token'), (False, 0.0))
+        self.assertEqual(self.conn.request.call_count, 1)
+        self.assertEqual(recaptcha.estadisticas()['replays'], 1)
+
+    def test_breaker_abre_tras_fallos_y_deja_pasar(self):
+        self.conn.getresponse.side_effect = TimeoutError('timed out')
+        for i in range(3):
+            self.assertEqual(recaptcha.verificar_recaptcha(f'token-{i}'), (True, 1.0))
+        self.assertTrue(recaptcha.estadisticas()['breaker_abierto'])
+
+        self.conn.request.reset_mock()
+        self.assertEqual(recaptcha.verificar_recaptcha('token-3'), (True, 1.0))
+        self.conn.request.assert_not_called()
+
+    @override_settings(RECAPTCHA_SLOW_THRESHOLD=-1)
+    def test_respuestas_lentas_abren_el_breaker(self):
+        for i in range(3):
+            recaptcha.verificar_recaptcha(f'token-{i}')
+        stats = recaptcha.estadisticas()
+        self.assertEqual((stats['lentas'], stats['aperturas']), (3, 1))
+
+    @override_settings(RECAPTCHA_BREAKER_COOLDOWN=0)
+    def test_breaker_se_cierra_si_la_prueba_funciona(self):
+        self.conn.getresponse.side_effect = TimeoutError('timed out')
+        for i in range(3):
+            recaptcha.verificar_recaptcha(f'token-{i}')
+
+        self.conn.getresponse.side_effect = None
+        self.assertEqual(recaptcha.verificar_recaptcha('token-ok'), (True, 0.9))
+        self.assertFalse(recaptcha.estadisticas()['breaker_abierto'])
+
+    def test_token_vacio_bloqueado(self):
+        self.assertEqual(recaptcha.verificar_recaptcha(''), (False, 0.0))
+        self.conn.request.assert_not_called()
+
+
+# ============================================
+# GOOGLE SHEETS: CLIENTE CACHEADO
+# ============================================
+
+@mock.patch.dict('os.environ', {
+    'GOOGLE_CREDENTIALS_JSON': '{"client_email": "bot@example.com"}',
+    'GOOGLE_SHEETS_ID': 'https://docs.google.com/spreadsheets/d/abc123/edit',
+})
+class SheetsClientTests(TestCase):
+    """Cada fila cuesta una sola llamada a la API"""
+
+    def setUp(self):
+        from google.auth.exceptions import RefreshError
+        from . import sheets
+
+        self.sheets = sheets
+        self.RefreshError = RefreshError
+        sheets.reset()
+        self.addCleanup(sheets.reset)
+
+        creds = mock.patch.object(sheets.Credentials, 'from_service_account_info')
+        self.from_info = creds.start()
+        self.addCleanup(creds.stop)
+
+        authorize = mock.patch.object(sheets.gspread, 'authorize')
+        self.authorize = authorize.start()
+        self.addCleanup(authorize.stop)
+        self.spreadsheet = self.authorize.return_value.open_by_key.return_value
+
+    def test_reutiliza_cliente_y_worksheets(self):
+        for _ in range(3):
+            self.sheets.append_row('Asesorias', ['a'])
+        self.sheets.append_row('Newsletter', ['b'])
+
+        self.assertEqual(self.from_info.call_count, 1)
+        self.assertEqual(self.authorize.call_count, 1)
+        self.authorize.return_value.open_by_key.assert_called_once_with('abc123')
+        self.assertEqual(
+            [c.args for c in self.spreadsheet.worksheet.call_args_list],
+            [('Asesorias',), ('Newsletter',)],
+        )
+        self.assertEqual(self.spreadsheet.worksheet.return_value.append_row.call_count, 4)
+
+    def test_reconecta_si_expira_la_sesion(self):
+        worksheet = self.spreadsheet.worksheet.return_value
+        worksheet.append_row.side_effect = [self.RefreshError('token'), None]
+
+        self.sheets.append_row('Asesorias', ['a'])
+
+        self.assertEqual(self.authorize.call_count, 2)
+        self.assertEqual(worksheet.append_row.call_count, 2)
+
+    def test_otros_errores_no_reconectan(self):
+        worksheet = self.spreadsheet.worksheet.return_value
+        worksheet.append_row.side_effect = ValueError('fila inválida')
+
+        with self.assertRaises(ValueError):
+            self.sheets.append_row('Asesorias', ['a'])
+        self.assertEqual(self.authorize.call_count, 1)
+
+
+# ============================================
+# GOOGLE SHEETS: RECONCILIADOR
+# ============================================
+
+@mock.patch.dict('os.environ', {
+    'GOOGLE_CREDENTIALS_JSON': '{"client_email": "bot@example.com"}',
+    'GOOGLE_SHEETS_ID': 'abc123',
+})
+class SheetsSyncTests(TestCase):
+    """Los pendientes se suben con un append_rows por tab"""
+
+    def setUp(self):
+        from .models import SolicitudCotizacion
+
+        for i in range(3):
+            ConsultaAsesoria.objects.create(
+                nombre=f'Lead {i}', email=f'lead{i}@example.com', telefono='1', duda='?'
+            )
+        SolicitudCotizacion.objects.create(
+            nombre='Eva', email='eva@example.com', telefono='1', pais_origen='China',
+            pais_destino='Panamá', tipo_servicio='Marítimo', mensaje='...',
+            source_page='landing-importacion',
+        )
+        NewsletterSubscriber.objects.create(email='n@example.com', source_page='blog')
+        NewsletterSubscriber.objects.create(email='g@example.com', source_page='home-lead-magnet')
+
+        patcher = mock.patch('website.sheets.append_rows')
+        self.append_rows = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _llamadas(self):
+        return {c.args[0]: c.args[1] for c in self.append_rows.call_args_list}
+
+    def test_una_llamada_por_tab(self):
+        escritas = sheets_sync.sincronizar()
+
+        self.assertEqual(escritas, {'Asesoria': 3, 'Cotizacion': 1, 'Newsletter': 1, 'Guia': 1})
+        self.assertEqual(self.append_rows.call_count, 4)
+        llamadas = self._llamadas()
+        self.assertEqual([fila[1] for fila in llamadas['Asesoria']], ['Lead 0', 'Lead 1', 'Lead 2'])
+        self.assertEqual(llamadas['Cotizacion'][0][-1], 'Landing Importación')
+        self.assertEqual(llamadas['Guia'][0][1:], ['Cliente', 'g@example.com'])
+        self.assertEqual(sheets_sync.pendientes(), 0)
+
+    def test_idempotente(self):
+        sheets_sync.sincronizar()
+        self.append_rows.reset_mock()
+
+        self.assertEqual(sheets_sync.sincronizar(), {})
+        self.append_rows.assert_not_called()
+
+    def test_lotes(self):
+        sheets_sync.sincronizar(lote=2)
+        asesorias = [c.args[1] for c in self.append_rows.call_args_list if c.args[0] == 'Asesoria']
+        self.assertEqual([len(filas) for filas in asesorias], [2, 1])
+
+    def test_falla_deja_pendientes(self):
+        self.append_rows.side_effect = RuntimeError('cuota excedida')
+        with self.assertRaises(RuntimeError):
+            sheets_sync.sincronizar()
+        self.assertEqual(sheets_sync.pendientes(), 6)
+
+    def test_falla_libera_la_reserva(self):
+        self.append_rows.side_effect = [None, RuntimeError('cuota excedida')]
+        with self.assertRaises(RuntimeError):
+            sheets_sync.sincronizar()
+        self.append_rows.side_effect = None
+        self.append_rows.reset_mock()
+
+        sheets_sync.sincronizar()
+        self.assertEqual(set(self._llamadas()), {'Cotizacion', 'Newsletter', 'Guia'})
+
+    def test_sheets_fuera_de_la_transaccion(self):
+        from django.db import connection
+
+        abiertas = len(connection.atomic_blocks)
+        self.append_rows.side_effect = lambda tab, rows: self.assertEqual(len(connection.atomic_blocks), abiertas)
+        sheets_sync.sincronizar()
+        self.assertEqual(sheets_sync.pendientes(), 0)
+
+    def test_reserva_vigente_no_se_vuelve_a_subir(self):
+        # Sheets aceptó el lote pero el proceso cayó antes de marcarlo
+        ConsultaAsesoria.objects.update(reservado_sheets=timezone.now())
+        sheets_sync.sincronizar()
+        self.assertNotIn('Asesoria', self._llamadas())
+
+        ConsultaAsesoria.objects.update(reservado_sheets=timezone.now() - sheets_sync.RESERVA)
+        sheets_sync.sincronizar()
+        self.assertEqual(len(self._llamadas()['Asesoria']), 3)
+
+    @mock.patch.dict('os.environ', {'GOOGLE_SHEETS_ID': ''})
+    def test_sin_configurar_no_hace_nada(self):
+        self.assertEqual(sheets_sync.sincronizar(), {})
+        self.append_rows.assert_not_called()
+
+
+# ============================================
+# IMÁGENES: PIPELINE DE BUILD
+# ============================================
+
+class BuildImagesTests(SimpleTestCase):
+    """Variantes responsivas, manifest e incrementalidad"""
+
+    def setUp(self):
+        import build_images
+        from PIL import Image
+
+        self.build_images = build_images
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        static_dir = Path(tmp.name)
+        self.source_dir = static_dir / 'images'
+        self.source_dir.mkdir()
+        Image.new('RGB', (2000, 1000), 'navy').save(self.source_dir / 'hero.jpg')
+        Image.new('RGBA', (300, 200), (255, 0, 0, 128)).save(self.source_dir / 'logo.png')
+
+        patcher = mock.patch.multiple(
+            build_images,
+            STATIC_DIR=static_dir,
+            SOURCE_DIR=self.source_dir,
+            OUTPUT_DIR=self.source_dir / 'build',
+            MANIFEST_PATH=self.source_dir / 'build' / 'manifest.json',
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _build(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.build_images.build(jobs=1)
+
+    def test_manifest(self):
+        self.assertEqual(self._build(), (2, 0, 0))
+        manifest = self.build_images.load_manifest()
+
+        hero = manifest['images/hero.jpg']
+        self.assertEqual((hero['width'], hero['height']), (2000, 1000))
+        self.assertEqual([v['width'] for v in hero['variants']['webp']], [480, 960, 1600])
+        self.assertEqual(hero['variants']['webp'][0]['height'], 240)
+
+        # Nunca se amplía una imagen pequeña
+        logo = manifest['images/logo.png']
+        self.assertEqual([v['width'] for v in logo['variants']['webp']], [300])
+        for fmt_variants in logo['variants'].values():
+            for v in fmt_variants:
+                self.assertTrue((self.build_images.STATIC_DIR / v['path']).exists())
+
+    def test_incremental(self):
+        from PIL import Image
+
+        self._build()
+        self.assertEqual(self._build(), (0, 2, 0))
+
+        antes = set((self.source_dir / 'build').iterdir())
+        Image.new('RGB', (2000, 1000), 'white').save(self.source_dir / 'hero.jpg')
+        self.assertEqual(self._build(), (1, 1, 0))
+
+        # Las salidas viejas del hero se borran, las del logo se conservan
+        despues = set((self.source_dir / 'build').iterdir())
+        viejas = antes - despues
+        self.assertTrue(viejas)
+        self.assertTrue(all(p.name.startswith('hero.') for p in viejas))
+
+
+# ============================================
+# IMÁGENES: TAG webp_image
+# ============================================
+
+class WebpImageTagTests(SimpleTestCase):
+    """<picture> con srcset y dimensiones desde el manifest"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        import build_images
+        from PIL import Image
+
+        # static/images/build/ no está en git: se genera un build de prueba
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        static_dir = Path(tmp.name)
+        source_dir = static_dir / 'images'
+        source_dir.mkdir()
+        Image.new('RGB', (736, 946), 'navy').save(source_dir / 'warehouse2.jpg')
+        with mock.patch.multiple(
+            build_images,
+            STATIC_DIR=static_dir,
+            SOURCE_DIR=source_dir,
+            OUTPUT_DIR=source_dir / 'build',
+            MANIFEST_PATH=source_dir / 'build' / 'manifest.json',
+        ), contextlib.redirect_stdout(io.StringIO()):
+            build_images.build(jobs=1)
+
+        ajustes = override_settings(
+            STATICFILES_DIRS=[static_dir],
+            IMAGE_MANIFEST=str(source_dir / 'build' / 'manifest.json'),
+        )
+        ajustes.enable()
+        cls.addClassCleanup(ajustes.disable)
+
+    def setUp(self):
+        from templatetags import image_tags
+
+        self.image_tags = image_tags
+        image_tags._manifest.cache_clear()
+        image_tags._picture.cache_clear()
+        self.addCleanup(image_tags._manifest.cache_clear)
+        self.addCleanup(image_tags._picture.cache_clear)
+
+    def _render(self, args):
+        from django.template import Context, Template
+
+        return Template('{% load image_tags %}{% webp_image ' + args + ' %}').render(Context({'titulo': 'A & B'}))
+
+    def test_variantes_del_manifest(self):
+        html = self._render("'images/warehouse2.jpg' 'carousel-slide' titulo sizes='50vw'")
+        entry = self.image_tags._manifest()['images/warehouse2.jpg']
+
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn(f'{entry["variants"]["webp"][0]["path"]} {entry["variants"]["webp"][0]["width"]}w', html)
+        self.assertIn(f'width="{entry["width"]}" height="{entry["height"]}"', html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('alt="A &amp; B"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('src="/static/images/warehouse2.jpg"', html)
+
+    def test_prioridad(self):
+        html = self._render("'images/warehouse2.jpg' priority=True")
+        self.assertIn('loading="eager" fetchpriority="high"', html)
+
+    def test_imagen_fuera_del_manifest(self):
+        html = self._render("'images/no-existe.jpg' alt='x'")
+        self.assertNotIn('<source', html)
+        self.assertNotIn('width=', html)
+        self.assertIn('src="/static/images/no-existe.jpg"', html)
+
+    def test_variante_faltante(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump({'images/logo.png': {
+                'width': 300, 'height': 100, 'hash': 'x', 'bytes': 1,
+                'variants': {'webp': [{'width': 300, 'height': 100, 'bytes': 1, 'path': 'images/build/borrada.webp'}]},
+            }}, f)
+        self.addCleanup(os.unlink, f.name)
+
+        with override_settings(IMAGE_MANIFEST=f.name):
+            html = self._render("'images/logo.png'")
+        self.assertNotIn('<source', html)
+        self.assertIn('width="300" height="100"', html)
+
+    def test_memoizado(self):
+        for _ in range(3):
+            self._render("'images/warehouse2.jpg'")
+        self.assertEqual(self.image_tags._picture.cache_info().misses, 1)
+
+
+# ============================================
+# BLOG: DERIVADOS DE LA IMAGEN DESTACADA
+# ============================================
+
+class DerivadosImagenTests(TestCase):
+    """Versiones thumb/card/hero de featured_image"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        ajuste = override_settings(MEDIA_ROOT=media.name)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+    def _imagen(self, nombre='foto.jpg', color='red', size=(1600, 900)):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'JPEG')
+        return SimpleUploadedFile(nombre, buffer.getvalue(), content_type='image/jpeg')
+
+    def _post(self, **kwargs):
+        with self.captureOnCommitCallbacks() as callbacks:
+            post = BlogPost.objects.create(title='Con imagen', excerpt='E', content='C', **kwargs)
+        return post, callbacks
+
+    def test_guardar_programa_generacion(self):
+        post, callbacks = self._post(featured_image=self._imagen())
+        self.assertEqual(len(callbacks), 1)
+
+        with mock.patch.object(imagenes, 'programar') as programar:
+            callbacks[0]()
+        programar.assert_called_once_with(post)
+
+    def test_sin_imagen_no_programa(self):
+        _, callbacks = self._post()
+        self.assertEqual(callbacks, [])
+
+    def test_genera_tamanos_con_hash(self):
+        post, _ = self._post(featured_image=self._imagen())
+        self.assertEqual(post.featured_card_url, post.featured_image.url)  # aún sin derivados
+
+        variantes = imagenes.generar(post)
+        post.refresh_from_db()
+
+        self.assertEqual(post.featured_image_variants, variantes)
+        self.assertEqual(variantes['thumb']['width'], 160)
+        self.assertEqual(variantes['card']['height'], 360)
+        self.assertEqual(variantes['hero']['width'], 1280)
+        self.assertRegex(variantes['card']['name'], r'^blog/derivados/foto\.card\.[0-9a-f]{10}\.webp$')
+        self.assertTrue(post.featured_image.storage.exists(variantes['hero']['name']))
+        self.assertTrue(post.featured_thumb_url.endswith('.webp'))
+
+    def test_force_reescribe_derivados(self):
+        from django.core.management import call_command
+        from PIL import Image
+
+        post, _ = self._post(featured_image=self._imagen())
+        variantes = imagenes.generar(post)
+        storage = post.featured_image.storage
+        ruta = storage.path(variantes['card']['name'])
+        Path(ruta).write_bytes(b'corrupto')
+
+        call_command('generar_derivados', stdout=io.StringIO())
+        self.assertEqual(Path(ruta).read_bytes(), b'corrupto')  # sin --force se reusa
+
+        call_command('generar_derivados', force=True, stdout=io.StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.featured_image_variants, variantes)  # mismos nombres
+        with Image.open(ruta) as img:
+            self.assertEqual((img.format, img.width), ('WEBP', 640))
+
+    def test_no_amplia(self):
+        post, _ = self._post(featured_image=self._imagen(size=(400, 200)))
+        variantes = imagenes.generar(post)
+        self.assertEqual((variantes['card']['width'], variantes['hero']['width']), (400, 400))
+
+    def test_cambio_de_imagen_reemplaza_derivados(self):
+        post, _ = self._post(featured_image=self._imagen())
+        anteriores = imagenes.generar(post)
+        storage = post.featured_image.storage
+
+        post.featured_image = self._imagen('otra.jpg', color='blue')
+        with self.captureOnCommitCallbacks() as callbacks:
+            post.save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(post.featured_hero_url, post.featured_image.url)  # los viejos ya no aplican
+
+        nuevas = imagenes.generar(post)
+        self.assertNotEqual(nuevas['hash'], anteriores['hash'])
+        self.assertFalse(storage.exists(anteriores['card']['name']))
+        self.assertTrue(storage.exists(nuevas['card']['name']))
+
+    def test_listado_usa_card(self):
+        post, _ = self._post(featured_image=self._imagen())
+        imagenes.generar(post)
+        post.refresh_from_db()
+
+        response = self.client.get(reverse('website:blog'))
+        self.assertContains(response, post.featured_image.storage.url(post.featured_image_variants['card']['name']))
+
+
+# ============================================
+# BLOG: CONTENIDO COMPILADO
+# ============================================
+
+class ContenidoCompiladoTests(TestCase):
+    """HTML con anchors, TOC y tiempo de lectura calculados al guardar"""
+
+    CONTENIDO = (
+        '<p>Introducción breve.</p>'
+        '<h2>Qué es el <strong>CIF</strong></h2><p>Texto.</p>'
+        '<img src="/media/blog/a.jpg" alt="A">'
+        '<h2 id="propio">Costos &amp; tiempos</h2>'
+        '<h2>Qué es el CIF</h2>'
+    )
+
+    def test_compila_al_guardar(self):
+        post = BlogPost.objects.create(title='Guía', excerpt='E', content=self.CONTENIDO)
+
+        self.assertEqual(post.toc, [
+            {'id': 'que-es-el-cif', 'text': 'Qué es el CIF', 'level': 2},
+            {'id': 'propio', 'text': 'Costos & tiempos', 'level': 2},
+            {'id': 'que-es-el-cif-2', 'text': 'Qué es el CIF', 'level': 2},
+        ])
+        self.assertIn('<h2 id="que-es-el-cif">Qué es el <strong>CIF</strong></h2>', post.content_html)
+        self.assertIn('<h2 id="propio">', post.content_html)
+        self.assertIn('<img src="/media/blog/a.jpg" alt="A" loading="lazy" decoding="async">', post.content_html)
+        self.assertEqual(post.word_count, 13)
+        self.assertEqual(post.read_time, 1)
+
+    def test_marcado_no_html_se_conserva(self):
+        from .contenido import compilar
+
+        for html in (
+            '<?xml version="1.0"?><p>Texto</p>',
+            '<svg><style><![CDATA[.a > b { fill: red }]]></style></svg>',
+            '<![if !IE]><p>Texto</p><![endif]>',
+            '<p>AT&T rocks</p>',
+            '<p>Q&A: &copy 2024 &#169 y &#xA9</p>',
+            '<p>a & b &amp; c &#; &copy;</p>',
+            'Fin &copy',
+        ):
+            with self.subTest(html=html):
+                self.assertEqual(compilar(html)[0], html)
+
+        self.assertEqual(compilar('<h2>AT&T &copy 2024</h2>')[1][0]['text'], 'AT&T © 2024')
+
+    def test_tiempo_de_lectura(self):
+        post = BlogPost.objects.create(title='Largo', excerpt='E', content='<p>' + 'palabra ' * 401 + '</p>')
+        self.assertEqual((post.word_count, post.read_time), (401, 3))
+
+    def test_update_fields(self):
+        post = BlogPost.objects.create(title='Guía', excerpt='E', content='<h2>Uno</h2>')
+
+        post.content = '<h2>Dos</h2>'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.toc[0]['id'], 'dos')
+
+        post.content = '<h2>Tres</h2>'
+        post.save(update_fields=['views'])
+        post.refresh_from_db()
+        self.assertEqual(post.toc[0]['id'], 'dos')
+
+    def test_toc_en_el_html(self):
+        post = BlogPost.objects.create(title='Guía', excerpt='E', content=self.CONTENIDO)
+        response = self.client.get(reverse('website:blog_post', kwargs={'slug': post.slug}))
+
+        self.assertContains(response, '<a href="#que-es-el-cif" class="toc-link active">', html=False)
+        self.assertContains(response, '<a href="#propio" class="toc-link">', html=False)
+        self.assertContains(response, 'id="toc-nav"')
+
+    def test_sin_encabezados_no_hay_toc(self):
+        post = BlogPost.objects.create(title='Corto', excerpt='E', content='<p>Solo texto.</p>')
+        response = self.client.get(reverse('website:blog_post', kwargs={'slug': post.slug}))
+        self.assertNotContains(response, 'id="toc-nav"')
+
+
+# ============================================
+# BLOG: BÚSQUEDA DE TEXTO COMPLETO
+# ============================================
+
+class BusquedaTests(TestCase):
+    """Índice FTS del blog: sincronización, ranking y vistas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.aduana = BlogPost.objects.create(
+            title='Despacho aduanero en Panamá', excerpt='Trámites de aduana',
+            content='<p>Todo sobre el <strong>trámite</strong> del despacho.</p>',
+        )
+        cls.flete = BlogPost.objects.create(
+            title='Fletes marítimos', excerpt='Cómo cotizar un flete',
+            content='<h2>Consolidación</h2><p>La logística de contenedores y el despacho aduanero.</p>',
+        )
+        cls.borrador = BlogPost.objects.create(
+            title='Borrador de logística', excerpt='E', content='<p>Sin publicar</p>', is_published=False,
+        )
+
+    def test_ranking_por_titulo(self):
+        from . import busqueda
+
+        # Ambos mencionan "despacho aduanero"; pesa más el que lo tiene en el título
+        self.assertEqual(busqueda.buscar('despacho aduanero'), [self.aduana.pk, self.flete.pk])
+
+    def test_sin_acentos_y_prefijo(self):
+        from . import busqueda
+
+        self.assertEqual(busqueda.buscar('panama'), [self.aduana.pk])
+        self.assertEqual(busqueda.buscar('consolid'), [self.flete.pk])
+
+    def test_acentos_en_ambos_sentidos(self):
+        from . import busqueda
+
+        # Consulta sin tilde contra texto con tilde, y al revés
+        self.assertEqual(busqueda.buscar('tramite'), [self.aduana.pk])
+        self.assertEqual(busqueda.buscar('logistica contenedores'), [self.flete.pk])
+        sin_tilde = BlogPost.objects.create(title='Logistica sin tildes', excerpt='E', content='<p>Tramite</p>')
+        self.assertEqual(busqueda.buscar('logística tildes'), [sin_tilde.pk])
+        self.assertEqual(busqueda.buscar('Trámite'), [self.aduana.pk, sin_tilde.pk])
+
+    def test_no_indexa_html(self):
+        from . import busqueda
+
+        self.assertEqual(busqueda.buscar('strong'), [])
+
+    def test_publicados(self):
+        from . import busqueda
+
+        self.assertNotIn(self.borrador.pk, busqueda.buscar('logística'))
+        self.assertIn(self.borrador.pk, busqueda.buscar('logística', publicados=False))
+
+    def test_sincroniza_al_guardar_y_borrar(self):
+        from . import busqueda
+
+        self.flete.title = 'Transporte multimodal'
+        self.flete.save()
+        self.assertEqual(busqueda.buscar('multimodal'), [self.flete.pk])
+        self.assertEqual(busqueda.buscar('fletes marítimos'), [])
+
+        self.flete.delete()
+        self.assertEqual(busqueda.buscar('multimodal'), [])
+
+    def test_operadores_ignorados(self):
+        from . import busqueda
+
+        self.assertEqual(busqueda.buscar('"flete" (*'), [self.flete.pk])
+        self.assertEqual(busqueda.buscar('***'), [])
+
+    def test_slug_buscar_reservado(self):
+        from django.core.exceptions import ValidationError
+
+        # /blog/buscar/ es la búsqueda: un artículo con ese slug quedaría inaccesible
+        with self.assertRaises(ValidationError) as error:
+            BlogPost(title='Cómo buscar', slug='buscar', excerpt='E', content='C').full_clean()
+        self.assertIn('slug', error.exception.message_dict)
+
+        # El slug generado desde el título tampoco puede quedarse en "buscar"
+        post = BlogPost.objects.create(title='Buscar', excerpt='E', content='C')
+        self.assertEqual(post.slug, 'buscar-articulo')
+        response = self.client.get(reverse('website:blog_post', kwargs={'slug': 'buscar-articulo'}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_vista(self):
+        response = self.client.get(reverse('website:blog_buscar'), {'q': 'flete'})
+        self.assertContains(response, 'Fletes marítimos')
+        self.assertContains(response, '1 resultado para')
+        self.assertNotContains(response, 'Despacho aduanero en Panamá')
+
+        with self.assertNumQueries(2):
+            self.client.get(reverse('website:blog_buscar'), {'q': 'logística'})
+
+    def test_admin_usa_indice(self):
+        from django.contrib.auth.models import User
+
+        admin_user = User.objects.create_superuser('admin', 'a@example.com', 'x')
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse('admin:website_blogpost_changelist'), {'q': 'logistica'})
+
+        self.assertContains(response, 'Borrador de logística')
+        self.assertContains(response, 'Fletes marítimos')
+        self.assertNotContains(response, 'Despacho aduanero en Panamá')
+
+
+# ============================================
+# BLOG: AUTOCOMPLETADO
+# ============================================
+
+class AutocompletarTests(TestCase):
+    """Sugerencias por prefijo desde el índice en memoria"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.aduana = BlogPost.objects.create(title='Despacho aduanero en Panamá', excerpt='E', content='C')
+        cls.logistica = BlogPost.objects.create(title='Logística para pymes', excerpt='E', content='C')
+        BlogPost.objects.create(title='Logística interna (borrador)', excerpt='E', content='C', is_published=False)
+        cls.tag = BlogTag.objects.create(name='Logística')
+
+    def setUp(self):
+        autocompletar.reset()
+        self.addCleanup(autocompletar.reset)
+        autocompletar.construir()  # En producción lo hace el hilo de iniciar()
+
+    def _textos(self, q):
+        return [r['text'] for r in autocompletar.sugerir(q)]
+
+    def test_prefijo_sin_acentos(self):
+        self.assertEqual(self._textos('logis'), ['Logística', 'Logística para pymes'])
+        self.assertEqual(self._textos('LOGÍS'), ['Logística', 'Logística para pymes'])
+
+    def test_palabras_intermedias(self):
+        self.assertEqual(self._textos('panam'), ['Despacho aduanero en Panamá'])
+        self.assertEqual(self._textos('aduanero en'), ['Despacho aduanero en Panamá'])
+
+    def test_inicio_del_titulo_primero(self):
+        post = BlogPost.objects.create(title='Pymes que importan', excerpt='E', content='C')
+        self.assertEqual(self._textos('pymes'), ['Pymes que importan', 'Logística para pymes'])
+        post.delete()
+
+    def test_urls(self):
+        resultados = {r['type']: r['url'] for r in autocompletar.sugerir('logística')}
+        self.assertEqual(resultados['post'], reverse('website:blog_post', kwargs={'slug': self.logistica.slug}))
+        self.assertEqual(resultados['tag'], reverse('website:blog_buscar') + '?q=Log%C3%ADstica')
+
+    def test_sin_consultas_despues_de_construir(self):
+        with self.assertNumQueries(0):
+            for q in ('d', 'de', 'des', 'desp', 'despa'):
+                autocompletar.sugerir(q)
+
+    def test_un_request_nunca_construye(self):
+        autocompletar.reset()
+        with self.assertNumQueries(0):
+            self.assertEqual(autocompletar.sugerir('desp'), [])
+
+    def test_hilo_reconstruye_si_cambia_la_version(self):
+        from .caching import bump_version
+
+        self.assertFalse(autocompletar.revisar())
+        # Otro proceso guardó un artículo: sin signals aquí, solo la versión en el cache
+        BlogPost.objects.bulk_create([BlogPost(title='Fletes marítimos', slug='fletes', excerpt='E', content='C')])
+        bump_version('autocompletar')
+        self.assertTrue(autocompletar.revisar())
+        self.assertEqual(self._textos('flet'), ['Fletes marítimos'])
+
+    def test_signals_actualizan(self):
+        self.logistica.title = 'Fletes para pymes'
+        self.logistica.save()
+        self.assertEqual(self._textos('logis'), ['Logística'])
+        self.assertEqual(self._textos('flet'), ['Fletes para pymes'])
+
+        self.logistica.is_published = False
+        self.logistica.save()
+        self.assertEqual(self._textos('flet'), [])
+
+        self.tag.delete()
+        self.assertEqual(self._textos('logis'), [])
+
+    def test_vista(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('website:blog_autocompletar'), {'q': 'desp'})
+        self.assertEqual(response.json()['results'][0]['text'], 'Despacho aduanero en Panamá')
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+
+# ============================================
+# BLOG: ARTÍCULOS RELACIONADOS
+# ============================================
+
+class RelacionadosTests(TestCase):
+    """Relacionados precalculados por etiquetas + TF-IDF"""
+
+    @classmethod
+    def setUpTestData(cls):
+        aduanas = BlogTag.objects.create(name='Aduanas')
+        cls.despacho = BlogPost.objects.create(
+            title='Despacho aduanero en Panamá', excerpt='Trámites de aduana',
+            content='<p>El despacho aduanero exige declaración, aranceles y agente de aduana.</p>',
+        )
+        cls.aranceles = BlogPost.objects.create(
+            title='Aranceles y declaración aduanera', excerpt='Cómo calcular aranceles',
+            content='<p>La declaración aduanera y los aranceles definen el costo del despacho.</p>',
+        )
+        cls.ferias = BlogPost.objects.create(
+            title='Ferias comerciales en China', excerpt='Cantón y Yiwu',
+            content='<p>Visitar ferias permite conocer proveedores y fábricas.</p>',
+        )
+        cls.borrador = BlogPost.objects.create(
+            title='Despacho aduanero (borrador)', excerpt='Aranceles', content='<p>Despacho aduanero</p>',
+            is_published=False,
+        )
+        cls.despacho.tags.add(aduanas)
+        cls.aranceles.tags.add(aduanas)
+        relacionados.recalcular()
+
+    def test_ranking(self):
+        filas = list(ArticuloRelacionado.objects.filter(post=self.despacho).values_list('relacionado_id', flat=True))
+        self.assertEqual(filas[0], self.aranceles.pk)
+        self.assertNotIn(self.borrador.pk, filas)
+        self.assertNotIn(self.despacho.pk, filas)
+
+    def test_calcular_tags_pesan(self):
+        posts = [self.despacho, self.aranceles, self.ferias]
+        con_tags = relacionados.calcular(posts, {self.ferias.pk: {1}, self.despacho.pk: {1}})
+        sin_tags = relacionados.calcular(posts, {})
+        score = dict(con_tags[self.despacho.pk]).get(self.ferias.pk, 0)
+        self.assertGreater(score, dict(sin_tags[self.despacho.pk]).get(self.ferias.pk, 0))
+
+    def test_guardar_programa_un_recalculo(self):
+        TareaOutbox.objects.all().delete()
+        self.ferias.title = 'Aranceles en ferias de China'
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.ferias.save()
+            self.ferias.tags.add(BlogTag.objects.get(name='Aduanas'))
+
+        # post_save + m2m_changed: una sola tarea en el outbox y nada corre en el request
+        self.assertEqual(callbacks, [])
+        self.assertEqual(TareaOutbox.objects.filter(tipo=TareaOutbox.TIPO_RELACIONADOS).count(), 1)
+        self.assertFalse(ArticuloRelacionado.objects.filter(post=self.ferias, relacionado=self.aranceles).exists())
+
+        tarea = TareaOutbox.objects.get(tipo=TareaOutbox.TIPO_RELACIONADOS)
+        self.assertEqual(tarea.payload, {'posts': [self.ferias.pk]})
+
+        self.assertEqual(outbox.procesar(), (1, 0))
+        self.assertTrue(ArticuloRelacionado.objects.filter(post=self.ferias, relacionado=self.aranceles).exists())
+
+    def test_tareas_pendientes_se_fusionan(self):
+        TareaOutbox.objects.all().delete()
+        self.ferias.save()
+        self.despacho.save()
+        tarea = TareaOutbox.objects.get(tipo=TareaOutbox.TIPO_RELACIONADOS)
+        self.assertEqual(tarea.payload, {'posts': sorted([self.ferias.pk, self.despacho.pk])})
+
+        relacionados.programar()  # todo el blog absorbe los ids
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.payload, {})
+
+    def test_actualizar_solo_afectados(self):
+        otro = BlogPost.objects.create(title='Contenedores refrigerados', excerpt='Cadena de frío', content='<p>Reefer</p>')
+        self.ferias.title = 'Aranceles y declaración aduanera en ferias'
+        self.ferias.save()
+
+        # Se recalculan ferias y los que ahora la alcanzan; el artículo sin parecidos no se toca
+        with mock.patch.object(relacionados._Indice, 'relacionados', autospec=True,
+                               side_effect=relacionados._Indice.relacionados) as calculados:
+            relacionados.actualizar([self.ferias.pk])
+        recalculados = {llamada.args[1] for llamada in calculados.call_args_list}
+        self.assertIn(self.ferias.pk, recalculados)
+        self.assertNotIn(otro.pk, recalculados)
+        self.assertTrue(ArticuloRelacionado.objects.filter(post=self.ferias, relacionado=self.aranceles).exists())
+        self.assertTrue(ArticuloRelacionado.objects.filter(post=self.aranceles, relacionado=self.ferias).exists())
+
+    def test_borrar_actualiza_a_quienes_lo_tenian(self):
+        TareaOutbox.objects.all().delete()
+        pk = self.aranceles.pk
+        self.aranceles.delete()
+        tarea = TareaOutbox.objects.get(tipo=TareaOutbox.TIPO_RELACIONADOS)
+        self.assertIn(self.despacho.pk, tarea.payload['posts'])
+        self.assertIn(pk, tarea.payload['posts'])
+
+        self.assertEqual(outbox.procesar(), (1, 0))
+        self.assertFalse(ArticuloRelacionado.objects.filter(relacionado_id=pk).exists())
+
+    def test_candidatos_igual_que_todos_contra_todos(self):
+        posts = [self.despacho, self.aranceles, self.ferias]
+        tags = {self.despacho.pk: {1}, self.aranceles.pk: {1}}
+        vectores = relacionados._vectores({p.pk: relacionados._frecuencias(p) for p in posts})
+        indice = relacionados._Indice(vectores, tags)
+        for p in posts:
+            exactos = {q.pk: indice.score(p.pk, q.pk) for q in posts if q.pk != p.pk}
+            esperados = [q for q, score in sorted(exactos.items(), key=lambda x: -x[1]) if score >= relacionados.SCORE_MINIMO]
+            with self.subTest(post=p.title):
+                self.assertEqual([q for q, _ in relacionados.calcular(posts, tags)[p.pk]], esperados)
+
+    def test_vista_una_consulta(self):
+        from asgiref.sync import async_to_sync
+        from django.test import RequestFactory
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .views import blog_post
+
+        request = RequestFactory().get(reverse('website:blog_post', kwargs={'slug': self.despacho.slug}))
+        with CaptureQueriesContext(connection) as queries:
+            response = async_to_sync(blog_post)(request, slug=self.despacho.slug)
+
+        self.assertContains(response, 'Aranceles y declaración aduanera')
+        relacionadas = [q for q in queries.captured_queries if 'website_articulorelacionado' in q['sql']]
+        self.assertEqual(len(relacionadas), 1)
+
+
+# ============================================
+# PRESUPUESTO DE CONSULTAS Y TIEMPO POR VISTA
+# ============================================
+
+@override_settings(RECAPTCHA_SECRET_KEY='', VIEW_COUNTER_FLUSH_INTERVAL=0)
+class PresupuestoConsultasTests(TestCase):
+    """
+    Recorre todas las rutas de website/urls.py y los changelists del admin
+    con volúmenes realistas. Falla si una vista supera su presupuesto de
+    consultas o TIEMPO_MAXIMO: un N+1 nuevo rompe esta prueba.
+    """
+
+    N_POSTS = 2000
+    N_VISTAS = 5000
+    N_LEADS = 1000
+    TIEMPO_MAXIMO = 1.5  # segundos por request (holgado para CI)
+
+    # nombre de la ruta → (método, kwargs, datos, consultas máximas)
+    RUTAS = {
+        'home': ('get', {}, None, 0),
+        'servicios': ('get', {}, None, 0),
+        'nosotros': ('get', {}, None, 0),
+        'contacto': ('get', {}, None, 0),
+        'privacidad': ('get', {}, None, 0),
+        'terminos': ('get', {}, None, 0),
+        'landing_importacion': ('get', {}, None, 0),
+        'landing_china': ('get', {}, None, 0),
+        'asesoria': ('post', {}, {
+            'nombre': 'Ana', 'email': 'ana@example.com', 'telefono': '6000-0000', 'duda': '¿Cómo importo?',
+        }, 5),
+        'cotizacion': ('post', {}, {
+            'nombre': 'Luis', 'email': 'luis@example.com', 'telefono': '6000-0000',
+            'pais_origen': 'China', 'pais_destino': 'Panamá', 'tipo_servicio': 'compras', 'mensaje': 'Hola',
+        }, 5),
+        'solicitar_cotizacion': ('post_json', {}, {'nombre': 'Luis'}, 0),
+        'suscribir_newsletter': ('post_json', {}, {'email': 'nuevo@example.com'}, 8),
+        'blog': ('get', {}, None, 4),
+        'blog_categoria': ('get', {'categoria': 'logistica'}, None, 2),
+        'blog_buscar': ('get', {}, {'q': 'logística'}, 2),
+        'blog_autocompletar': ('get', {}, {'q': 'artic'}, 0),
+        'blog_post': ('get', {'slug': 'articulo-42'}, None, 7),
+        'blog_vista': ('post', {'slug': 'articulo-42'}, None, 2),
+        'sitemap': ('get', {}, None, 2),
+        'sitemap_section': ('get', {'section': 1}, None, 2),
+        'robots': ('get', {}, None, 0),
+    }
+
+    # Changelists del admin: modelo → consultas máximas
+    ADMIN = {
+        'blogpost': 8,
+        'blogtag': 6,
+        'blogpostview': 8,
+        'consultaasesoria': 5,
+        'solicitudcotizacion': 8,
+        'newslettersubscriber': 6,
+        'solicitudguia': 5,
+        'tareaoutbox': 5,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+
+        ahora = timezone.now()
+        tags = BlogTag.objects.bulk_create([BlogTag(name=f'Etiqueta {i}', slug=f'etiqueta-{i}') for i in range(30)])
+        posts = BlogPost.objects.bulk_create([
+            BlogPost(
+                title=f'Artículo {i}', slug=f'articulo-{i}', excerpt='Logística y comercio',
+                content='<h2>Intro</h2><p>Contenido</p>', content_html='<h2 id="intro">Intro</h2><p>Contenido</p>',
+                toc=[{'id': 'intro', 'text': 'Intro', 'level': 2}],
+                category=BlogPost.CATEGORY_CHOICES[i % 4][0], is_featured=(i == 0),
+                created_at=ahora - timedelta(hours=i),
+            )
+            for i in range(cls.N_POSTS)
+        ])
+        BlogPost.tags.through.objects.bulk_create([
+            BlogPost.tags.through(blogpost_id=p.pk, blogtag_id=tags[(i + k) % 30].pk)
+            for i, p in enumerate(posts) for k in range(2)
+        ])
+        BlogPostView.objects.bulk_create([
+            BlogPostView(post_id=posts[i % 50].pk, ip_address=f'10.0.{i // 250}.{i % 250}')
+            for i in range(cls.N_VISTAS)
+        ])
+        resumen_vistas.desde_vistas()
+        ArticuloRelacionado.objects.bulk_create([
+            ArticuloRelacionado(post_id=posts[42].pk, relacionado_id=posts[i].pk, posicion=n, score=0.5)
+            for n, i in enumerate((1, 2, 3, 4))
+        ])
+        ConsultaAsesoria.objects.bulk_create([
+            ConsultaAsesoria(nombre=f'Lead {i}', email=f'lead{i}@example.com', telefono='6000', duda='?')
+            for i in range(cls.N_LEADS)
+        ])
+        SolicitudCotizacion.objects.bulk_create([
+            SolicitudCotizacion(
+                nombre=f'Lead {i}', email=f'cot{i}@example.com', telefono='6000', pais_origen='China',
+                pais_destino='Panamá', tipo_servicio='compras', mensaje='...',
+            )
+            for i in range(cls.N_LEADS)
+        ])
+        NewsletterSubscriber.objects.bulk_create([
+            NewsletterSubscriber(email=f'sub{i}@example.com', source_page='home-lead-magnet' if i % 2 else 'blog')
+            for i in range(cls.N_LEADS)
+        ])
+        TareaOutbox.objects.bulk_create([
+            TareaOutbox(tipo=TareaOutbox.TIPO_EMAIL, payload={'subject': 's', 'body': 'b', 'to': ['x@example.com']})
+            for _ in range(cls.N_LEADS)
+        ])
+        for post in posts:
+            busqueda.indexar(post.pk, post.title, post.excerpt, post.content_html)
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+
+    def setUp(self):
+        cache.clear()
+        view_counter.reset()
+        autocompletar.reset()
+        # Sin User-Agent el beacon descarta la visita como bot y no mide nada
+        self.client.defaults['HTTP_USER_AGENT'] = NAVEGADOR
+
+    def _medir(self, metodo, url, datos=None):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            inicio = time.perf_counter()
+            if metodo == 'post_json':
+                response = self.client.post(url, data=json.dumps(datos), content_type='application/json')
+            else:
+                response = getattr(self.client, metodo)(url, datos or {})
+            duracion = time.perf_counter() - inicio
+        return response, len(queries), duracion, queries
+
+    def _verificar(self, nombre, response, consultas, duracion, queries, presupuesto):
+        self.assertLess(response.status_code, 400, nombre)
+        self.assertLessEqual(
+            consultas, presupuesto,
+            f'{nombre}: {consultas} consultas (presupuesto {presupuesto})\n'
+            + '\n'.join(q['sql'][:200] for q in queries.captured_queries),
+        )
+        self.assertLess(duracion, self.TIEMPO_MAXIMO, f'{nombre}: {duracion * 1000:.0f} ms')
+
+    def test_todas_las_rutas_tienen_presupuesto(self):
+        from django.contrib import admin
+        from .urls import urlpatterns
+
+        self.assertEqual({p.name for p in urlpatterns}, set(self.RUTAS))
+        self.assertEqual(
+            {m._meta.model_name for m in admin.site._registry if m._meta.app_label == 'website'},
+            set(self.ADMIN),
+        )
+
+    def test_rutas(self):
+        for nombre, (metodo, kwargs, datos, presupuesto) in self.RUTAS.items():
+            with self.subTest(ruta=nombre):
+                cache.clear()
+                url = reverse(f'website:{nombre}', kwargs=kwargs)
+                self._verificar(nombre, *self._medir(metodo, url, datos), presupuesto)
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.admin_user)
+        for nombre, presupuesto in self.ADMIN.items():
+            with self.subTest(modelo=nombre):
+                url = reverse(f'admin:website_{nombre}_changelist')
+                self._verificar(nombre, *self._medir('get', url), presupuesto)
+
+    def test_admin_columnas_anotadas(self):
+        self.client.force_login(self.admin_user)
+
+        response = self.client.get(reverse('admin:website_blogpost_changelist'), {'o': '-6'})
+        # Estimación HyperLogLog de 100 IPs distintas
+        unicas = response.context['cl'].result_list[0].unique_views_count
+        self.assertAlmostEqual(unicas, 100, delta=3)
+        self.assertContains(response, f'{unicas} únicas')
+
+        response = self.client.get(reverse('admin:website_blogtag_changelist'), {'o': '-3'})
+        self.assertContains(response, f'{2 * self.N_POSTS // 30 + 1} post(s)')
+
+
+# ============================================
+# EXPORTACIÓN DE LEADS
+# ============================================
+
+class ExportarLeadsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        SolicitudCotizacion.objects.create(
+            nombre='Ana', empresa='=HYPERLINK("http://x")', email='ana@example.com',
+            telefono='+51 999 888 777', pais_origen='China', pais_destino='Perú',
+            tipo_servicio='Marítimo', mensaje='Contenedor\x0b de 40 pies', procesado=True,
+        )
+        ConsultaAsesoria.objects.create(nombre='Luis', email='luis@example.com', telefono='123', duda='¿Aranceles?')
+        NewsletterSubscriber.objects.create(email='n@example.com', name='Nora', source_page='blog')
+        NewsletterSubscriber.objects.create(email='g@example.com', source_page='home-lead-magnet')
+
+    def _exportar(self, modelo, accion):
+        self.client.force_login(self.admin_user)
+        ids = modelo.objects.values_list('pk', flat=True)
+        return self.client.post(
+            reverse(f'admin:website_{modelo._meta.model_name}_changelist'),
+            {'action': accion, '_selected_action': list(ids)},
+        )
+
+    def test_csv_en_streaming(self):
+        import csv
+
+        response = self._exportar(SolicitudCotizacion, 'exportar_csv')
+        self.assertTrue(response.streaming)
+        self.assertIn('cotizaciones_', response['Content-Disposition'])
+
+        contenido = b''.join(response.streaming_content).decode('utf-8-sig')
+        encabezados, fila = list(csv.reader(io.StringIO(contenido)))
+        self.assertEqual(encabezados[0], 'Fecha')
+        datos = dict(zip(encabezados, fila))
+        self.assertEqual(datos['Empresa'], '\'=HYPERLINK("http://x")')  # no se evalúa como fórmula
+        self.assertEqual(datos['Teléfono'], '+51 999 888 777')
+        self.assertEqual(datos['Procesado'], 'Sí')
+
+    def test_xlsx_valido(self):
+        import zipfile
+        from xml.etree import ElementTree
+
+        response = self._exportar(ConsultaAsesoria, 'exportar_xlsx')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], exportar.TIPOS['xlsx'])
+
+        libro = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(libro.testzip())
+        ns = {'m': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        hoja = ElementTree.fromstring(libro.read('xl/worksheets/sheet1.xml'))
+        filas = [
+            [''.join(t.text or '' for t in c.iter(f'{{{ns["m"]}}}t')) for c in fila.findall('m:c', ns)]
+            for fila in hoja.find('m:sheetData', ns).findall('m:row', ns)
+        ]
+        self.assertEqual(filas[0][:3], ['Fecha', 'Nombre', 'Email'])
+        self.assertEqual(filas[1][1:5], ['Luis', 'luis@example.com', '123', '¿Aranceles?'])
+
+    def test_xlsx_quita_caracteres_de_control(self):
+        import zipfile
+        from xml.etree import ElementTree
+
+        response = self._exportar(SolicitudCotizacion, 'exportar_xlsx')
+        libro = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        hoja = libro.read('xl/worksheets/sheet1.xml').decode()
+        ElementTree.fromstring(hoja)
+        self.assertIn('Contenedor de 40 pies', hoja)
+
+    def test_solicitudes_guia_respeta_el_filtro_del_admin(self):
+        from .models import SolicitudGuia
+
+        response = self._exportar(SolicitudGuia, 'exportar_csv')
+        contenido = b''.join(response.streaming_content).decode('utf-8-sig')
+        self.assertIn('g@example.com', contenido)
+        self.assertNotIn('n@example.com', contenido)
+
+    def test_memoria_constante(self):
+        """Los bloques salen a medida que se leen las filas, no al final."""
+        leidas = []
+
+        def filas():
+            for i in range(10):
+                leidas.append(i)
+                yield (f'lead{i}@example.com', i)
+
+        for escribir in (exportar.filas_csv, exportar.filas_xlsx):
+            leidas.clear()
+            with self.subTest(formato=escribir.__name__), mock.patch.object(exportar, 'CHUNK', 3):
+                bloques = escribir(['Email', 'N'], filas())
+                next(bloques)
+                self.assertLess(len(leidas), 10)
+                resto = list(bloques)
+                self.assertEqual(len(leidas), 10)
+                self.assertGreaterEqual(len(resto), 3)
+
+    def test_asgi_consume_el_generador_en_bloques(self):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncRequestFactory
+
+        request = AsyncRequestFactory().get('/admin/')
+        response = exportar.respuesta(request, ConsultaAsesoria.objects.all(), [('Email', 'email')], 'consultas')
+        self.assertTrue(response.is_async)
+
+        async def leer():
+            return b''.join([bloque async for bloque in response.streaming_content])
+
+        self.assertIn(b'luis@example.com', async_to_sync(leer)())
+
+    def test_todos_los_leads_se_exportan(self):
+        from django.contrib import admin
+        from django.test import RequestFactory
+        from .models import SolicitudGuia
+
+        request = RequestFactory().get('/admin/')
+        request.user = self.admin_user
+        for modelo in (ConsultaAsesoria, SolicitudCotizacion, NewsletterSubscriber, SolicitudGuia):
+            with self.subTest(modelo=modelo.__name__):
+                acciones = admin.site._registry[modelo].get_actions(request)
+                self.assertIn('exportar_csv', acciones)
+                self.assertIn('exportar_xlsx', acciones)
+
+
+# ============================================
+# RESUMEN DE VISTAS (AGREGADOS DIARIOS + HYPERLOGLOG)
+# ============================================
+
+@override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
+class ResumenVistasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = BlogPost.objects.create(title='Vistas', excerpt='...', content='<p>Hola</p>')
+
+    def setUp(self):
+        cache.clear()
+        view_counter.reset()
+
+    def test_hll_error_acotado(self):
+        for n in (10, 1000, 50000):
+            with self.subTest(n=n):
+                sketch = hll.HyperLogLog()
+                for i in range(n):
+                    sketch.agregar(f'10.{i // 65536}.{i // 256 % 256}.{i % 256}')
+                self.assertAlmostEqual(sketch.estimar(), n, delta=max(1, n * 0.05))
+
+    def test_hll_union_y_serializacion(self):
+        lunes, martes = hll.HyperLogLog(), hll.HyperLogLog()
+        for i in range(300):
+            lunes.agregar(f'ip{i}')
+        for i in range(200, 500):
+            martes.agregar(f'ip{i}')
+        union = hll.HyperLogLog.desde_bytes(lunes.a_bytes()).unir(martes)
+        self.assertAlmostEqual(union.estimar(), 500, delta=15)
+        self.assertLess(len(hll.HyperLogLog().a_bytes()), 100)
+
+    def test_flush_suma_agregados_diarios(self):
+        from .models import ResumenVistas, VistaDiaria
+        from .view_counter import flush_vistas, registrar_vista
+
+        ayer = timezone.now() - timedelta(days=1)
+        resumen_vistas.registrar([(self.post.pk, '10.0.0.1', ayer), (self.post.pk, '10.0.0.2', ayer)])
+        registrar_vista(self.post.pk, '10.0.0.1', 'Mozilla')
+        registrar_vista(self.post.pk, '10.0.0.3', 'Mozilla')
+        self.assertEqual(flush_vistas(), 2)
+
+        dias = {d.fecha: d for d in VistaDiaria.objects.filter(post=self.post)}
+        self.assertEqual(dias[timezone.localdate()].vistas, 2)
+        self.assertEqual(dias[timezone.localdate(ayer)].visitantes, 2)
+        # 10.0.0.1 volvió hoy: 3 visitantes únicos en total
+        self.assertEqual(ResumenVistas.objects.get(post=self.post).visitantes, 3)
+        self.assertEqual(resumen_vistas.visitantes_periodo(self.post.pk, timezone.localdate()), 2)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+
+    def test_purga_respeta_la_ventana(self):
+        from .models import ResumenVistas
+
+        viejas = timezone.now() - timedelta(days=45)
+        BlogPostView.objects.create(post=self.post, ip_address='10.0.0.1', viewed_at=viejas)
+        BlogPostView.objects.create(post=self.post, ip_address='10.0.0.2')
+        resumen_vistas.desde_vistas()
+
+        with override_settings(VIEW_COUNTER_RETENTION_DAYS=30):
+            self.assertEqual(resumen_vistas.purgar(), 1)
+        self.assertEqual(BlogPostView.objects.count(), 1)
+        self.assertEqual(ResumenVistas.objects.get(post=self.post).visitantes, 2)
+
+
+# ============================================
+# FILTRO DE BOTS DEL CONTADOR DE VISTAS
+# ============================================
+
+class BotsTests(TestCase):
+
+    BOTS = [
+        'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+        'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; bingbot/2.0) Chrome/116.0 Safari/537.36',
+        'facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)',
+        'Mozilla/5.0 (compatible; UptimeRobot/2.0; http://www.uptimerobot.com/)',
+        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) HeadlessChrome/124.0 Safari/537.36',
+        'python-requests/2.32.3',
+        'curl/8.5.0',
+        '',
+    ]
+    NAVEGADORES = [
+        NAVEGADOR,
+        'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+        'Version/17.4 Mobile/15E148 Safari/604.1',
+        'Mozilla/5.0 (Linux; Android 9; CUBOT X19) AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/90.0 Mobile Safari/537.36',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = BlogPost.objects.create(title='Bots', excerpt='...', content='<p>Hola</p>')
+
+    def setUp(self):
+        cache.clear()
+        view_counter.reset()
+
+    def test_user_agents(self):
+        for ua in self.BOTS:
+            with self.subTest(ua=ua):
+                self.assertTrue(bots.es_user_agent_bot(ua))
+        for ua in self.NAVEGADORES:
+            with self.subTest(ua=ua):
+                self.assertFalse(bots.es_user_agent_bot(ua))
+
+    def test_rangos_ip(self):
+        self.assertTrue(bots.es_ip_bot('66.249.66.1'))
+        self.assertTrue(bots.es_ip_bot('2001:4860:4801::5'))
+        self.assertFalse(bots.es_ip_bot('190.113.4.20'))
+        self.assertFalse(bots.es_ip_bot('no-es-ip'))
+        # Un crawler con User-Agent de navegador se descarta por IP
+        self.assertTrue(bots.es_bot(NAVEGADOR, '66.249.66.1'))
+
+    @override_settings(BOT_USER_AGENTS=['MiMonitor'], BOT_IP_RANGES=['203.0.113.0/24'])
+    def test_firmas_de_settings(self):
+        bots.recargar()
+        self.addCleanup(bots.recargar)
+        self.assertTrue(bots.es_user_agent_bot('MiMonitor/1.0'))
+        self.assertTrue(bots.es_ip_bot('203.0.113.9'))
+
+    def test_beacon_no_toca_la_bd(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .view_counter import pendientes
+
+        url = reverse('website:blog_vista', kwargs={'slug': self.post.slug})
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.post(url, headers={'user-agent': self.BOTS[0]}).json()
+        self.assertEqual(len(queries), 0)
+        self.assertFalse(data['tracked'])
+        self.assertEqual(pendientes(), 0)
+
+    def test_microsegundos_por_request(self):
+        muestra = [(ua, '190.113.4.20') for ua in self.BOTS + self.NAVEGADORES]
+        bots.es_bot(*muestra[0])
+        n = 2000
+        inicio = time.perf_counter()
+        for _ in range(n):
+            for ua, ip in muestra:
+                bots.es_bot(ua, ip)
+        por_request = (time.perf_counter() - inicio) / (n * len(muestra))
+        # Holgado para máquinas de CI lentas; en local son ~5 µs
+        self.assertLess(por_request, 50e-6)
+
+
+# ============================================
+# FRAGMENTOS CACHEADOS DE LAS PLANTILLAS
+# ============================================
+
+class FragmentosCacheTests(TestCase):
+
+    # Nada que dependa del request puede quedar dentro de un {% cache %}
+    PROHIBIDO = ('csrf_token', 'include', 'block', 'request', 'messages', 'user', 'perms')
+
+    def setUp(self):
+        from django.core.cache import caches
+
+        caches['fragmentos'].clear()
+        self.addCleanup(caches['fragmentos'].clear)
+
+    def test_fragmentos_sin_datos_del_request(self):
+        import re
+        from django.conf import settings
+
+        fragmento = re.compile(r'\{% cache .*?%\}(.*?)\{% endcache %\}', re.DOTALL)
+        etiqueta = re.compile(r'\{\{.*?\}\}|\{%.*?%\}', re.DOTALL)
+        for directorio in settings.TEMPLATES[0]['DIRS'] + [Path(__file__).parent / 'templates']:
+            for path in Path(directorio).rglob('*.html'):
+                for contenido in fragmento.findall(path.read_text(encoding='utf-8')):
+                    etiquetas = ' '.join(etiqueta.findall(contenido))
+                    for prohibido in self.PROHIBIDO:
+                        with self.subTest(plantilla=path.name, prohibido=prohibido):
+                            self.assertNotIn(prohibido, etiquetas)
+
+    def test_csrf_fuera_del_cache(self):
+        import re
+
+        tokens = []
+        for _ in range(2):
+            response = self.client.get(reverse('website:home'))
+            self.assertContains(response, 'class="navbar"')
+            tokens.append(re.findall(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()))
+        self.assertTrue(tokens[0])
+        # Cada render enmascara el token de nuevo: si viniera del cache se repetiría
+        self.assertFalse(set(tokens[0]) & set(tokens[1]))
+
+    def test_se_renderiza_desde_el_cache(self):
+        from django.core.cache import caches
+
+        self.client.get(reverse('website:servicios'))
+        guardados = len(caches['fragmentos']._cache)
+        self.assertGreaterEqual(guardados, 5)  # head, schema, navbar, footer y el cuerpo
+
+        self.client.get(reverse('website:servicios'))
+        self.assertEqual(len(caches['fragmentos']._cache), guardados)
+
+    def test_deploy_invalida(self):
+        from django.core.cache import caches
+
+        with mock.patch('website.context_processors.deploy_fingerprint', return_value='deploy-a'):
+            self.client.get(reverse('website:privacidad'))
+        antes = len(caches['fragmentos']._cache)
+        with mock.patch('website.context_processors.deploy_fingerprint', return_value='deploy-b'):
+            self.client.get(reverse('website:privacidad'))
+        self.assertEqual(len(caches['fragmentos']._cache), 2 * antes)
@@ -13,7 +13,10 @@ urlpatterns = [
     # Blog Routes
     path('blog/', views.blog, name='blog'),
     path('blog/categoria/<str:categoria>/', views.blog_categoria, name='blog_categoria'),
+    path('blog/buscar/', views.blog_buscar, name='blog_buscar'),  # antes del slug; reservado en BlogPost (SLUGS_RESERVADOS)
+    path('blog/buscar/sugerencias/', views.blog_autocompletar, name='blog_autocompletar'),
     path('blog/<slug:slug>/', views.blog_post, name='blog_post'),
+    path('blog/<slug:slug>/vista/', views.blog_vista, name='blog_vista'),
     
     # Páginas legales
     path('privacidad/', views.privacidad, name='privacidad'),
@@ -32,5 +35,6 @@ urlpatterns = [
 
     # SEO: Sitemap y Robots
     path('sitemap.xml', views.sitemap_xml, name='sitemap'),
+    path('sitemap-<int:section>.xml', views.sitemap_xml, name='sitemap_section'),
     path('robots.txt', views.robots_txt, name='robots'),
 ]
\ No newline at end of file
@@ -0,0 +1,334 @@
+"""
+Contador de vistas write-behind para los artículos del blog.
+
+Cada vista se acumula en la memoria del proceso (sin tocar la base de datos)
+y un hilo en segundo plano vuelca el buffer en bloque cada
+VIEW_COUNTER_FLUSH_INTERVAL segundos, antes si junta BATCH_SIZE eventos y una
+última vez al terminar el proceso:
+
+  - BlogPostView (registro crudo) se inserta con un solo bulk_create por lote;
+    su restricción única (post, ip, día) descarta lo que otro worker ya guardó
+  - Los agregados diarios y los visitantes únicos (HyperLogLog) se suman con
+    resumen_vistas.registrar()
+  - BlogPost.views se incrementa con UPDATE ... SET views = views + N, solo
+    con las vistas nuevas: cuenta una vista por IP y día
+
+Cada worker vuelca su propio buffer, así que el culling del cache no puede
+perder eventos. Si la base de datos falla, el lote vuelve al buffer; si el
+buffer llega a VIEW_COUNTER_MAX_PENDING eventos las vistas nuevas se
+descartan, se cuentan en `descartadas()` y se avisa en el log.
+
+El cache (VIEW_COUNTER_CACHE) y el buffer solo filtran recargas dentro del
+worker; la garantía de una vista por IP y día la da la base de datos. El mismo
+hilo purga una vez por hora el registro crudo antiguo.
+
+Forzar un volcado: `python manage.py flush_vistas`. Otro proceso (o otra
+instancia) no alcanza la memoria de los workers, así que la orden viaja por
+la base de datos: en cada vuelta el hilo deja su latido en WorkerVistas y, si
+el comando subió `solicitado`, vuelca y lo confirma en `atendido`.
+"""
+import atexit
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+KEY_PREFIX = 'vistas'
+BATCH_SIZE = 500
+PURGAR_CADA = 60 * 60
+
+# {(post_id, ip, dia): (user_agent, fecha)} pendientes de volcar
+_buffer = {}
+_buffer_lock = threading.Lock()
+_descartadas = 0
+_avisadas = 0
+_despertar = threading.Event()
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, 'VIEW_COUNTER_CACHE', 'default')]
+
+
+def _max_pendientes():
+    return getattr(settings, 'VIEW_COUNTER_MAX_PENDING', 10000)
+
+
+def registrar_vista(post_id, ip_address, user_agent=''):
+    """
+    Registra una vista en el buffer. No toca la base de datos.
+    Retorna True si la vista (post, ip, día) es nueva para el buffer.
+    """
+    global _descartadas
+    if not ip_address:
+        return False
+
+    fecha = timezone.now()
+    dia = timezone.localdate(fecha)
+    ttl = getattr(settings, 'VIEW_COUNTER_DEDUP_TTL', 60 * 60 * 24)
+    # Filtro de recargas; si la clave se pierde, el buffer y la BD deduplican igual
+    if not _cache().add(f'{KEY_PREFIX}:visto:{post_id}:{ip_address}:{dia.isoformat()}', 1, timeout=ttl):
+        return False
+
+    with _buffer_lock:
+        clave = (post_id, ip_address, dia)
+        if clave in _buffer:
+            return False
+        if len(_buffer) >= _max_pendientes():
+            _descartadas += 1
+            return False
+        _buffer[clave] = ((user_agent or '')[:500], fecha)
+        lleno = len(_buffer) >= BATCH_SIZE
+
+    _ensure_flusher()
+    if lleno:
+        _despertar.set()
+    return True
+
+
+def pendientes():
+    """Número de eventos en el buffer de este proceso que aún no se han volcado."""
+    return len(_buffer)
+
+
+def descartadas():
+    """Vistas descartadas en este proceso porque el buffer estaba lleno."""
+    return _descartadas
+
+
+def reset():
+    """Vacía el buffer sin guardarlo y pone a cero las descartadas (tests)."""
+    global _descartadas, _avisadas
+    with _buffer_lock:
+        _buffer.clear()
+        _descartadas = _avisadas = 0
+
+
+def _devolver(eventos):
+    """Reencola un lote que no se pudo guardar, sin pasar de VIEW_COUNTER_MAX_PENDING."""
+    global _descartadas
+    with _buffer_lock:
+        for clave, valor in eventos.items():
+            if clave in _buffer:
+                continue
+            if len(_buffer) >= _max_pendientes():
+                _descartadas += 1
+                continue
+            _buffer[clave] = valor
+
+
+def flush_vistas():
+    """
+    Vuelca el buffer de este proceso a la base de datos.
+    Retorna el número de vistas que se registraron.
+    """
+    from .models import BlogPost, BlogPostView
+
+    global _buffer
+    with _buffer_lock:
+        eventos, _buffer = _buffer, {}
+    if not eventos:
+        return 0
+
+    # Agrupar por post → {(ip, dia): (user_agent, fecha)}
+    por_post = defaultdict(dict)
+    for (post_id, ip, dia), valor in eventos.items():
+        por_post[post_id][(ip, dia)] = valor
+
+    try:
+        return _guardar(BlogPost, BlogPostView, por_post)
+    except Exception:
+        _devolver(eventos)
+        raise
+
+
+def _existentes(BlogPostView, post_ids, por_post):
+    """Claves (post_id, ip, dia) del lote que otro worker ya guardó."""
+    ips = sorted({ip for post_id in post_ids for ip, _ in por_post[post_id]})
+    dias = {dia for post_id in post_ids for _, dia in por_post[post_id]}
+    existentes = set()
+    for i in range(0, len(ips), BATCH_SIZE):
+        existentes.update(
+            BlogPostView.objects.filter(
+                post_id__in=post_ids, ip_address__in=ips[i:i + BATCH_SIZE], dia__in=dias
+            ).values_list('post_id', 'ip_address', 'dia')
+        )
+    return existentes
+
+
+def _guardar(BlogPost, BlogPostView, por_post):
+    """Inserta las vistas nuevas, suma los agregados y actualiza los contadores en bloque."""
+    from .resumen_vistas import registrar
+
+    with transaction.atomic():
+        # Bloquear los artículos serializa los volcados de varios workers sobre los mismos posts
+        post_ids = list(
+            BlogPost.objects.select_for_update().filter(pk__in=por_post.keys())
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        if not post_ids:
+            return 0
+        existentes = _existentes(BlogPostView, post_ids, por_post)
+        filas = [
+            BlogPostView(post_id=post_id, ip_address=ip, dia=dia, user_agent=ua, viewed_at=fecha)
+            for post_id in post_ids
+            for (ip, dia), (ua, fecha) in por_post[post_id].items()
+            if (post_id, ip, dia) not in existentes
+        ]
+        if not filas:
+            return 0
+
+        # Un UPDATE por cada cantidad distinta, no uno por post
+        nuevas = defaultdict(int)
+        for f in filas:
+            nuevas[f.post_id] += 1
+        por_cantidad = defaultdict(list)
+        for post_id, n in nuevas.items():
+            por_cantidad[n].append(post_id)
+
+        # ignore_conflicts: la restricción única es la última palabra si algo se coló
+        BlogPostView.objects.bulk_create(filas, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        registrar((f.post_id, f.ip_address, f.viewed_at) for f in filas)
+        for n, ids in por_cantidad.items():
+            BlogPost.objects.filter(pk__in=ids).update(views=F('views') + n)
+
+    return len(filas)
+
+
+def _flush_seguro():
+    """Vuelca y avisa en el log. Retorna False si la base de datos falló."""
+    global _avisadas
+    ok = True
+    try:
+        nuevas = flush_vistas()
+        if nuevas:
+            print(f"✅ Contador de vistas: {nuevas} vista(s) nueva(s) guardada(s)")
+    except Exception as e:
+        ok = False
+        print(f"⚠️ Error al volcar contador de vistas ({pendientes()} en buffer): {str(e)}")
+    finally:
+        close_old_connections()
+
+    with _buffer_lock:
+        perdidas, _avisadas = _descartadas - _avisadas, _descartadas
+    if perdidas:
+        print(f"⚠️ Contador de vistas: {perdidas} vista(s) descartada(s) con el buffer lleno")
+    return ok
+
+
+# ============================================
+# VOLCADO FORZADO (python manage.py flush_vistas)
+# ============================================
+
+def _intervalo():
+    return getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 30)
+
+
+def _nombre_worker():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _ciclo():
+    """Una vuelta del hilo: vuelca el buffer, deja el latido y confirma el volcado pedido."""
+    from .models import WorkerVistas
+
+    try:
+        fila, _ = WorkerVistas.objects.get_or_create(nombre=_nombre_worker())
+        solicitado = fila.solicitado  # leído antes de volcar: lo pedido hasta aquí queda cubierto
+    except Exception as e:
+        print(f"⚠️ Contador de vistas: no se pudo leer WorkerVistas: {str(e)}")
+        solicitado = None
+
+    volcado = _flush_seguro()
+
+    if solicitado is None:
+        return
+    cambios = {'latido': timezone.now(), 'pendientes': pendientes()}
+    if volcado:
+        cambios['atendido'] = solicitado
+    try:
+        WorkerVistas.objects.filter(nombre=fila.nombre).update(**cambios)
+    except Exception as e:
+        print(f"⚠️ Contador de vistas: no se pudo guardar el latido: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def solicitar_volcado():
+    """
+    Pide a los workers vivos (latido en las últimas 3 vueltas) que vuelquen
+    su buffer. Retorna {worker: solicitud que debe confirmar}.
+    """
+    from .models import WorkerVistas
+
+    ahora = timezone.now()
+    WorkerVistas.objects.filter(latido__lt=ahora - timedelta(days=1)).delete()
+    vivos = WorkerVistas.objects.filter(latido__gte=ahora - timedelta(seconds=3 * max(_intervalo(), 1)))
+    nombres = list(vivos.values_list('nombre', flat=True))
+    WorkerVistas.objects.filter(nombre__in=nombres).update(solicitado=F('solicitado') + 1)
+    return dict(WorkerVistas.objects.filter(nombre__in=nombres).values_list('nombre', 'solicitado'))
+
+
+def sin_confirmar(solicitudes):
+    """{worker: vistas pendientes} de los que aún no confirmaron su solicitud."""
+    from .models import WorkerVistas
+
+    return {
+        nombre: pendientes
+        for nombre, atendido, pendientes in WorkerVistas.objects.filter(
+            nombre__in=solicitudes
+        ).values_list('nombre', 'atendido', 'pendientes')
+        if atendido < solicitudes[nombre]
+    }
+
+
+def _purgar_seguro():
+    from .resumen_vistas import purgar
+
+    try:
+        borradas = purgar()
+        if borradas:
+            print(f"🧹 Contador de vistas: {borradas} vista(s) antigua(s) purgada(s)")
+    except Exception as e:
+        print(f"⚠️ Error al purgar vistas antiguas: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def _loop(intervalo):
+    purgado_en = 0.0
+    while True:
+        _despertar.wait(intervalo)
+        _despertar.clear()
+        _ciclo()
+        if time.monotonic() - purgado_en >= PURGAR_CADA:
+            purgado_en = time.monotonic()
+            _purgar_seguro()
+
+
+def _ensure_flusher():
+    """Arranca (una vez por proceso) el hilo que vuelca el buffer periódicamente."""
+    global _flusher
+    if _flusher is not None:
+        return
+    intervalo = _intervalo()
+    with _flusher_lock:
+        if _flusher is not None:
+            return
+        atexit.register(_flush_seguro)
+        if intervalo <= 0:
+            # Sin hilo: el volcado queda en manos de flush_vistas() y del atexit
+            _flusher = False
+            return
+        _flusher = threading.Thread(target=_loop, args=(intervalo,), name='view-counter-flush', daemon=True)
+        _flusher.start()
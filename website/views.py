@@ -1,68 +1,31 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, aget_object_or_404
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods, require_POST
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import cache_control, never_cache
 from django.contrib import messages
 from django.conf import settings
 from django.utils import timezone
-from django.core.mail import send_mail, EmailMessage
+from django.db import transaction
+from .conditional import (
+    pagina_estatica, blog_post_condition, blog_listado_condition
+)
+from .outbox import encolar_email
+from .pagination import paginar
+from .recaptcha import averificar_recaptcha
 import json
 import re
-import urllib.request
-import urllib.parse
-
-
-def verificar_recaptcha(token):
-    """
-    Verifica un token de reCAPTCHA v3 con Google.
-    Retorna (valido: bool, score: float).
-    Si no hay secret key configurada (dev), siempre pasa.
-    Si Google falla, deja pasar para no bloquear usuarios reales.
-    """
-    secret = settings.RECAPTCHA_SECRET_KEY
-    if not secret:
-        print("⚠️ reCAPTCHA: RECAPTCHA_SECRET_KEY no configurado — pasando sin verificar")
-        return True, 1.0
-    if not token:
-        # Token vacío = POST directo sin pasar por el browser (bot)
-        print("⚠️ reCAPTCHA: token vacío — bloqueado (bot directo)")
-        return False, 0.0
-    try:
-        data = urllib.parse.urlencode({
-            'secret': secret,
-            'response': token,
-        }).encode()
-        req = urllib.request.Request(
-            'https://www.google.com/recaptcha/api/siteverify',
-            data=data
-        )
-        with urllib.request.urlopen(req, timeout=5) as resp:
-            result = json.loads(resp.read())
-
-        success = result.get('success', False)
-        score = result.get('score', 0.0)
-        error_codes = result.get('error-codes', [])
-
-        # Log completo para diagnóstico
-        print(f"🔍 reCAPTCHA resultado: success={success} score={score} errors={error_codes}")
 
-        # Claves mal configuradas → dejar pasar
-        if 'invalid-input-secret' in error_codes:
-            print("⚠️ reCAPTCHA: RECAPTCHA_SECRET_KEY inválido en Render — verifica las env vars")
-            return True, 1.0
 
-        # browser-error = problema de red del usuario con Google (no es bot)
-        # El token llegó desde el browser, pero Google no pudo verificar la comunicación.
-        # Un bot con POST directo nunca genera este error (tiene token vacío).
-        if 'browser-error' in error_codes:
-            print("⚠️ reCAPTCHA: browser-error — problema de red del usuario, dejando pasar")
-            return True, 1.0
+async def arender(request, template_name, context=None):
+    """render() para vistas async: la plantilla y sus {% cache %} (Redis, disco) no bloquean el event loop"""
+    return await sync_to_async(render)(request, template_name, context)
 
-        return success, score
-    except Exception as e:
-        print(f"⚠️ reCAPTCHA verify error: {str(e)}")
-        return True, 1.0  # Si Google falla, no penalizar al usuario
 
+@pagina_estatica('home.html', csrf=True)
 def home(request):
     """Vista principal de la página de inicio"""
     context = {
@@ -70,28 +33,81 @@ def home(request):
     }
     return render(request, 'home.html', context)
 
+@pagina_estatica('servicios.html')
 def servicios(request):
     """Vista de la página de servicios"""
     return render(request, 'servicios.html')
 
+@pagina_estatica('nosotros.html', csrf=True)
 def nosotros(request):
     """Vista de la página quiénes somos"""
     return render(request, 'nosotros.html')
 
+@pagina_estatica('landing_importacion.html', csrf=True)
 def landing_importacion(request):
     """Landing page SEO: empresa de importacion y exportacion panama"""
     return render(request, 'landing_importacion.html')
 
+@pagina_estatica('landing_china.html', csrf=True)
 def landing_china(request):
     """Landing page SEO: importar desde china a centroamerica"""
     return render(request, 'landing_china.html')
 
+def _blog_sidebar():
+    """
+    Sidebar del blog (categorías + recientes) renderizado y cacheado.
+    Se invalida con cualquier cambio en BlogPost (ver signals.py).
+    Retorna (html, total_posts).
+    """
+    from django.core.cache import cache
+    from django.db.models import Count
+    from django.template.loader import render_to_string
+    from django.utils.safestring import mark_safe
+    from .caching import versioned_key
+    from .models import BlogPost
+
+    key = versioned_key('blog', 'sidebar')
+    cached = cache.get(key)
+    if cached is None:
+        published_posts = BlogPost.objects.filter(is_published=True)
+
+        # Un solo GROUP BY para todas las categorías
+        totales = dict(
+            published_posts.order_by()
+            .values_list('category')
+            .annotate(total=Count('id'))
+        )
+        category_counts = {
+            category_code: {'name': category_name, 'count': totales.get(category_code, 0)}
+            for category_code, category_name in BlogPost.CATEGORY_CHOICES
+        }
+
+        # Posts recientes para sidebar (top 5)
+        recent_posts = published_posts.order_by('-created_at').only(
+            'title', 'slug', 'featured_image', 'featured_image_url', 'featured_image_variants', 'created_at'
+        )[:5]
+
+        cached = {
+            'html': render_to_string('_blog_sidebar.html', {
+                'category_counts': category_counts,
+                'recent_posts': recent_posts,
+            }),
+            'total_posts': sum(totales.values()),
+        }
+        cache.set(key, cached, timeout=settings.BLOG_SIDEBAR_TIMEOUT)
+
+    return mark_safe(cached['html']), cached['total_posts']
+
+@blog_listado_condition
 def blog(request):
     """Vista para la página principal del blog con datos dinámicos"""
     from .models import BlogPost
 
     # Posts publicados ordenados por fecha
-    published_posts = BlogPost.objects.filter(is_published=True).order_by('-created_at')
+    # Los listados no muestran el cuerpo del artículo
+    published_posts = BlogPost.objects.filter(is_published=True).order_by('-created_at').defer(
+        'content', 'content_html', 'toc'
+    )
 
     # Post destacado (primero con is_featured=True)
     featured_post = published_posts.filter(is_featured=True).first()
@@ -102,33 +118,27 @@ def blog(request):
     else:
         regular_posts = published_posts
 
-    # Posts recientes para sidebar (top 5)
-    recent_posts = published_posts[:5]
+    # Paginación por cursor sobre (created_at, id)
+    page = paginar(regular_posts, request, settings.BLOG_POSTS_PER_PAGE)
 
-    # Contar posts por categoría
-    category_counts = {}
-    for category_code, category_name in BlogPost.CATEGORY_CHOICES:
-        count = published_posts.filter(category=category_code).count()
-        category_counts[category_code] = {
-            'name': category_name,
-            'count': count
-        }
-
-    # Total de posts
-    total_posts = published_posts.count()
+    # Categorías, recientes y total salen del fragmento cacheado
+    sidebar_html, total_posts = _blog_sidebar()
 
     context = {
         'featured_post': featured_post,
-        'regular_posts': regular_posts,
-        'recent_posts': recent_posts,
-        'category_counts': category_counts,
+        'regular_posts': page.items,
+        'page': page,
+        'sidebar_html': sidebar_html,
         'total_posts': total_posts,
     }
 
     return render(request, 'blog.html', context)
 
+@blog_listado_condition
 def blog_categoria(request, categoria):
     """Vista de posts filtrados por categoría — página indexable por Google"""
+    from django.core.cache import cache
+    from .caching import versioned_key
     from .models import BlogPost
 
     CATEGORIAS = {
@@ -159,76 +169,147 @@ def blog_categoria(request, categoria):
         raise Http404
 
     info = CATEGORIAS[categoria]
-    posts = BlogPost.objects.filter(is_published=True, category=info['code']).order_by('-created_at')
+    posts = BlogPost.objects.filter(is_published=True, category=info['code']).defer(
+        'content', 'content_html', 'toc'
+    )
+
+    # Paginación por cursor sobre (created_at, id)
+    page = paginar(posts, request, settings.BLOG_POSTS_PER_PAGE)
+
+    # El total solo cambia al guardar un post: cacheado por versión del blog
+    key = versioned_key('blog', 'categoria', info['code'], 'total')
+    total = cache.get(key)
+    if total is None:
+        total = posts.count()
+        cache.set(key, total, timeout=settings.BLOG_SIDEBAR_TIMEOUT)
 
     context = {
         'categoria': info,
-        'posts': posts,
-        'total': posts.count(),
+        'posts': page.items,
+        'page': page,
+        'total': total,
     }
     return render(request, 'blog_categoria.html', context)
 
-def blog_post(request, slug=None):
+def blog_buscar(request):
+    """Búsqueda de texto completo en los artículos publicados"""
+    from .busqueda import buscar_posts, terminos
+
+    q = request.GET.get('q', '').strip()[:100]
+    posts = buscar_posts(q) if terminos(q) else []
+
+    return render(request, 'blog_buscar.html', {
+        'q': q,
+        'posts': posts,
+    })
+
+@require_http_methods(["GET"])
+@cache_control(public=True, max_age=60)
+def blog_autocompletar(request):
     """
-    Vista para artículo individual con conteo de vistas únicas
-    ⭐ ACTUALIZADO: Usa el campo 'views' existente
+    Sugerencias mientras se escribe en el buscador del blog.
+    Responde desde el índice en memoria (website/autocompletar.py), sin consultar la BD.
     """
-    from .models import BlogPost, BlogPostView
+    from .autocompletar import sugerir
+
+    q = request.GET.get('q', '')[:50]
+    return JsonResponse({'results': sugerir(q)})
+
+@cache_control(public=True, max_age=300)
+@blog_post_condition
+async def blog_post(request, slug=None):
+    """
+    Vista para artículo individual
+    El HTML no depende de las vistas: el contador se registra y se muestra
+    vía blog_vista (beacon), así la página completa se puede cachear.
+    """
+    from .models import BlogPost
     
     # Obtener el post por slug (o el primero si no hay slug)
     if slug:
-        post = get_object_or_404(BlogPost, slug=slug, is_published=True)
+        post = await aget_object_or_404(BlogPost, slug=slug, is_published=True)
     else:
         # Fallback: primer post publicado
-        post = BlogPost.objects.filter(is_published=True).first()
+        post = await BlogPost.objects.filter(is_published=True).afirst()
         if not post:
             # Si no hay posts, crear mensaje
-            return render(request, 'blog_post.html', {
+            return await arender(request, 'blog_post.html', {
                 'error': 'No hay artículos publicados aún.'
             })
-    
-    # Obtener IP del visitante
-    ip_address = get_client_ip(request)
-    user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]
-    
-    # Verificar si esta IP ya vio este post
-    try:
-        view, view_created = BlogPostView.objects.get_or_create(
-            post=post,
-            ip_address=ip_address,
-            defaults={'user_agent': user_agent}
-        )
-
-        # Solo incrementar si es vista NUEVA
-        if view_created:
-            post.views += 1
-            post.save()
-
-    except Exception as e:
-        pass  # Silenciar errores de tracking para no afectar la visualización
-    
-    # Obtener número de visitantes únicos
-    unique_visitors = post.unique_views.count()
 
     # Navegación anterior/siguiente
     published_posts_all = BlogPost.objects.filter(is_published=True).order_by('-created_at')
 
     # Post anterior (más nuevo)
-    previous_post = published_posts_all.filter(created_at__gt=post.created_at).order_by('created_at').first()
+    previous_post = await published_posts_all.filter(created_at__gt=post.created_at).order_by('created_at').afirst()
 
     # Post siguiente (más viejo)
-    next_post = published_posts_all.filter(created_at__lt=post.created_at).order_by('-created_at').first()
+    next_post = await published_posts_all.filter(created_at__lt=post.created_at).order_by('-created_at').afirst()
+
+    # Relacionados precalculados (website/relacionados.py): una consulta por índice
+    related_posts = [
+        r.relacionado async for r in post.relacionados.select_related('relacionado').only(
+            'post_id', 'relacionado__title', 'relacionado__slug', 'relacionado__created_at',
+            'relacionado__featured_image', 'relacionado__featured_image_url',
+            'relacionado__featured_image_variants',
+        ).filter(relacionado__is_published=True)
+    ]
 
     context = {
         'post': post,
-        'view_count': post.views,  # Total de vistas
-        'unique_visitors': unique_visitors,  # Visitantes únicos
         'previous_post': previous_post,  # Post anterior
         'next_post': next_post,  # Post siguiente
+        'related_posts': related_posts,
     }
     
-    return render(request, 'blog_post.html', context)
+    # La plantilla recorre relaciones (tags) de forma perezosa: renderizar en un hilo
+    return await arender(request, 'blog_post.html', context)
 
+@csrf_exempt
+@require_POST
+@never_cache
+async def blog_vista(request, slug):
+    """
+    Beacon de vistas: el JS del artículo lo llama después de cargar.
+    Registra la vista en el buffer y devuelve los contadores actuales.
+    Los bots (website/bots.py) se descartan antes de tocar la BD o el cache.
+    """
+    from .bots import es_bot
+    from .models import BlogPost, ResumenVistas
+    from .view_counter import registrar_vista
+
+    ip = get_client_ip(request)
+    user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]
+    if es_bot(user_agent, ip):
+        return JsonResponse({'success': True, 'tracked': False})
+
+    post = await BlogPost.objects.filter(slug=slug, is_published=True).values('pk', 'views').afirst()
+    if not post:
+        return JsonResponse({'success': False}, status=404)
+
+    # El buffer (memoria del worker) y el conteo (base de datos) son independientes
+    nueva, unique_visitors = await asyncio.gather(
+        sync_to_async(registrar_vista, thread_sensitive=False)(post['pk'], ip, user_agent),
+        ResumenVistas.objects.filter(post_id=post['pk']).values_list('visitantes', flat=True).afirst(),
+        return_exceptions=True,
+    )
+    if isinstance(nueva, Exception):
+        print(f"⚠️ Error registrando vista ({slug}): {str(nueva)}")
+        nueva = False
+    if isinstance(unique_visitors, Exception):
+        raise unique_visitors
+    unique_visitors = unique_visitors or 0
+
+    # La vista nueva todavía está en el buffer — se suma para mostrarla ya
+    extra = 1 if nueva else 0
+
+    return JsonResponse({
+        'success': True,
+        'views': post['views'] + extra,
+        'unique_visitors': unique_visitors + extra,
+    })
+
+@pagina_estatica('contacto.html', csrf=True)
 def contacto(request):
     """Vista de la página de contacto"""
     return render(request, 'contacto.html')
@@ -248,62 +329,60 @@ def solicitar_cotizacion(request):
             'message': 'Error al enviar la solicitud. Por favor intente nuevamente.'
         }, status=400)
 
+@pagina_estatica('privacidad.html')
 def privacidad(request):
     """Página de Política de Privacidad"""
     return render(request, 'privacidad.html')
 
+@pagina_estatica('terminos.html')
 def terminos(request):
     """Página de Términos y Condiciones"""
     return render(request, 'terminos.html')
 
-def asesoria(request):
+@pagina_estatica('asesoria.html', csrf=True)
+async def asesoria(request):
     """Vista para la página de asesoría"""
     from .models import ConsultaAsesoria
     
     if request.method == 'POST':
         # Honeypot: si viene relleno es un bot
         if request.POST.get('website', ''):
-            return render(request, 'asesoria.html', {'mensaje_exito': True, 'nombre': 'Usuario'})
+            return await arender(request, 'asesoria.html', {'mensaje_exito': True, 'nombre': 'Usuario'})
 
         nombre = request.POST.get('nombre', '').strip()
 
         # reCAPTCHA v3
         recaptcha_token = request.POST.get('recaptcha_token', '')
-        valido, score = verificar_recaptcha(recaptcha_token)
+        valido, score = await averificar_recaptcha(recaptcha_token)
         if not valido or score < 0.5:
             print(f"⚠️ reCAPTCHA asesoria bloqueado — score: {score} IP: {get_client_ip(request)}")
-            return render(request, 'asesoria.html', {'mensaje_exito': True, 'nombre': nombre or 'Usuario'})
+            return await arender(request, 'asesoria.html', {'mensaje_exito': True, 'nombre': nombre or 'Usuario'})
 
         email = request.POST.get('email', '').strip()
         telefono = request.POST.get('telefono', '').strip()
         duda = request.POST.get('duda', '').strip()
 
         if not all([nombre, email, telefono, duda]):
-            return render(request, 'asesoria.html', {
+            return await arender(request, 'asesoria.html', {
                 'mensaje_error': 'Por favor completa todos los campos requeridos.',
                 'form': request.POST
             })
         
-        try:
-            consulta = ConsultaAsesoria.objects.create(
-                nombre=nombre,
-                email=email,
-                telefono=telefono,
-                duda=duda,
-                ip_address=get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')[:500]
-            )
-
-            # Registrar en Google Sheets
-            from .sheets import log_to_sheets
-            log_to_sheets('Asesoria', [
-                timezone.now().strftime('%Y-%m-%d %H:%M'),
-                nombre, email, telefono, duda
-            ])
-
-            # Notificación al equipo de Pacunato
-            try:
-                msg = EmailMessage(
+        # El lead y sus efectos secundarios se guardan juntos;
+        # el worker `procesar_outbox` los entrega fuera del request
+        def guardar():
+            with transaction.atomic():
+                consulta = ConsultaAsesoria.objects.create(
+                    nombre=nombre,
+                    email=email,
+                    telefono=telefono,
+                    duda=duda,
+                    ip_address=get_client_ip(request),
+                    user_agent=request.META.get('HTTP_USER_AGENT', '')[:500]
+                )
+
+                # Notificación al equipo de Pacunato
+                encolar_email(
                     subject=f'[Nueva Consulta de Asesoría] {nombre} — {email}',
                     body=(
                         f'Tipo: Consulta de Asesoría\n\n'
@@ -313,20 +392,15 @@ def asesoria(request):
                         f'Consulta:\n{duda}\n\n'
                         f'ID en base de datos: #{consulta.id}'
                     ),
-                    from_email=settings.DEFAULT_FROM_EMAIL,
                     to=[settings.CONTACT_EMAIL],
                     reply_to=[email],
+                    origen=consulta,
                 )
-                msg.send(fail_silently=False)
-                print(f"✅ Email equipo enviado — Asesoría #{consulta.id}")
-            except Exception as e:
-                print(f"⚠️ Error email equipo (Asesoría): {str(e)}")
-
-            # Auto-respuesta al usuario
-            try:
-                send_mail(
+
+                # Auto-respuesta al usuario
+                encolar_email(
                     subject='Recibimos tu consulta — Pacunato S.A.',
-                    message=(
+                    body=(
                         f'Hola {nombre},\n\n'
                         f'gracias por contactarnos, en breve nuestro equipo se pondrá en contacto.\n\n'
                         f'Tu consulta:\n{duda}\n\n'
@@ -334,15 +408,17 @@ def asesoria(request):
                         f'o por WhatsApp al +507 6441-8437.\n\n'
                         f'Saludos,\nEquipo Pacunato S.A.'
                     ),
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[email],
-                    fail_silently=False,
+                    to=[email],
+                    origen=consulta,
                 )
-                print(f"✅ Email cliente enviado — Asesoría #{consulta.id} → {email}")
-            except Exception as e:
-                print(f"⚠️ Error email cliente (Asesoría): {str(e)}")
+            return consulta
+
+        try:
+            consulta = await sync_to_async(guardar)()
+
+            print(f"✅ Asesoría #{consulta.id} guardada — emails en cola")
 
-            return render(request, 'asesoria.html', {
+            return await arender(request, 'asesoria.html', {
                 'mensaje_exito': True,
                 'nombre': nombre,
                 'email': email,
@@ -352,14 +428,14 @@ def asesoria(request):
         except Exception as e:
             print(f"Error al procesar consulta de asesoría: {str(e)}")
             
-            return render(request, 'asesoria.html', {
+            return await arender(request, 'asesoria.html', {
                 'mensaje_error': 'Hubo un problema al enviar tu consulta. Por favor intenta de nuevo o contáctanos por WhatsApp.',
                 'form': request.POST
             })
     
-    return render(request, 'asesoria.html')
+    return await arender(request, 'asesoria.html')
 
-def cotizacion(request):
+async def cotizacion(request):
     """Vista para procesar el formulario de cotización"""
     from .models import SolicitudCotizacion
     
@@ -380,7 +456,7 @@ def cotizacion(request):
 
         # reCAPTCHA v3
         recaptcha_token = request.POST.get('recaptcha_token', '')
-        valido, score = verificar_recaptcha(recaptcha_token)
+        valido, score = await averificar_recaptcha(recaptcha_token)
         if not valido or score < 0.5:
             print(f"⚠️ reCAPTCHA cotizacion bloqueado — score: {score} IP: {get_client_ip(request)}")
             messages.success(request, f'¡Gracias {nombre or "!"}! Tu solicitud ha sido enviada.')
@@ -391,75 +467,66 @@ def cotizacion(request):
             return redirect('website:home')
 
         try:
-            solicitud = SolicitudCotizacion.objects.create(
-                nombre=nombre,
-                empresa=empresa,
-                email=email,
-                telefono=telefono,
-                pais_origen=pais_origen,
-                pais_destino=pais_destino,
-                tipo_servicio=tipo_servicio,
-                mensaje=mensaje,
-                source_page=source_page,
-                ip_address=get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')[:500]
-            )
-
-            # Registrar en Google Sheets
-            from .sheets import log_to_sheets
-            fuente_display = 'Landing Importación' if source_page == 'landing-importacion' else (source_page or 'Home')
-            log_to_sheets('Cotizacion', [
-                timezone.now().strftime('%Y-%m-%d %H:%M'),
-                nombre, empresa, email, telefono,
-                pais_origen, pais_destino, tipo_servicio, mensaje, fuente_display
-            ])
-
-            # Notificación al equipo de Pacunato
             empresa_str = f' ({empresa})' if empresa else ''
             fuente_label = f'⭐ LANDING: empresa-importacion-exportacion-panama' if source_page == 'landing-importacion' else f'Página: {source_page or "Home"}'
-            try:
-                msg = EmailMessage(
-                    subject=f'[Nueva Cotización] {nombre}{empresa_str} — {pais_origen} → {pais_destino}',
-                    body=(
-                        f'Tipo: Solicitud de Cotización\n'
-                        f'Fuente: {fuente_label}\n\n'
-                        f'Nombre: {nombre}\n'
-                        f'Empresa: {empresa or "No especificada"}\n'
-                        f'Email: {email}\n'
-                        f'Teléfono: {telefono}\n'
-                        f'Ruta: {pais_origen} → {pais_destino}\n'
-                        f'Servicio: {tipo_servicio}\n\n'
-                        f'Descripción:\n{mensaje}\n\n'
-                        f'ID en base de datos: #{solicitud.id}'
-                    ),
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=[settings.CONTACT_EMAIL],
-                    reply_to=[email],
-                )
-                msg.send(fail_silently=False)
-                print(f"✅ Email equipo enviado — Cotización #{solicitud.id}")
-            except Exception as e:
-                print(f"⚠️ Error email equipo (Cotización): {str(e)}")
-
-            # Auto-respuesta al usuario
-            try:
-                send_mail(
-                    subject='Recibimos tu solicitud de cotización — Pacunato S.A.',
-                    message=(
-                        f'Hola {nombre},\n\n'
-                        f'gracias por contactarnos, en breve nuestro equipo se pondrá en contacto.\n\n'
-                        f'Tu solicitud de cotización para la ruta {pais_origen} → {pais_destino} ha sido recibida.\n\n'
-                        f'Si tienes una urgencia, escríbenos a info@pacunato.com '
-                        f'o por WhatsApp al +507 6441-8437.\n\n'
-                        f'Saludos,\nEquipo Pacunato S.A.'
-                    ),
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[email],
-                    fail_silently=False,
-                )
-                print(f"✅ Email cliente enviado — Cotización #{solicitud.id} → {email}")
-            except Exception as e:
-                print(f"⚠️ Error email cliente (Cotización): {str(e)}")
+
+            # El lead y sus efectos secundarios se guardan juntos;
+            # el worker `procesar_outbox` los entrega fuera del request
+            def guardar():
+                with transaction.atomic():
+                    solicitud = SolicitudCotizacion.objects.create(
+                        nombre=nombre,
+                        empresa=empresa,
+                        email=email,
+                        telefono=telefono,
+                        pais_origen=pais_origen,
+                        pais_destino=pais_destino,
+                        tipo_servicio=tipo_servicio,
+                        mensaje=mensaje,
+                        source_page=source_page,
+                        ip_address=get_client_ip(request),
+                        user_agent=request.META.get('HTTP_USER_AGENT', '')[:500]
+                    )
+
+                    # Notificación al equipo de Pacunato
+                    encolar_email(
+                        subject=f'[Nueva Cotización] {nombre}{empresa_str} — {pais_origen} → {pais_destino}',
+                        body=(
+                            f'Tipo: Solicitud de Cotización\n'
+                            f'Fuente: {fuente_label}\n\n'
+                            f'Nombre: {nombre}\n'
+                            f'Empresa: {empresa or "No especificada"}\n'
+                            f'Email: {email}\n'
+                            f'Teléfono: {telefono}\n'
+                            f'Ruta: {pais_origen} → {pais_destino}\n'
+                            f'Servicio: {tipo_servicio}\n\n'
+                            f'Descripción:\n{mensaje}\n\n'
+                            f'ID en base de datos: #{solicitud.id}'
+                        ),
+                        to=[settings.CONTACT_EMAIL],
+                        reply_to=[email],
+                        origen=solicitud,
+                    )
+
+                    # Auto-respuesta al usuario
+                    encolar_email(
+                        subject='Recibimos tu solicitud de cotización — Pacunato S.A.',
+                        body=(
+                            f'Hola {nombre},\n\n'
+                            f'gracias por contactarnos, en breve nuestro equipo se pondrá en contacto.\n\n'
+                            f'Tu solicitud de cotización para la ruta {pais_origen} → {pais_destino} ha sido recibida.\n\n'
+                            f'Si tienes una urgencia, escríbenos a info@pacunato.com '
+                            f'o por WhatsApp al +507 6441-8437.\n\n'
+                            f'Saludos,\nEquipo Pacunato S.A.'
+                        ),
+                        to=[email],
+                        origen=solicitud,
+                    )
+                return solicitud
+
+            solicitud = await sync_to_async(guardar)()
+
+            print(f"✅ Cotización #{solicitud.id} guardada — emails en cola")
 
             messages.success(request, f'¡Gracias {nombre}! Tu solicitud ha sido enviada.')
             return redirect('website:home')
@@ -473,7 +540,7 @@ def cotizacion(request):
 
 @csrf_exempt
 @require_POST
-def suscribir_newsletter(request):
+async def suscribir_newsletter(request):
     """Vista para suscripción al newsletter y solicitud de guía"""
     from .models import NewsletterSubscriber
 
@@ -486,7 +553,7 @@ def suscribir_newsletter(request):
 
         # reCAPTCHA v3
         recaptcha_token = data.get('recaptcha_token', '')
-        valido, score = verificar_recaptcha(recaptcha_token)
+        valido, score = await averificar_recaptcha(recaptcha_token)
         if not valido or score < 0.5:
             print(f"⚠️ reCAPTCHA newsletter bloqueado — score: {score}")
             return JsonResponse({'success': True, 'message': '¡Gracias por suscribirte!'})
@@ -506,156 +573,148 @@ def suscribir_newsletter(request):
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         es_guia = source == 'home-lead-magnet'
 
-        subscriber, created = NewsletterSubscriber.objects.get_or_create(
-            email=email,
-            defaults={
-                'name': name,
-                'is_active': True,
-                'ip_address': ip_address,
-                'user_agent': user_agent,
-                'source_page': source,
-                'consent_given': True,
-                'consent_date': timezone.now()
-            }
-        )
-
-        if created:
-            message = '¡Gracias! Revisa tu correo.' if es_guia else '¡Gracias por suscribirte!'
-            is_new = True
-        else:
-            if subscriber.is_active and not es_guia:
-                return JsonResponse({'success': False, 'message': 'Este email ya está suscrito'}, status=400)
-            subscriber.is_active = True
-            subscriber.unsubscribed_date = None
-            subscriber.consent_date = timezone.now()
-            subscriber.name = name if name else subscriber.name
-            subscriber.ip_address = ip_address
-            subscriber.user_agent = user_agent
-            subscriber.source_page = source
-            subscriber.save()
-            message = '¡Gracias! Revisa tu correo.' if es_guia else '¡Bienvenido de nuevo!'
-            is_new = False
-
-        nombre_display = name if name else 'Cliente'
-
-        # Registrar en Google Sheets
-        from .sheets import log_to_sheets
-        if es_guia:
-            log_to_sheets('Guia', [
-                timezone.now().strftime('%Y-%m-%d %H:%M'),
-                nombre_display, email
-            ])
-        else:
-            log_to_sheets('Newsletter', [
-                timezone.now().strftime('%Y-%m-%d %H:%M'),
-                nombre_display, email, source
-            ])
-
-        # --- Email a info@pacunato.com ---
-        try:
-            tipo_label = 'Solicitud de Guía de Importación' if es_guia else 'Suscripción al Newsletter'
-            msg = EmailMessage(
-                subject=f'[{tipo_label}] {nombre_display} — {email}',
-                body=(
-                    f'Tipo: {tipo_label}\n\n'
-                    f'Nombre: {nombre_display}\n'
-                    f'Email: {email}\n'
-                    f'Fuente: {source}\n'
-                    f'Estado: {"Nuevo suscriptor" if is_new else "Suscriptor reactivado"}\n'
-                    f'IP: {ip_address}'
-                ),
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[settings.CONTACT_EMAIL],
-                reply_to=[email],
-            )
-            msg.send(fail_silently=False)
-        except Exception as e:
-            print(f"⚠️ Error email interno: {str(e)}")
+        # El suscriptor y sus efectos secundarios se guardan juntos;
+        # el worker `procesar_outbox` los entrega fuera del request
+        def guardar():
+            with transaction.atomic():
+                subscriber, created = NewsletterSubscriber.objects.get_or_create(
+                    email=email,
+                    defaults={
+                        'name': name,
+                        'is_active': True,
+                        'ip_address': ip_address,
+                        'user_agent': user_agent,
+                        'source_page': source,
+                        'consent_given': True,
+                        'consent_date': timezone.now()
+                    }
+                )
 
-        # --- Auto-respuesta al usuario ---
-        try:
-            if es_guia:
-                # Email con la guía de importación
-                asunto_usuario = 'Tu Guía de Importación — Pacunato S.A.'
-                cuerpo_usuario = (
-                    f'Hola {nombre_display},\n\n'
-                    f'gracias por tu interés en Pacunato S.A. Aquí está tu guía completa sobre cómo importar a Centroamérica y el Caribe desde Panamá.\n\n'
-                    f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n'
-                    f'CÓMO IMPORTAR A CENTROAMÉRICA Y EL CARIBE DESDE PANAMÁ\n'
-                    f'Guía Completa para Empresas — 2026\n'
-                    f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n'
-                    f'Panamá, con su Zona Libre de Colón — la segunda zona franca más grande del mundo — '
-                    f'actúa como hub natural para abastecer a empresas importadoras en Guatemala, Honduras, El Salvador, '
-                    f'Costa Rica, República Dominicana y otros mercados de la región con productos de todo el mundo.\n\n'
-                    f'¿POR QUÉ PANAMÁ ES EL PUNTO DE PARTIDA IDEAL?\n\n'
-                    f'• Zona Libre de Colón: más de 2,600 empresas operando, acceso a productos de Asia, Europa y Norteamérica\n'
-                    f'• Conectividad marítima directa: rutas regulares hacia los principales puertos centroamericanos y caribeños\n'
-                    f'• Infraestructura logística avanzada: operadores y agencias con experiencia en todas las rutas regionales\n'
-                    f'• Ubicación estratégica: acceso directo al Pacífico y al Atlántico, pocos días de tránsito a cualquier destino\n\n'
-                    f'PROCESO PASO A PASO\n\n'
-                    f'1. Identificar el producto y el proveedor\n'
-                    f'   Desde Panamá puedes acceder a proveedores globales. En Pacunato buscamos y verificamos proveedores para que no tengas que hacerlo tú.\n\n'
-                    f'2. Verificar los requisitos de importación en el país destino\n'
-                    f'   Cada país tiene sus propios aranceles, restricciones y permisos especiales. Verificarlo antes evita costosas demoras en aduana.\n\n'
-                    f'3. Definir el importador o receptor en destino\n'
-                    f'   Puede ser tu propia empresa, un distribuidor local o un operador logístico. Este paso define los documentos y los impuestos que aplican.\n\n'
-                    f'4. Elegir la modalidad de transporte y cotizar el flete\n'
-                    f'   • LCL (consolidada): ideal para volúmenes pequeños y medianos, reduce costos\n'
-                    f'   • FCL (contenedor completo): para volúmenes mayores, mayor control e integridad de la carga\n'
-                    f'   Tiempo de tránsito: 3 a 7 días a puertos centroamericanos.\n\n'
-                    f'5. Preparar la documentación\n'
-                    f'   Factura comercial, packing list, Bill of Lading, certificado de origen y permisos sanitarios o técnicos según el producto.\n\n'
-                    f'6. Despacho aduanero en destino\n'
-                    f'   Lo gestiona el importador o su agente de aduana local. El valor en aduana incluye costo + seguro + flete (valor CIF).\n\n'
-                    f'ERRORES MÁS COMUNES (Y CÓMO EVITARLOS)\n\n'
-                    f'✗ No verificar los aranceles con anticipación — varían significativamente entre países\n'
-                    f'✗ Subestimar los tiempos — el proceso completo puede tomar entre 3 y 6 semanas\n'
-                    f'✗ Elegir productos con restricciones sin verificarlo — algunos requieren registros previos\n'
-                    f'✗ No consolidar la carga — pierdes dinero enviando contenedores a medio llenar\n\n'
-                    f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n'
-                    f'¿Listo para importar? En Pacunato S.A. nos encargamos de todo el proceso.\n'
-                    f'Solicita tu cotización gratuita en: https://www.pacunato.com/#cotizacion\n\n'
-                    f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n'
-                    f'DATOS DE CONTACTO\n'
-                    f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n'
-                    f'Pacunato S.A.\n'
-                    f'Email: info@pacunato.com\n'
-                    f'WhatsApp: +507 6441-8437\n'
-                    f'Web: https://www.pacunato.com\n\n'
-                    f'De vez en cuando nuestro equipo te enviará recomendaciones, novedades del sector '
-                    f'y contenido de interés sobre importaciones y comercio internacional.\n\n'
-                    f'Saludos,\nEquipo Pacunato S.A.'
+                if created:
+                    message = '¡Gracias! Revisa tu correo.' if es_guia else '¡Gracias por suscribirte!'
+                    is_new = True
+                else:
+                    if subscriber.is_active and not es_guia:
+                        return None  # Ya está suscrito
+                    subscriber.is_active = True
+                    subscriber.unsubscribed_date = None
+                    subscriber.consent_date = timezone.now()
+                    subscriber.name = name if name else subscriber.name
+                    subscriber.ip_address = ip_address
+                    subscriber.user_agent = user_agent
+                    subscriber.source_page = source
+                    subscriber.sent_to_make = False  # Hay tareas nuevas en el outbox
+                    subscriber.synced_to_sheets = False  # Volver a registrarlo en Sheets
+                    subscriber.sheets_claimed_at = None  # Anula una subida en curso
+                    subscriber.save()
+                    message = '¡Gracias! Revisa tu correo.' if es_guia else '¡Bienvenido de nuevo!'
+                    is_new = False
+
+                nombre_display = name if name else 'Cliente'
+
+                # --- Email a info@pacunato.com ---
+                tipo_label = 'Solicitud de Guía de Importación' if es_guia else 'Suscripción al Newsletter'
+                encolar_email(
+                    subject=f'[{tipo_label}] {nombre_display} — {email}',
+                    body=(
+                        f'Tipo: {tipo_label}\n\n'
+                        f'Nombre: {nombre_display}\n'
+                        f'Email: {email}\n'
+                        f'Fuente: {source}\n'
+                        f'Estado: {"Nuevo suscriptor" if is_new else "Suscriptor reactivado"}\n'
+                        f'IP: {ip_address}'
+                    ),
+                    to=[settings.CONTACT_EMAIL],
+                    reply_to=[email],
+                    origen=subscriber,
                 )
-            else:
-                # Email de bienvenida al newsletter
-                asunto_usuario = 'Bienvenido al Newsletter de Pacunato S.A.'
-                cuerpo_usuario = (
-                    f'Hola {nombre_display},\n\n'
-                    f'gracias por suscribirte. A partir de ahora recibirás de nuestra parte:\n\n'
-                    f'• Guías prácticas sobre importaciones y logística internacional\n'
-                    f'• Novedades del sector de comercio exterior en Panamá y Centroamérica\n'
-                    f'• Consejos para optimizar tus operaciones de importación\n'
-                    f'• Oportunidades y tendencias del mercado\n\n'
-                    f'Si en algún momento necesitas importar o tienes alguna consulta, estamos aquí para ayudarte.\n\n'
-                    f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n'
-                    f'DATOS DE CONTACTO\n'
-                    f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n'
-                    f'Pacunato S.A.\n'
-                    f'Email: info@pacunato.com\n'
-                    f'WhatsApp: +507 6441-8437\n'
-                    f'Web: https://www.pacunato.com\n\n'
-                    f'Saludos,\nEquipo Pacunato S.A.'
+
+                # --- Auto-respuesta al usuario ---
+                if es_guia:
+                    # Email con la guía de importación
+                    asunto_usuario = 'Tu Guía de Importación — Pacunato S.A.'
+                    cuerpo_usuario = (
+                        f'Hola {nombre_display},\n\n'
+                        f'gracias por tu interés en Pacunato S.A. Aquí está tu guía completa sobre cómo importar a Centroamérica y el Caribe desde Panamá.\n\n'
+                        f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n'
+                        f'CÓMO IMPORTAR A CENTROAMÉRICA Y EL CARIBE DESDE PANAMÁ\n'
+                        f'Guía Completa para Empresas — 2026\n'
+                        f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n'
+                        f'Panamá, con su Zona Libre de Colón — la segunda zona franca más grande del mundo — '
+                        f'actúa como hub natural para abastecer a empresas importadoras en Guatemala, Honduras, El Salvador, '
+                        f'Costa Rica, República Dominicana y otros mercados de la región con productos de todo el mundo.\n\n'
+                        f'¿POR QUÉ PANAMÁ ES EL PUNTO DE PARTIDA IDEAL?\n\n'
+                        f'• Zona Libre de Colón: más de 2,600 empresas operando, acceso a productos de Asia, Europa y Norteamérica\n'
+                        f'• Conectividad marítima directa: rutas regulares hacia los principales puertos centroamericanos y caribeños\n'
+                        f'• Infraestructura logística avanzada: operadores y agencias con experiencia en todas las rutas regionales\n'
+                        f'• Ubicación estratégica: acceso directo al Pacífico y al Atlántico, pocos días de tránsito a cualquier destino\n\n'
+                        f'PROCESO PASO A PASO\n\n'
+                        f'1. Identificar el producto y el proveedor\n'
+                        f'   Desde Panamá puedes acceder a proveedores globales. En Pacunato buscamos y verificamos proveedores para que no tengas que hacerlo tú.\n\n'
+                        f'2. Verificar los requisitos de importación en el país destino\n'
+                        f'   Cada país tiene sus propios aranceles, restricciones y permisos especiales. Verificarlo antes evita costosas demoras en aduana.\n\n'
+                        f'3. Definir el importador o receptor en destino\n'
+                        f'   Puede ser tu propia empresa, un distribuidor local o un operador logístico. Este paso define los documentos y los impuestos que aplican.\n\n'
+                        f'4. Elegir la modalidad de transporte y cotizar el flete\n'
+                        f'   • LCL (consolidada): ideal para volúmenes pequeños y medianos, reduce costos\n'
+                        f'   • FCL (contenedor completo): para volúmenes mayores, mayor control e integridad de la carga\n'
+                        f'   Tiempo de tránsito: 3 a 7 días a puertos centroamericanos.\n\n'
+                        f'5. Preparar la documentación\n'
+                        f'   Factura comercial, packing list, Bill of Lading, certificado de origen y permisos sanitarios o técnicos según el producto.\n\n'
+                        f'6. Despacho aduanero en destino\n'
+                        f'   Lo gestiona el importador o su agente de aduana local. El valor en aduana incluye costo + seguro + flete (valor CIF).\n\n'
+                        f'ERRORES MÁS COMUNES (Y CÓMO EVITARLOS)\n\n'
+                        f'✗ No verificar los aranceles con anticipación — varían significativamente entre países\n'
+                        f'✗ Subestimar los tiempos — el proceso completo puede tomar entre 3 y 6 semanas\n'
+                        f'✗ Elegir productos con restricciones sin verificarlo — algunos requieren registros previos\n'
+                        f'✗ No consolidar la carga — pierdes dinero enviando contenedores a medio llenar\n\n'
+                        f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n'
+                        f'¿Listo para importar? En Pacunato S.A. nos encargamos de todo el proceso.\n'
+                        f'Solicita tu cotización gratuita en: https://www.pacunato.com/#cotizacion\n\n'
+                        f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n'
+                        f'DATOS DE CONTACTO\n'
+                        f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n'
+                        f'Pacunato S.A.\n'
+                        f'Email: info@pacunato.com\n'
+                        f'WhatsApp: +507 6441-8437\n'
+                        f'Web: https://www.pacunato.com\n\n'
+                        f'De vez en cuando nuestro equipo te enviará recomendaciones, novedades del sector '
+                        f'y contenido de interés sobre importaciones y comercio internacional.\n\n'
+                        f'Saludos,\nEquipo Pacunato S.A.'
+                    )
+                else:
+                    # Email de bienvenida al newsletter
+                    asunto_usuario = 'Bienvenido al Newsletter de Pacunato S.A.'
+                    cuerpo_usuario = (
+                        f'Hola {nombre_display},\n\n'
+                        f'gracias por suscribirte. A partir de ahora recibirás de nuestra parte:\n\n'
+                        f'• Guías prácticas sobre importaciones y logística internacional\n'
+                        f'• Novedades del sector de comercio exterior en Panamá y Centroamérica\n'
+                        f'• Consejos para optimizar tus operaciones de importación\n'
+                        f'• Oportunidades y tendencias del mercado\n\n'
+                        f'Si en algún momento necesitas importar o tienes alguna consulta, estamos aquí para ayudarte.\n\n'
+                        f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n'
+                        f'DATOS DE CONTACTO\n'
+                        f'━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n'
+                        f'Pacunato S.A.\n'
+                        f'Email: info@pacunato.com\n'
+                        f'WhatsApp: +507 6441-8437\n'
+                        f'Web: https://www.pacunato.com\n\n'
+                        f'Saludos,\nEquipo Pacunato S.A.'
+                    )
+
+                encolar_email(
+                    subject=asunto_usuario,
+                    body=cuerpo_usuario,
+                    to=[email],
+                    origen=subscriber,
                 )
+            return message, is_new
 
-            send_mail(
-                subject=asunto_usuario,
-                message=cuerpo_usuario,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email],
-                fail_silently=False,
-            )
-        except Exception as e:
-            print(f"⚠️ Error email usuario: {str(e)}")
+        guardado = await sync_to_async(guardar)()
+        if guardado is None:
+            return JsonResponse({'success': False, 'message': 'Este email ya está suscrito'}, status=400)
+        message, is_new = guardado
 
         print(f"✅ Newsletter: {email} — {'Guía' if es_guia else 'Newsletter'} — {'Nuevo' if is_new else 'Reactivado'}")
 
@@ -685,65 +744,33 @@ def get_client_ip(request):
 # SEO: SITEMAP.XML Y ROBOTS.TXT
 # ============================================
 
-def sitemap_xml(request):
+def sitemap_xml(request, section=None):
     """
-    Genera sitemap.xml dinámico con todas las URLs del sitio
-    Incluye páginas estáticas y posts del blog
+    Sirve sitemap.xml (o una sección sitemap-<n>.xml) desde el cache.
+    Responde 304 si el crawler ya tiene la versión actual (ETag / Last-Modified).
+    Con más de SITEMAP_MAX_URLS URLs, sitemap.xml es un índice de secciones.
     """
-    from django.http import HttpResponse
-    from django.urls import reverse
-    from .models import BlogPost
-    from datetime import datetime
-
-    # Dominio base (cambiar cuando tengas dominio real)
-    base_url = 'https://www.pacunato.com'
-
-    # URLs estáticas con prioridades
-    static_urls = [
-        {'loc': reverse('website:home'), 'priority': '1.0', 'changefreq': 'daily'},
-        {'loc': reverse('website:servicios'), 'priority': '0.9', 'changefreq': 'weekly'},
-        {'loc': reverse('website:landing_importacion'), 'priority': '0.9', 'changefreq': 'monthly'},
-        {'loc': reverse('website:landing_china'), 'priority': '0.9', 'changefreq': 'monthly'},
-        {'loc': reverse('website:nosotros'), 'priority': '0.8', 'changefreq': 'monthly'},
-        {'loc': reverse('website:blog'), 'priority': '0.8', 'changefreq': 'daily'},
-        {'loc': reverse('website:blog_categoria', kwargs={'categoria': 'logistica'}), 'priority': '0.7', 'changefreq': 'weekly'},
-        {'loc': reverse('website:blog_categoria', kwargs={'categoria': 'comercio'}), 'priority': '0.7', 'changefreq': 'weekly'},
-        {'loc': reverse('website:contacto'), 'priority': '0.7', 'changefreq': 'monthly'},
-        {'loc': reverse('website:asesoria'), 'priority': '0.7', 'changefreq': 'monthly'},
-        {'loc': reverse('website:cotizacion'), 'priority': '0.7', 'changefreq': 'monthly'},
-        {'loc': reverse('website:privacidad'), 'priority': '0.3', 'changefreq': 'yearly'},
-        {'loc': reverse('website:terminos'), 'priority': '0.3', 'changefreq': 'yearly'},
-    ]
+    from django.http import HttpResponse, Http404
+    from django.utils.cache import get_conditional_response
+    from django.utils.http import http_date
+    from .sitemap import get_sitemap
+
+    entry = get_sitemap(section)
+    if entry is None:
+        raise Http404
 
-    # Blog posts dinámicos
-    blog_posts = BlogPost.objects.filter(is_published=True).order_by('-created_at')
-
-    # Generar XML
-    xml = ['<?xml version="1.0" encoding="UTF-8"?>']
-    xml.append('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
-
-    # Agregar URLs estáticas
-    for url in static_urls:
-        xml.append('  <url>')
-        xml.append(f'    <loc>{base_url}{url["loc"]}</loc>')
-        xml.append(f'    <changefreq>{url["changefreq"]}</changefreq>')
-        xml.append(f'    <priority>{url["priority"]}</priority>')
-        xml.append(f'    <lastmod>{datetime.now().strftime("%Y-%m-%d")}</lastmod>')
-        xml.append('  </url>')
-
-    # Agregar blog posts
-    for post in blog_posts:
-        post_url = reverse('website:blog_post', kwargs={'slug': post.slug})
-        xml.append('  <url>')
-        xml.append(f'    <loc>{base_url}{post_url}</loc>')
-        xml.append(f'    <changefreq>weekly</changefreq>')
-        xml.append(f'    <priority>0.6</priority>')
-        xml.append(f'    <lastmod>{post.updated_at.strftime("%Y-%m-%d")}</lastmod>')
-        xml.append('  </url>')
-
-    xml.append('</urlset>')
-
-    return HttpResponse('\n'.join(xml), content_type='application/xml')
+    last_modified = int(entry['last_modified'].timestamp())
+    not_modified = get_conditional_response(
+        request, etag=entry['etag'], last_modified=last_modified
+    )
+    if not_modified is not None:
+        return not_modified
+
+    response = HttpResponse(entry['xml'], content_type='application/xml')
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
 
 def robots_txt(request):
     """